@@ -1,11 +1,28 @@
 """Admin of django-peertube-runner-connector app."""
 
-from django.contrib import admin
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.utils import unquote
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.http import urlencode
 
 from django_peertube_runner_connector.models import (
     Runner,
     RunnerJob,
+    RunnerJobArchive,
     RunnerRegistrationToken,
+    RunnerStats,
     Video,
     VideoFile,
     VideoJobInfo,
@@ -13,6 +30,49 @@ from django_peertube_runner_connector.models import (
 )
 
 
+DEFAULT_ESTIMATED_COUNT_THRESHOLD = 10000
+DEFAULT_DASHBOARD_CACHE_TIMEOUT = 30  # seconds
+DASHBOARD_KEY = "django_peertube_runner_connector:admin_dashboard"
+DASHBOARD_WINDOW = timedelta(hours=1)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting the rows of the large unfiltered tables with an estimate.
+
+    An exact count scans the whole table. When the changelist is not filtered,
+    the row count estimated by PostgreSQL is used instead if it is above
+    `TRANSCODING_ADMIN_ESTIMATED_COUNT_THRESHOLD`.
+    """
+
+    def get_estimated_count(self):
+        """Return the row count of the table estimated by the database, if any."""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql" or queryset.query.where:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],  # pylint: disable=protected-access
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+    @cached_property
+    def count(self):
+        threshold = getattr(
+            settings,
+            "TRANSCODING_ADMIN_ESTIMATED_COUNT_THRESHOLD",
+            DEFAULT_ESTIMATED_COUNT_THRESHOLD,
+        )
+        estimated_count = self.get_estimated_count()
+        if estimated_count is not None and estimated_count > threshold:
+            return estimated_count
+        return super().count
+
+
 @admin.register(RunnerRegistrationToken)
 class RunnerRegistrationTokenAdmin(admin.ModelAdmin):
     """Base admin class for RunnerRegistrationToken."""
@@ -58,9 +118,179 @@ class RunnerJobAdmin(admin.ModelAdmin):
         "updatedAt",
     )
 
-    search_fields = ("type", "state", "uuid")
+    list_select_related = ("dependsOnRunnerJob", "runner")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    search_fields = ("=uuid",)
     list_filter = ("type", "state")
 
+    def get_urls(self):
+        """Add the queue dashboard to the urls of the runner jobs."""
+        return [
+            path(
+                "dashboard/",
+                self.admin_site.admin_view(self.dashboard_view),
+                name="django_peertube_runner_connector_runnerjob_dashboard",
+            ),
+            *super().get_urls(),
+        ]
+
+    def get_queue_summary(self):
+        """
+        Return the queue summary of each job type, cached.
+
+        The summary is computed with a single grouped query and cached for
+        `TRANSCODING_ADMIN_DASHBOARD_CACHE_TIMEOUT` seconds.
+        """
+        if (summary := cache.get(DASHBOARD_KEY)) is None:
+            summary = RunnerJob.objects.get_queue_summary(DASHBOARD_WINDOW)
+            cache.set(
+                DASHBOARD_KEY,
+                summary,
+                getattr(
+                    settings,
+                    "TRANSCODING_ADMIN_DASHBOARD_CACHE_TIMEOUT",
+                    DEFAULT_DASHBOARD_CACHE_TIMEOUT,
+                ),
+            )
+        return summary
+
+    def dashboard_view(self, request):
+        """Display the queue depth, throughput and oldest pending job per type."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        hours = DASHBOARD_WINDOW.total_seconds() / 3600
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Runner job queue",
+            "rows": [
+                {
+                    "type": job_type,
+                    **summary,
+                    "throughput": summary["completed"] / hours,
+                }
+                for job_type, summary in self.get_queue_summary().items()
+            ],
+        }
+        return TemplateResponse(
+            request,
+            "admin/django_peertube_runner_connector/runnerjob/dashboard.html",
+            context,
+        )
+
+    def changelist_view(self, request, extra_context=None):
+        """Point to the archived jobs matching the search as well."""
+        response = super().changelist_view(request, extra_context)
+
+        if query := request.GET.get(SEARCH_VAR):
+            archive_admin = RunnerJobArchiveAdmin(RunnerJobArchive, self.admin_site)
+            archived_jobs, _ = archive_admin.get_search_results(
+                request, RunnerJobArchive.objects.all(), query
+            )
+            if count := archived_jobs.count():
+                messages.info(
+                    request,
+                    format_html(
+                        '{} archived jobs match the search, <a href="{}?{}">'
+                        "see the archived jobs</a>.",
+                        count,
+                        reverse(
+                            f"{self.admin_site.name}:"
+                            "django_peertube_runner_connector_runnerjobarchive_changelist"
+                        ),
+                        urlencode({SEARCH_VAR: query}),
+                    ),
+                )
+
+        return response
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        """Redirect to the archived job when the job has been archived."""
+        if self.get_object(request, unquote(object_id)) is None:
+            try:
+                is_archived = RunnerJobArchive.objects.filter(
+                    pk=unquote(object_id)
+                ).exists()
+            except ValidationError:
+                is_archived = False
+
+            if is_archived:
+                return redirect(
+                    f"{self.admin_site.name}:"
+                    "django_peertube_runner_connector_runnerjobarchive_change",
+                    object_id,
+                )
+
+        return super().change_view(request, object_id, form_url, extra_context)
+
+
+@admin.register(RunnerJobArchive)
+class RunnerJobArchiveAdmin(admin.ModelAdmin):
+    """Read only admin class for RunnerJobArchive."""
+
+    list_display = (
+        "uuid",
+        "type",
+        "state",
+        "failures",
+        "error",
+        "priority",
+        "startedAt",
+        "finishedAt",
+        "runner",
+        "createdAt",
+        "archivedAt",
+    )
+    exclude = ("compressedPayloads",)
+    readonly_fields = ("payload", "privatePayload")
+    list_select_related = ("runner",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    search_fields = ("=uuid",)
+    list_filter = ("type", "state")
+
+    def has_add_permission(self, request):
+        """Archived jobs are created by the archive_runner_jobs command only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Archived jobs cannot be changed."""
+        return False
+
+
+@admin.register(RunnerStats)
+class RunnerStatsAdmin(admin.ModelAdmin):
+    """Read only admin class for RunnerStats."""
+
+    list_display = (
+        "runner",
+        "jobType",
+        "resolution",
+        "completedJobs",
+        "failedJobs",
+        "abortedJobs",
+        "encodeSpeed",
+        "failureRate",
+        "throughput",
+        "updatedAt",
+    )
+    list_select_related = ("runner",)
+
+    search_fields = ("runner__name",)
+    list_filter = ("jobType", "resolution")
+
+    def has_add_permission(self, request):
+        """Runner stats are recorded by the job handlers only."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Runner stats cannot be changed."""
+        return False
+
 
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
@@ -74,6 +304,7 @@ class VideoStreamingPlaylistAdmin(admin.ModelAdmin):
     """Base admin class for VideoStreamingPlaylist."""
 
     list_display = ("id", "playlistFilename", "video")
+    list_select_related = ("video",)
 
     list_filter = ("playlistFilename", "video")
 
@@ -95,6 +326,7 @@ class VideoFileAdmin(admin.ModelAdmin):
         "createdAt",
         "updatedAt",
     )
+    list_select_related = ("video",)
 
     list_filter = ("resolution", "createdAt", "updatedAt")
     search_fields = ("id", "filename", "video__id")
@@ -112,5 +344,6 @@ class VideoJobInfoAdmin(admin.ModelAdmin):
         "pendingTranscode",
         "video",
     )
+    list_select_related = ("video",)
     list_filter = ("createdAt", "updatedAt")
     search_fields = ("id", "video__id")
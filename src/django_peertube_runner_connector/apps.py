@@ -1,10 +1,48 @@
 """Django app config for the connector app."""
 
+import os
+import sys
+
 from django.apps import AppConfig
 
 
+# Management commands serving the application, which run its background tasks
+SERVER_COMMANDS = ("runserver",)
+
+
+def get_management_command(argv=None):
+    """Return the management command run by this process, None for a server."""
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2:
+        return None
+
+    program = os.path.normpath(argv[0])
+    if os.path.basename(program) in ("manage.py", "django-admin") or program.endswith(
+        os.path.join("django", "__main__.py")
+    ):
+        return argv[1]
+    return None
+
+
 class DjangoPeertubeRunnerConnectorConfig(AppConfig):
     """Django app config for the connector app."""
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "django_peertube_runner_connector"
+
+    def ready(self):
+        """
+        Start the background tasks enabled in the settings.
+
+        They are not started by the management commands, like migrate or shell,
+        except the ones serving the application.
+        """
+        if get_management_command() not in (None, *SERVER_COMMANDS):
+            return
+
+        # pylint: disable=import-outside-toplevel
+        from django_peertube_runner_connector.utils.stale_jobs import (
+            start_stale_job_reaper,
+        )
+
+        start_stale_job_reaper()
@@ -0,0 +1,77 @@
+""" Management command to archive the finished runner jobs."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from django_peertube_runner_connector.utils.job_archive import (
+    DEFAULT_ARCHIVE_BATCH_SIZE,
+    archive_runner_jobs,
+    purge_archived_jobs,
+)
+
+
+class Command(BaseCommand):
+    """Management command to archive the finished runner jobs."""
+
+    help = (
+        "Moves the runner jobs finished for a while to the archive table, "
+        "then deletes the archived jobs older than the retention period"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=None,
+            help=(
+                "Archive the jobs finished for OLDER_THAN days "
+                "(defaults to TRANSCODING_RUNNER_JOB_ARCHIVE_AFTER)"
+            ),
+        )
+        parser.add_argument(
+            "--retention",
+            type=int,
+            default=None,
+            help=(
+                "Delete the archived jobs finished for RETENTION days, all of "
+                "them for 0 (defaults to TRANSCODING_RUNNER_JOB_ARCHIVE_RETENTION)"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_ARCHIVE_BATCH_SIZE,
+            help="Number of jobs archived or deleted per batch",
+        )
+        parser.add_argument(
+            "--throttle",
+            type=float,
+            default=0,
+            help="Seconds to wait between two batches",
+        )
+
+    def handle(self, *args, **options):
+        """Archive the finished jobs and purge the expired archives."""
+        older_than = options["older_than"]
+        retention = options["retention"]
+
+        archived = 0
+        for count in archive_runner_jobs(
+            older_than=timedelta(days=older_than) if older_than is not None else None,
+            batch_size=options["batch_size"],
+            throttle=options["throttle"],
+        ):
+            archived += count
+            self.stdout.write(f"Archived {archived} jobs")
+
+        deleted = sum(
+            purge_archived_jobs(
+                retention=timedelta(days=retention) if retention is not None else None,
+                batch_size=options["batch_size"],
+            )
+        )
+
+        self.stdout.write(
+            f"Archived {archived} jobs, deleted {deleted} expired archived jobs"
+        )
@@ -0,0 +1,92 @@
+""" Management command to delete the files left behind in the video storage."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from django_peertube_runner_connector.utils.garbage_collection import (
+    DEFAULT_ORPHAN_BATCH_SIZE,
+    DEFAULT_ORPHAN_GRACE_PERIOD,
+    collect_orphan_files,
+)
+
+
+class Command(BaseCommand):
+    """Management command to delete the files left behind in the video storage."""
+
+    help = (
+        "Deletes the files of the video directories no video, video file or "
+        "playlist references anymore, and optionally the files of a prefix outside "
+        "of any video directory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the orphan files without deleting them",
+        )
+        parser.add_argument(
+            "--grace-period",
+            type=int,
+            default=int(DEFAULT_ORPHAN_GRACE_PERIOD.total_seconds() // 3600),
+            help="Keep the files modified during the last GRACE_PERIOD hours",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_ORPHAN_BATCH_SIZE,
+            help="Number of videos processed per batch",
+        )
+        parser.add_argument(
+            "--start-after",
+            default=None,
+            help="Resume a collection after the given video id",
+        )
+        parser.add_argument(
+            "--outside-videos",
+            action="store_true",
+            help=(
+                "Delete as well the unreferenced files of the --prefix outside of "
+                "any video directory, like the uploads never transcoded"
+            ),
+        )
+        parser.add_argument(
+            "--prefix",
+            default=None,
+            help="Storage prefix swept with --outside-videos, required by it",
+        )
+
+    def handle(self, *args, **options):
+        """Collect the orphan files and report them."""
+        prefix = (options["prefix"] or "").strip("/")
+        if options["outside_videos"] and not prefix:
+            raise CommandError("--outside-videos requires a non-empty --prefix")
+        if options["prefix"] is not None and not options["outside_videos"]:
+            raise CommandError("--prefix is only used with --outside-videos")
+
+        total_count = total_size = 0
+
+        for last_video_id, orphan_files in collect_orphan_files(
+            grace_period=timedelta(hours=options["grace_period"]),
+            batch_size=options["batch_size"],
+            start_after=options["start_after"],
+            dry_run=options["dry_run"],
+            outside_videos_prefix=prefix if options["outside_videos"] else None,
+        ):
+            for name, size in orphan_files:
+                self.stdout.write(f"Orphan file: {name} ({filesizeformat(size)})")
+            total_count += len(orphan_files)
+            total_size += sum(size for _, size in orphan_files)
+            if last_video_id is None:
+                self.stdout.write(
+                    f"Processed the files of {prefix} outside of the video directories"
+                )
+            else:
+                self.stdout.write(f"Processed videos up to {last_video_id}")
+
+        action = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            f"{action} {total_count} orphan files ({filesizeformat(total_size)})"
+        )
@@ -0,0 +1,42 @@
+""" Management command to reap the jobs whose runner stopped responding."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from django_peertube_runner_connector.models import RunnerJobState
+from django_peertube_runner_connector.utils.stale_jobs import reap_stale_jobs
+
+
+class Command(BaseCommand):
+    """Management command to reap the jobs whose runner stopped responding."""
+
+    help = (
+        "Resets to pending, or sets to errored once they failed too many times, "
+        "the processing jobs not updated by their runner for a while"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=None,
+            help=(
+                "Reap the jobs not updated for TIMEOUT seconds "
+                "(defaults to TRANSCODING_RUNNER_JOB_TIMEOUT)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        """Reap the stale jobs and report them."""
+        timeout = options["timeout"]
+        reaped_jobs = reap_stale_jobs(
+            timedelta(seconds=timeout) if timeout is not None else None
+        )
+
+        for runner_job in reaped_jobs:
+            self.stdout.write(
+                f"Job {runner_job.uuid} ({runner_job.type}) "
+                f"{RunnerJobState(runner_job.state).label.lower()}"
+            )
+        self.stdout.write(f"Reaped {len(reaped_jobs)} stale jobs")
@@ -0,0 +1,132 @@
+""" Management command to load test the connector with a fleet of fake runners."""
+
+import time
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from django_peertube_runner_connector.models import RunnerRegistrationToken
+from django_peertube_runner_connector.simulation.fake_ffmpeg import fake_ffmpeg
+from django_peertube_runner_connector.simulation.fake_runner import (
+    FakeRunner,
+    simulate_runners,
+)
+from django_peertube_runner_connector.storage import video_storage
+from django_peertube_runner_connector.transcode import transcode_video
+
+
+class Command(BaseCommand):
+    """Management command to load test the connector with a fleet of fake runners."""
+
+    help = (
+        "Transcodes synthetic videos with fake runners and a fake ffmpeg, in-process. "
+        "The runners take their turn sequentially, in a single thread, so the run "
+        "measures the cost of the requests rather than their concurrency. "
+        "The videos, jobs and files created are kept in the database and the storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runners", type=int, default=10, help="Number of fake runners"
+        )
+        parser.add_argument(
+            "--videos", type=int, default=10, help="Number of videos to transcode"
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=60,
+            help="Duration in seconds of the synthetic videos",
+        )
+        parser.add_argument(
+            "--height",
+            type=int,
+            default=1080,
+            help="Height of the synthetic videos, setting the jobs created",
+        )
+        parser.add_argument(
+            "--result-size",
+            type=int,
+            default=1024,
+            help="Size in bytes of the files uploaded by the runners",
+        )
+        parser.add_argument(
+            "--processing-time",
+            type=float,
+            default=0,
+            help="Seconds spent by a runner on each job, blocking the other runners",
+        )
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0,
+            help="Probability of a job to fail",
+        )
+        parser.add_argument(
+            "--abort-rate",
+            type=float,
+            default=0,
+            help="Probability of a job to be aborted",
+        )
+        parser.add_argument(
+            "--domain",
+            default="http://localhost:8000",
+            help="Domain the runners would download the videos from",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host of the requests, it must be an allowed host",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed")
+
+    def handle(self, *args, **options):
+        """Create the videos, let the runners process their jobs and report."""
+        run_id = uuid.uuid4().hex[:8]
+        registration_token = RunnerRegistrationToken.objects.create(
+            registrationToken=f"ptrrt-simulation-{run_id}"
+        )
+
+        with fake_ffmpeg(duration=options["duration"], height=options["height"]):
+            for index in range(options["videos"]):
+                source = video_storage.save(
+                    f"simulation-{run_id}/source-{index}.mp4",
+                    ContentFile(bytes(options["result_size"])),
+                )
+                transcode_video(
+                    source, f"simulation-{run_id}/video-{index}", options["domain"]
+                )
+
+            runners = [
+                FakeRunner(
+                    name=f"simulated-runner-{run_id}-{index}",
+                    registration_token=registration_token.registrationToken,
+                    client=Client(SERVER_NAME=options["host"]),
+                    result_size=options["result_size"],
+                    processing_time=options["processing_time"],
+                    failure_rate=options["failure_rate"],
+                    abort_rate=options["abort_rate"],
+                    seed=None if options["seed"] is None else options["seed"] + index,
+                )
+                for index in range(options["runners"])
+            ]
+
+            start = time.perf_counter()
+            outcomes, rounds = simulate_runners(runners)
+            duration = time.perf_counter() - start
+
+        processed = sum(
+            count for outcome, count in outcomes.items() if outcome != "conflict"
+        )
+        self.stdout.write(
+            ", ".join(
+                f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())
+            )
+        )
+        self.stdout.write(
+            f"Processed {processed} jobs in {rounds} rounds and {duration:.2f}s "
+            f"({processed / duration if duration else 0:.1f} jobs/s), "
+            f"the {len(runners)} runners taking their turn sequentially"
+        )
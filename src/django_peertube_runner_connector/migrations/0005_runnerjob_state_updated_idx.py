@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "django_peertube_runner_connector",
+            "0004_video_language_video_transcriptfilename_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(
+                fields=["state", "updatedAt"], name="runnerjob_state_updated_idx"
+            ),
+        ),
+    ]
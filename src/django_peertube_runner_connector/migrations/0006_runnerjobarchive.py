@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0005_runnerjob_state_updated_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunnerJobArchive",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        editable=False,
+                        help_text="primary key of the archived job",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                ("uuid", models.UUIDField(help_text="Job UUID", unique=True)),
+                (
+                    "domain",
+                    models.CharField(
+                        blank=True, help_text="Job domain", max_length=255, null=True
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("vod-web-video-transcoding", "Vod Web Video Transcoding"),
+                            ("vod-hls-transcoding", "Vod Hls Transcoding"),
+                            (
+                                "vod-audio-merge-transcoding",
+                                "Vod Audio Merge Transcoding",
+                            ),
+                            ("live-rtmp-hls-transcoding", "Live Rtmp Hls Transcoding"),
+                            ("video-studio-transcoding", "Video Studio Transcoding"),
+                            ("video-transcription", "Video Transcription"),
+                        ],
+                        help_text="Job type",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "state",
+                    models.IntegerField(
+                        choices=[
+                            (1, "Pending"),
+                            (2, "Processing"),
+                            (3, "Completed"),
+                            (4, "Errored"),
+                            (5, "Waiting for parent job"),
+                            (6, "Cancelled"),
+                            (7, "Parent errored"),
+                            (8, "Parent cancelled"),
+                            (9, "Completing"),
+                        ],
+                        help_text="Job state",
+                    ),
+                ),
+                (
+                    "failures",
+                    models.IntegerField(default=0, help_text="Number of failures"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, help_text="Error message", null=True),
+                ),
+                ("priority", models.IntegerField(help_text="Job priority")),
+                (
+                    "compressedPayloads",
+                    models.BinaryField(
+                        help_text="Job payload and private payload as compressed JSON"
+                    ),
+                ),
+                (
+                    "dependsOnRunnerJobId",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="id of the job this one depended on",
+                        null=True,
+                    ),
+                ),
+                (
+                    "startedAt",
+                    models.DateTimeField(
+                        blank=True, help_text="Job started at", null=True
+                    ),
+                ),
+                (
+                    "finishedAt",
+                    models.DateTimeField(
+                        blank=True,
+                        db_index=True,
+                        help_text="Job finished at",
+                        null=True,
+                    ),
+                ),
+                ("createdAt", models.DateTimeField(help_text="Job created at")),
+                ("updatedAt", models.DateTimeField(help_text="Job updated at")),
+                (
+                    "archivedAt",
+                    models.DateTimeField(
+                        auto_now_add=True, help_text="Job archived at"
+                    ),
+                ),
+                (
+                    "runner",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Runner which processed the job",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archivedJobs",
+                        to="django_peertube_runner_connector.runner",
+                    ),
+                ),
+            ],
+        ),
+    ]
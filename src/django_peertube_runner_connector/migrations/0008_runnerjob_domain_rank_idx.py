@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0007_runnerjob_schedulingrank"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(
+                fields=["domain", "schedulingRank"], name="runnerjob_domain_rank_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0008_runnerjob_domain_rank_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="idempotencyKey",
+            field=models.CharField(
+                blank=True,
+                help_text="Key identifying the transcoding request which created the video",
+                max_length=255,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:12
+
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0009_video_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunnerStats",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text="primary key for the record as UUID",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "jobType",
+                    models.CharField(
+                        choices=[
+                            ("vod-web-video-transcoding", "Vod Web Video Transcoding"),
+                            ("vod-hls-transcoding", "Vod Hls Transcoding"),
+                            (
+                                "vod-audio-merge-transcoding",
+                                "Vod Audio Merge Transcoding",
+                            ),
+                            ("live-rtmp-hls-transcoding", "Live Rtmp Hls Transcoding"),
+                            ("video-studio-transcoding", "Video Studio Transcoding"),
+                            ("video-transcription", "Video Transcription"),
+                        ],
+                        help_text="Job type",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Output resolution of the jobs, 0 without video output",
+                    ),
+                ),
+                (
+                    "completedJobs",
+                    models.IntegerField(
+                        default=0, help_text="Number of completed jobs"
+                    ),
+                ),
+                (
+                    "failedJobs",
+                    models.IntegerField(default=0, help_text="Number of failed jobs"),
+                ),
+                (
+                    "abortedJobs",
+                    models.IntegerField(default=0, help_text="Number of aborted jobs"),
+                ),
+                (
+                    "processingSeconds",
+                    models.FloatField(
+                        default=0,
+                        help_text="Wall time spent processing the completed jobs",
+                    ),
+                ),
+                (
+                    "videoSeconds",
+                    models.FloatField(
+                        default=0,
+                        help_text="Duration of the videos of the completed jobs",
+                    ),
+                ),
+                (
+                    "createdAt",
+                    models.DateTimeField(auto_now_add=True, help_text="Created at"),
+                ),
+                (
+                    "updatedAt",
+                    models.DateTimeField(auto_now=True, help_text="Updated at"),
+                ),
+                (
+                    "runner",
+                    models.ForeignKey(
+                        help_text="Runner which processed the jobs",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats",
+                        to="django_peertube_runner_connector.runner",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "runner stats",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("runner", "jobType", "resolution"),
+                        name="runnerstats_runner_type_resolution_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0010_runnerstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="runnerjob",
+            name="offerExpiresAt",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Expiration date of the offer of the pending job to its runner",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0011_runnerjob_offerexpiresat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="runnerjob",
+            name="leaseExpiresAt",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Expiration date of the lease of the processing job to its runner",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(
+                fields=["state", "leaseExpiresAt"], name="runnerjob_state_lease_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0012_runnerjob_leaseexpiresat"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="runnerjob",
+            name="runnerjob_state_rank_idx",
+        ),
+        migrations.AddField(
+            model_name="runnerjob",
+            name="notBefore",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Date before which the failed job is not offered to the runners",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(
+                fields=["state", "schedulingRank", "notBefore"],
+                name="runnerjob_state_rank_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0013_runnerjob_notbefore"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(
+                fields=["state", "domain", "schedulingRank"],
+                name="runnerjob_state_domain_idx",
+            ),
+        ),
+    ]
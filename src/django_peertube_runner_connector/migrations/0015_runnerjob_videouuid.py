@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:50
+
+from uuid import UUID
+
+from django.db import migrations, models
+
+
+def set_video_uuid(apps, schema_editor):
+    """Copy the video uuid of the existing jobs from their private payload."""
+    RunnerJob = apps.get_model("django_peertube_runner_connector", "RunnerJob")
+
+    runner_jobs = RunnerJob.objects.only("id", "privatePayload")
+    batch = []
+    for runner_job in runner_jobs.iterator(chunk_size=1000):
+        if not isinstance(runner_job.privatePayload, dict):
+            continue
+        try:
+            runner_job.videoUUID = UUID(runner_job.privatePayload.get("videoUUID"))
+        except (TypeError, ValueError):
+            continue
+        batch.append(runner_job)
+        if len(batch) == 1000:
+            RunnerJob.objects.bulk_update(batch, ["videoUUID"])
+            batch = []
+
+    RunnerJob.objects.bulk_update(batch, ["videoUUID"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0014_runnerjob_state_domain_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="runnerjob",
+            name="videoUUID",
+            field=models.UUIDField(
+                blank=True,
+                editable=False,
+                help_text="UUID of the video of the job, copied from its private payload",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(set_video_uuid, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(fields=["videoUUID"], name="runnerjob_video_uuid_idx"),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Seconds of waiting worth one priority unit, when this migration was written
+PRIORITY_AGING_INTERVAL = 60
+
+
+def set_missing_scheduling_rank(apps, schema_editor):
+    """
+    Compute the scheduling rank of the jobs created without it.
+
+    It is their creation time delayed by their priority aging intervals.
+    """
+    RunnerJob = apps.get_model("django_peertube_runner_connector", "RunnerJob")
+    intervals = getattr(settings, "TRANSCODING_PRIORITY_AGING_INTERVALS", {})
+
+    runner_jobs = RunnerJob.objects.filter(schedulingRank__isnull=True).only(
+        "id", "type", "priority", "createdAt"
+    )
+    batch = []
+    for runner_job in runner_jobs.iterator(chunk_size=1000):
+        runner_job.schedulingRank = (
+            runner_job.createdAt.timestamp()
+            + runner_job.priority
+            * intervals.get(runner_job.type, PRIORITY_AGING_INTERVAL)
+        )
+        batch.append(runner_job)
+        if len(batch) == 1000:
+            RunnerJob.objects.bulk_update(batch, ["schedulingRank"])
+            batch = []
+
+    RunnerJob.objects.bulk_update(batch, ["schedulingRank"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0015_runnerjob_videouuid"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_missing_scheduling_rank, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="runnerjob",
+            name="schedulingRank",
+            field=models.FloatField(
+                blank=True,
+                help_text="Order in which the job is offered to the runners, lowest first",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0016_alter_runnerjob_schedulingrank"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(fields=["finishedAt"], name="runnerjob_finished_idx"),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Seconds of waiting worth one priority unit, when this migration was written
+PRIORITY_AGING_INTERVAL = 60
+
+
+def set_scheduling_start(apps, schema_editor):
+    """
+    Compute the scheduling start of the existing jobs.
+
+    It is their scheduling rank without their priority aging intervals.
+    """
+    RunnerJob = apps.get_model("django_peertube_runner_connector", "RunnerJob")
+    intervals = getattr(settings, "TRANSCODING_PRIORITY_AGING_INTERVALS", {})
+
+    runner_jobs = RunnerJob.objects.filter(schedulingStart__isnull=True).only(
+        "id", "type", "priority", "schedulingRank"
+    )
+    batch = []
+    for runner_job in runner_jobs.iterator(chunk_size=1000):
+        runner_job.schedulingStart = (
+            runner_job.schedulingRank
+            - runner_job.priority
+            * intervals.get(runner_job.type, PRIORITY_AGING_INTERVAL)
+        )
+        batch.append(runner_job)
+        if len(batch) == 1000:
+            RunnerJob.objects.bulk_update(batch, ["schedulingStart"])
+            batch = []
+
+    RunnerJob.objects.bulk_update(batch, ["schedulingStart"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_peertube_runner_connector", "0017_runnerjob_finished_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="runnerjob",
+            name="runnerjob_domain_rank_idx",
+        ),
+        migrations.AddField(
+            model_name="runnerjob",
+            name="schedulingStart",
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                help_text="Start of the job in the fair queue of its domain, its scheduling rank without its priority delay",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(set_scheduling_start, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="runnerjob",
+            name="schedulingStart",
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                help_text="Start of the job in the fair queue of its domain, its scheduling rank without its priority delay",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="runnerjob",
+            index=models.Index(
+                fields=["domain", "schedulingStart"], name="runnerjob_domain_start_idx"
+            ),
+        ),
+    ]
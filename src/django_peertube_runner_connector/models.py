@@ -1,17 +1,35 @@
 """Models for the django-peertube-runner-connector app."""
 
+# pylint: disable=too-many-lines
+
+from collections import defaultdict
 from datetime import timedelta
+from functools import cached_property, reduce
+import json
 import logging
-from uuid import uuid4
+import operator
+from uuid import UUID, uuid4
+import zlib
 
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, Count, F, FloatField, Min, Sum, Value, When
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
+from django.utils.module_loading import import_string
 
-from django_peertube_runner_connector.storage import video_storage
+from django_peertube_runner_connector.storage import delete_stored_files, video_storage
+from django_peertube_runner_connector.utils.leases import get_lease_duration
+from django_peertube_runner_connector.utils.scheduling import (
+    get_domain_max_concurrency,
+    get_priority_aging_interval,
+    get_scheduling_start,
+)
 
 
 logger = logging.getLogger(__name__)
 
+DOMAIN_LOCK_PREFIX = "django_peertube_runner_connector:domain"
+
 
 class RunnerRegistrationToken(models.Model):
     """Model representing a PeerTube runner registration token."""
@@ -61,7 +79,7 @@ class Runner(models.Model):
         # pylint: disable=invalid-name
         self.lastContact = timezone.now()
         self.ip = ip_address
-        self.save()
+        self.save(update_fields=["lastContact", "ip", "updatedAt"])
 
 
 class RunnerJobState(models.IntegerChoices):
@@ -78,6 +96,15 @@ class RunnerJobState(models.IntegerChoices):
     COMPLETING = 9, "Completing"
 
 
+FINISHED_RUNNER_JOB_STATES = (
+    RunnerJobState.COMPLETED,
+    RunnerJobState.ERRORED,
+    RunnerJobState.CANCELLED,
+    RunnerJobState.PARENT_ERRORED,
+    RunnerJobState.PARENT_CANCELLED,
+)
+
+
 class RunnerJobType(models.TextChoices):
     """Type of runner job."""
 
@@ -92,15 +119,312 @@ class RunnerJobType(models.TextChoices):
 class RunnerJobQuerySet(models.QuerySet):
     """Queryset for RunnerJob."""
 
-    def list_available_jobs(self, types=None):
-        """List available jobs."""
-        available_jobs = self.filter(state=RunnerJobState.PENDING)
+    def list_available_jobs(self, types=None, limit=10):
+        """
+        List available jobs, in their scheduling order.
+
+        The jobs offered to a runner are excluded until the offer expires, and
+        the failed jobs until their retry backoff elapsed.
+        """
+        now = timezone.now()
+        available_jobs = (
+            self.filter(state=RunnerJobState.PENDING)
+            .filter(models.Q(notBefore__isnull=True) | models.Q(notBefore__lte=now))
+            .exclude(offerExpiresAt__gt=now)
+        )
         if types:
             available_jobs = available_jobs.filter(type__in=types)
-        return available_jobs.order_by("priority")[:10]
+        if saturated_domains := self.get_saturated_domains():
+            # The jobs of the saturated domains may fill the head of the queue,
+            # the first jobs of each other domain are read from the domain
+            # index instead of skipping them in the scheduling order.
+            available_jobs = available_jobs.filter(
+                reduce(
+                    operator.or_,
+                    [
+                        models.Q(
+                            pk__in=available_jobs.filter(domain=domain)
+                            .order_by("schedulingRank")
+                            .values("pk")[:limit]
+                        )
+                        for domain in self.list_pending_domains()
+                        if domain not in saturated_domains
+                    ],
+                    models.Q(
+                        pk__in=available_jobs.filter(domain__isnull=True)
+                        .order_by("schedulingRank")
+                        .values("pk")[:limit]
+                    ),
+                )
+            )
+        return available_jobs.order_by("schedulingRank")[:limit]
+
+    def list_pending_domains(self):
+        """
+        List the domains of the pending jobs with a single recursive query.
+
+        Each step seeks the next domain in the (state, domain) index, so the
+        domains are listed without reading all their jobs.
+        """
+        quote_name = connection.ops.quote_name
+        meta = self.model._meta  # pylint: disable=protected-access
+        table = quote_name(meta.db_table)
+        state_column = quote_name(meta.get_field("state").column)
+        domain_column = quote_name(meta.get_field("domain").column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH RECURSIVE domains(domain) AS ("  # nosec
+                f"SELECT MIN({domain_column}) FROM {table} "
+                f"WHERE {state_column} = %s "
+                f"UNION ALL SELECT (SELECT MIN(job.{domain_column}) FROM {table} job "
+                f"WHERE job.{state_column} = %s AND job.{domain_column} > domains.domain) "
+                f"FROM domains WHERE domains.domain IS NOT NULL"
+                f") SELECT domain FROM domains WHERE domain IS NOT NULL",
+                [RunnerJobState.PENDING, RunnerJobState.PENDING],
+            )
+            return [domain for (domain,) in cursor.fetchall()]
+
+    def lock_domains(self, domains):
+        """
+        Lock the capped domains until the end of the transaction.
+
+        The claims of the jobs of a capped domain are serialized, so concurrent
+        claims cannot exceed its cap. The jobs must be claimed, locking their
+        rows, before their domain is locked. PostgreSQL advisory locks are used,
+        SQLite serializes the write transactions by itself.
+        """
+        max_concurrency = get_domain_max_concurrency()
+        capped_domains = sorted(
+            domain for domain in domains if domain in max_concurrency
+        )
+        if not capped_domains or connection.vendor != "postgresql":
+            return
+
+        with connection.cursor() as cursor:
+            for domain in capped_domains:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                    [f"{DOMAIN_LOCK_PREFIX}:{domain}"],
+                )
+
+    def is_domain_over_capacity(self, domain):
+        """
+        Return whether a capped domain processes more jobs than its cap.
+
+        It is checked in the transaction claiming a job of the domain, after the
+        claim, the domain being locked to serialize the concurrent claims.
+        """
+        if domain not in get_domain_max_concurrency():
+            return False
+        self.lock_domains([domain])
+        return self.get_domain_capacities([domain])[domain] < 0
+
+    def get_domain_capacities(self, domains=None):
+        """
+        Return the number of jobs the capped domains can start processing.
+
+        The jobs offered to a runner count against the cap until their offer
+        expires, like the jobs processing.
+        """
+        max_concurrency = get_domain_max_concurrency()
+        if domains is not None:
+            max_concurrency = {
+                domain: cap
+                for domain, cap in max_concurrency.items()
+                if domain in domains
+            }
+        if not max_concurrency:
+            return {}
+
+        processing_counts = dict(
+            self.filter(domain__in=max_concurrency)
+            .filter(
+                models.Q(state=RunnerJobState.PROCESSING)
+                | models.Q(
+                    state=RunnerJobState.PENDING, offerExpiresAt__gt=timezone.now()
+                )
+            )
+            .values("domain")
+            .annotate(count=Count("id"))
+            .values_list("domain", "count")
+        )
+        return {
+            domain: cap - processing_counts.get(domain, 0)
+            for domain, cap in max_concurrency.items()
+        }
+
+    def get_saturated_domains(self, domains=None):
+        """Return the domains processing as many jobs as their concurrency cap."""
+        return {
+            domain
+            for domain, capacity in self.get_domain_capacities(domains).items()
+            if capacity <= 0
+        }
+
+    def filter_leased(self, job_token):
+        """
+        Filter the processing jobs leased with the token, whose lease did not expire.
 
+        It is the condition of the updates of the runners, so a runner whose lease
+        was reclaimed in the meantime cannot change the job anymore.
+        """
+        if not job_token:
+            return self.none()
+        return self.filter(
+            state=RunnerJobState.PROCESSING, processingJobToken=job_token
+        ).exclude(leaseExpiresAt__lte=timezone.now())
 
-class RunnerJob(models.Model):
+    def bulk_update_progress(self, progresses: dict):
+        """
+        Save the progress of several jobs and renew their lease at once.
+
+        `progresses` maps the primary keys of the jobs to their progress, the
+        progress of a job is left untouched when None. A single UPDATE is run,
+        skipping the jobs whose lease expired.
+        """
+        if not progresses:
+            return 0
+
+        whens = [
+            When(pk=pk, then=Value(float(progress)))
+            for pk, progress in progresses.items()
+            if progress is not None
+        ]
+        now = timezone.now()
+        fields = {"updatedAt": now, "leaseExpiresAt": now + get_lease_duration()}
+        if whens:
+            fields["progress"] = Case(
+                *whens, default=F("progress"), output_field=FloatField()
+            )
+        return (
+            self.filter(pk__in=progresses, state=RunnerJobState.PROCESSING)
+            .exclude(leaseExpiresAt__lte=now)
+            .update(**fields)
+        )
+
+    def get_queue_depth_per_domain(self):
+        """Return the number of pending and processing jobs of each domain."""
+        depths = {}
+        for domain, state, count in (
+            self.filter(state__in=[RunnerJobState.PENDING, RunnerJobState.PROCESSING])
+            .values("domain", "state")
+            .annotate(count=Count("id"))
+            .values_list("domain", "state", "count")
+            .order_by()
+        ):
+            depth = depths.setdefault(domain, {"pending": 0, "processing": 0})
+            depth["pending" if state == RunnerJobState.PENDING else "processing"] = (
+                count
+            )
+        return depths
+
+    def get_queue_summary(self, window: timedelta):
+        """
+        Return the queue depth, throughput and oldest pending job of each job type.
+
+        The jobs queued or finished during the window are aggregated with a
+        single grouped query.
+        """
+        since = timezone.now() - window
+        queued_states = [RunnerJobState.PENDING, RunnerJobState.PROCESSING]
+        return {
+            summary.pop("type"): summary
+            for summary in self.filter(
+                models.Q(state__in=queued_states) | models.Q(finishedAt__gte=since)
+            )
+            .values("type")
+            .annotate(
+                pending=Count("id", filter=models.Q(state=RunnerJobState.PENDING)),
+                processing=Count(
+                    "id", filter=models.Q(state=RunnerJobState.PROCESSING)
+                ),
+                completed=Count(
+                    "id",
+                    filter=models.Q(
+                        state=RunnerJobState.COMPLETED, finishedAt__gte=since
+                    ),
+                ),
+                errored=Count(
+                    "id",
+                    filter=models.Q(
+                        state=RunnerJobState.ERRORED, finishedAt__gte=since
+                    ),
+                ),
+                oldestPendingAt=Min(
+                    "createdAt", filter=models.Q(state=RunnerJobState.PENDING)
+                ),
+            )
+            .order_by("type")
+        }
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create several jobs, computing the scheduling rank of the new ones.
+
+        The jobs of a domain created together are fair queued after each other.
+        """
+        objs = list(objs)
+        domain_starts = defaultdict(list)
+        for runner_job in objs:
+            runner_job.set_scheduling_rank(
+                start
+                for priority, start in domain_starts[runner_job.domain]
+                if priority <= runner_job.priority
+            )
+            domain_starts[runner_job.domain].append(
+                (runner_job.priority, runner_job.schedulingStart)
+            )
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def get_last_domain_start(self, domain, priority):
+        """
+        Return the latest start time in the fair queue of the queued jobs of a domain.
+
+        Only the jobs of the same or a higher priority are considered, so a new
+        job is not queued behind the lower priority jobs of its domain. The jobs
+        of the domain are read from the latest start on its index, the first ones
+        being usually queued.
+        """
+        return (
+            self.filter(
+                domain=domain,
+                priority__lte=priority,
+                state__in=[
+                    RunnerJobState.PENDING,
+                    RunnerJobState.WAITING_FOR_PARENT_JOB,
+                ],
+            )
+            .order_by("-schedulingStart")
+            .values_list("schedulingStart", flat=True)
+            .first()
+        )
+
+    def descendants_of(self, runner_job):
+        """
+        Filter the jobs depending, directly or not, on a job.
+
+        The whole job tree is walked by a single recursive query.
+        """
+        quote_name = connection.ops.quote_name
+        meta = self.model._meta  # pylint: disable=protected-access
+        table = quote_name(meta.db_table)
+        pk_column = quote_name(meta.pk.column)
+        parent_column = quote_name(meta.get_field("dependsOnRunnerJob").column)
+
+        descendants = RawSQL(
+            f"WITH RECURSIVE descendants(id) AS ("  # nosec
+            f"SELECT {pk_column} FROM {table} WHERE {parent_column} = %s "
+            f"UNION ALL SELECT job.{pk_column} FROM {table} job "
+            f"INNER JOIN descendants ON job.{parent_column} = descendants.id"
+            f") SELECT id FROM descendants",
+            [meta.pk.get_db_prep_value(runner_job.pk, connection)],
+        )
+        return self.filter(pk__in=descendants)
+
+
+class RunnerJob(models.Model):  # pylint: disable=too-many-instance-attributes
     """Model representing a runner job."""
 
     objects = RunnerJobQuerySet.as_manager()
@@ -122,10 +446,26 @@ class RunnerJob(models.Model):
     privatePayload = models.JSONField(
         help_text="Job private payload (metadata given to the runner)"
     )
+    videoUUID = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="UUID of the video of the job, copied from its private payload",
+    )
     state = models.IntegerField(choices=RunnerJobState.choices, help_text="Job state")
     failures = models.IntegerField(default=0, help_text="Number of failures")
     error = models.TextField(null=True, blank=True, help_text="Error message")
     priority = models.IntegerField(help_text="Job priority")
+    schedulingRank = models.FloatField(
+        blank=True,
+        help_text="Order in which the job is offered to the runners, lowest first",
+    )
+    schedulingStart = models.FloatField(
+        blank=True,
+        editable=False,
+        help_text="Start of the job in the fair queue of its domain, its scheduling "
+        "rank without its priority delay",
+    )
     processingJobToken = models.CharField(
         max_length=255, null=True, blank=True, help_text="Processing job token"
     )
@@ -149,26 +489,190 @@ class RunnerJob(models.Model):
         on_delete=models.SET_NULL,
         help_text="Runner processing the job",
     )
+    offerExpiresAt = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Expiration date of the offer of the pending job to its runner",
+    )
+    leaseExpiresAt = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Expiration date of the lease of the processing job to its runner",
+    )
+    notBefore = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Date before which the failed job is not offered to the runners",
+    )
 
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
-    def set_to_error_or_cancel(self, state):
-        """Set the job to the errored or cancelled state."""
+    class Meta:
+        """Options for the RunnerJob model."""
+
+        indexes = [
+            # Used to find the processing jobs whose runner stopped responding
+            models.Index(
+                fields=["state", "updatedAt"], name="runnerjob_state_updated_idx"
+            ),
+            # Used to list the available jobs in their scheduling order, the
+            # backed off jobs being skipped from the index entries
+            models.Index(
+                fields=["state", "schedulingRank", "notBefore"],
+                name="runnerjob_state_rank_idx",
+            ),
+            # Used to list the pending domains and their available jobs
+            models.Index(
+                fields=["state", "domain", "schedulingRank"],
+                name="runnerjob_state_domain_idx",
+            ),
+            # Used to start the new jobs of a domain after its queued ones
+            models.Index(
+                fields=["domain", "schedulingStart"], name="runnerjob_domain_start_idx"
+            ),
+            # Used to reclaim the processing jobs whose lease expired
+            models.Index(
+                fields=["state", "leaseExpiresAt"], name="runnerjob_state_lease_idx"
+            ),
+            # Used to list the jobs of a video
+            models.Index(fields=["videoUUID"], name="runnerjob_video_uuid_idx"),
+            # Used to summarize the jobs finished recently and archive the old ones
+            models.Index(fields=["finishedAt"], name="runnerjob_finished_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Compute the scheduling rank of a new job, and copy its video uuid.
+
+        The jobs of a domain are fair queued, the jobs without domain are only
+        ranked by their priority and creation time.
+        """
+        if self.videoUUID is None and isinstance(self.privatePayload, dict):
+            try:
+                # pylint: disable=invalid-name
+                self.videoUUID = UUID(self.privatePayload.get("videoUUID"))
+            except (TypeError, ValueError):
+                pass
+        self.set_scheduling_rank()
+        super().save(*args, **kwargs)
+
+    def set_scheduling_rank(self, queued_starts=()):
+        """
+        Set the scheduling start and rank of the job, see `utils.scheduling`.
+
+        `queued_starts` are the start times of the jobs of its domain queued but
+        not saved yet, with the same or a higher priority. The start of a job
+        given a rank is the rank without its priority delay.
+        """
+        # pylint: disable=invalid-name
+        priority_delay = self.priority * get_priority_aging_interval(self.type)
+        if self.schedulingRank is not None:
+            if self.schedulingStart is None:
+                self.schedulingStart = self.schedulingRank - priority_delay
+            return
+
+        last_domain_start = None
+        if self.domain:
+            last_domain_start = max(
+                (
+                    start
+                    for start in (
+                        RunnerJob.objects.get_last_domain_start(
+                            self.domain, self.priority
+                        ),
+                        *queued_starts,
+                    )
+                    if start is not None
+                ),
+                default=None,
+            )
+
+        self.schedulingStart = get_scheduling_start(
+            self.createdAt or timezone.now(),
+            domain=self.domain,
+            last_domain_start=last_domain_start,
+        )
+        self.schedulingRank = self.schedulingStart + priority_delay
+
+    def is_leased(self, job_token):
+        """Return whether the job is processed with the token and its lease is valid."""
+        return (
+            bool(job_token)
+            and self.state == RunnerJobState.PROCESSING
+            and self.processingJobToken == job_token
+            and (self.leaseExpiresAt is None or self.leaseExpiresAt > timezone.now())
+        )
+
+    def renew_lease(self, *changed_fields):
+        """
+        Renew the lease of the job to its runner and save the `changed_fields`.
+
+        A single conditional update is run, nothing is saved if the lease expired
+        or was reclaimed in the meantime. Return whether the lease was renewed.
+        """
+        # pylint: disable=invalid-name
+        now = timezone.now()
+        self.leaseExpiresAt = now + get_lease_duration()
+        return bool(
+            RunnerJob.objects.filter(pk=self.pk)
+            .filter_leased(self.processingJobToken)
+            .update(
+                leaseExpiresAt=self.leaseExpiresAt,
+                updatedAt=now,
+                **{field: getattr(self, field) for field in changed_fields},
+            )
+        )
+
+    def set_to_error_or_cancel(self, state, *changed_fields):
+        """
+        Set the job to the errored or cancelled state and save it.
+
+        Only the fields of the transition are written, with the `changed_fields`
+        the caller changed beforehand.
+        """
         # pylint: disable=invalid-name
         self.state = state
         self.processingJobToken = None
+        self.leaseExpiresAt = None
         self.finishedAt = timezone.now()
-        self.save()
+        self.save(
+            update_fields=[
+                "state",
+                "processingJobToken",
+                "leaseExpiresAt",
+                "finishedAt",
+                "updatedAt",
+                *changed_fields,
+            ]
+        )
+
+    def reset_to_pending(self, *changed_fields):
+        """
+        Reset the job to the pending state and save it.
 
-    def reset_to_pending(self):
-        """Reset the job to the pending state."""
+        Only the fields of the transition are written, with the `changed_fields`
+        the caller changed beforehand.
+        """
         # pylint: disable=invalid-name
         self.state = RunnerJobState.PENDING
         self.processingJobToken = None
+        self.leaseExpiresAt = None
         self.progress = None
         self.finishedAt = None
         self.startedAt = None
+        self.save(
+            update_fields=[
+                "state",
+                "processingJobToken",
+                "leaseExpiresAt",
+                "progress",
+                "finishedAt",
+                "startedAt",
+                "updatedAt",
+                *changed_fields,
+            ]
+        )
 
     def update_dependant_jobs(self):
         """Update the dependant jobs to the pending state."""
@@ -176,6 +680,220 @@ class RunnerJob(models.Model):
         return num_updated
 
 
+class RunnerJobArchive(models.Model):
+    """
+    Model keeping a finished runner job moved out of the RunnerJob table.
+
+    The payloads are stored as compressed JSON, they are only needed to
+    investigate the job afterward.
+    """
+
+    id = models.UUIDField(
+        verbose_name="id",
+        help_text="primary key of the archived job",
+        primary_key=True,
+        editable=False,
+    )
+    uuid = models.UUIDField(unique=True, help_text="Job UUID")
+    domain = models.CharField(
+        max_length=255, null=True, blank=True, help_text="Job domain"
+    )
+    type = models.CharField(
+        max_length=255, choices=RunnerJobType.choices, help_text="Job type"
+    )
+    state = models.IntegerField(choices=RunnerJobState.choices, help_text="Job state")
+    failures = models.IntegerField(default=0, help_text="Number of failures")
+    error = models.TextField(null=True, blank=True, help_text="Error message")
+    priority = models.IntegerField(help_text="Job priority")
+    compressedPayloads = models.BinaryField(
+        help_text="Job payload and private payload as compressed JSON"
+    )
+    dependsOnRunnerJobId = models.UUIDField(
+        null=True, blank=True, help_text="id of the job this one depended on"
+    )
+    runner = models.ForeignKey(
+        Runner,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="archivedJobs",
+        help_text="Runner which processed the job",
+    )
+    startedAt = models.DateTimeField(null=True, blank=True, help_text="Job started at")
+    finishedAt = models.DateTimeField(
+        null=True, blank=True, db_index=True, help_text="Job finished at"
+    )
+    createdAt = models.DateTimeField(help_text="Job created at")
+    updatedAt = models.DateTimeField(help_text="Job updated at")
+    archivedAt = models.DateTimeField(auto_now_add=True, help_text="Job archived at")
+
+    @classmethod
+    def from_runner_job(cls, runner_job: RunnerJob):
+        """Build the archive of a runner job."""
+        payloads = {
+            "payload": runner_job.payload,
+            "privatePayload": runner_job.privatePayload,
+        }
+        return cls(
+            id=runner_job.id,
+            uuid=runner_job.uuid,
+            domain=runner_job.domain,
+            type=runner_job.type,
+            state=runner_job.state,
+            failures=runner_job.failures,
+            error=runner_job.error,
+            priority=runner_job.priority,
+            compressedPayloads=zlib.compress(
+                json.dumps(payloads, separators=(",", ":")).encode()
+            ),
+            dependsOnRunnerJobId=runner_job.dependsOnRunnerJob_id,
+            runner_id=runner_job.runner_id,
+            startedAt=runner_job.startedAt,
+            finishedAt=runner_job.finishedAt,
+            createdAt=runner_job.createdAt,
+            updatedAt=runner_job.updatedAt,
+        )
+
+    @cached_property
+    def payloads(self):
+        """Decompress the payloads of the archived job."""
+        return json.loads(zlib.decompress(self.compressedPayloads))
+
+    @property
+    def payload(self):
+        """Job payload (metadata given to the runner)."""
+        return self.payloads["payload"]
+
+    @property
+    def privatePayload(self):  # pylint: disable=invalid-name
+        """Job private payload (metadata given to the runner)."""
+        return self.payloads["privatePayload"]
+
+
+class RunnerStatsQuerySet(models.QuerySet):
+    """Custom queryset for the RunnerStats model."""
+
+    def record(self, runner_id, job_type: str, resolution: int, **increments):
+        """
+        Add the increments to the stats of a runner for a job type and resolution.
+
+        The stats are updated with a single statement whatever the number of jobs
+        recorded before, and created on the first job.
+        """
+        stats = self.filter(
+            runner_id=runner_id, jobType=job_type, resolution=resolution
+        )
+        values = {field: F(field) + amount for field, amount in increments.items()}
+        if stats.update(**values, updatedAt=timezone.now()):
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(
+                    runner_id=runner_id,
+                    jobType=job_type,
+                    resolution=resolution,
+                    **increments,
+                )
+        except IntegrityError:
+            # Created by a concurrent job in the meantime
+            stats.update(**values, updatedAt=timezone.now())
+
+    def get_encode_speeds(self):
+        """
+        Return the encode speed of the stats per job type and resolution.
+
+        The stats of several runners are combined, filter the queryset on a
+        runner to get its own speeds.
+        """
+        return {
+            (stats["jobType"], stats["resolution"]): (
+                stats["videoSeconds"] / stats["processingSeconds"]
+            )
+            for stats in self.order_by()
+            .values("jobType", "resolution")
+            .annotate(
+                videoSeconds=Sum("videoSeconds"),
+                processingSeconds=Sum("processingSeconds"),
+            )
+            if stats["processingSeconds"]
+        }
+
+
+class RunnerStats(models.Model):
+    """
+    Model aggregating the jobs processed by a runner, per job type and resolution.
+
+    The stats are incremented when a job is completed, errored or aborted, to
+    profile the speed and the reliability of the runners.
+    """
+
+    id = models.UUIDField(
+        verbose_name="id",
+        help_text="primary key for the record as UUID",
+        primary_key=True,
+        default=uuid4,
+    )
+    runner = models.ForeignKey(
+        Runner,
+        on_delete=models.CASCADE,
+        related_name="stats",
+        help_text="Runner which processed the jobs",
+    )
+    jobType = models.CharField(
+        max_length=255, choices=RunnerJobType.choices, help_text="Job type"
+    )
+    resolution = models.IntegerField(
+        default=0, help_text="Output resolution of the jobs, 0 without video output"
+    )
+    completedJobs = models.IntegerField(default=0, help_text="Number of completed jobs")
+    failedJobs = models.IntegerField(default=0, help_text="Number of failed jobs")
+    abortedJobs = models.IntegerField(default=0, help_text="Number of aborted jobs")
+    processingSeconds = models.FloatField(
+        default=0, help_text="Wall time spent processing the completed jobs"
+    )
+    videoSeconds = models.FloatField(
+        default=0, help_text="Duration of the videos of the completed jobs"
+    )
+    createdAt = models.DateTimeField(auto_now_add=True, help_text="Created at")
+    updatedAt = models.DateTimeField(auto_now=True, help_text="Updated at")
+
+    objects = RunnerStatsQuerySet.as_manager()
+
+    class Meta:
+        """Options for the RunnerStats model."""
+
+        verbose_name_plural = "runner stats"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["runner", "jobType", "resolution"],
+                name="runnerstats_runner_type_resolution_unique",
+            ),
+        ]
+
+    @property
+    def encodeSpeed(self):  # pylint: disable=invalid-name
+        """Seconds of video processed per second of wall time."""
+        if not self.processingSeconds:
+            return None
+        return self.videoSeconds / self.processingSeconds
+
+    @property
+    def failureRate(self):  # pylint: disable=invalid-name
+        """Ratio of the jobs ended by the runner which failed."""
+        ended_jobs = self.completedJobs + self.failedJobs
+        if not ended_jobs:
+            return None
+        return self.failedJobs / ended_jobs
+
+    @property
+    def throughput(self):
+        """Number of jobs completed per hour of processing."""
+        if not self.processingSeconds:
+            return None
+        return self.completedJobs * 3600 / self.processingSeconds
+
+
 class VideoJobInfoColumnType(models.TextChoices):
     """Possible video job info column types."""
 
@@ -238,9 +956,30 @@ class Video(models.Model):
         null=True,
         blank=True,
     )
+    idempotencyKey = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Key identifying the transcoding request which created the video",
+    )
     createdAt = models.DateTimeField(auto_now_add=True, help_text="Creation At")
     updatedAt = models.DateTimeField(auto_now=True, help_text="Update At")
 
+    def get_in_flight_runner_jobs(self):
+        """Filter the runner jobs of the video not finished yet."""
+        return RunnerJob.objects.filter(videoUUID=self.uuid).exclude(
+            state__in=FINISHED_RUNNER_JOB_STATES
+        )
+
+    def get_estimated_time_to_publish(self):
+        """Estimate when the transcoding of the video ends, see `utils.eta`."""
+        # Imported lazily, the estimator depends on the models
+        get_video_eta = import_string(
+            "django_peertube_runner_connector.utils.eta.get_video_eta"
+        )
+        return get_video_eta(self)
+
     def get_max_quality_file(self):
         """Get the highest quality video file."""
         if not self.files.count():
@@ -249,9 +988,8 @@ class Video(models.Model):
 
     def remove_all_web_video_files(self):
         """Remove all related video files."""
-        for file in self.files.all():
-            file.remove_web_video_file()
-            file.delete()
+        delete_stored_files(list(self.files.values_list("filename", flat=True)))
+        self.files.all().delete()
 
     def get_bandwidth_bits(self, video_file: "VideoFile"):
         """Get the bandwidth bits of a video file."""
@@ -269,16 +1007,16 @@ class Video(models.Model):
         job_info.save()
         return getattr(job_info, column)
 
-    def decrease_job_info(self, column: VideoJobInfoColumnType):
-        """Decrease a video job info column."""
-        try:
-            job_info = VideoJobInfo.objects.get(video=self)
-            setattr(job_info, column, getattr(job_info, column) - 1)
-            job_info.save()
-            return getattr(job_info, column)
-        except VideoJobInfo.DoesNotExist:
+    def decrease_job_info(self, column: VideoJobInfoColumnType, amount: int = 1):
+        """Decrease a video job info column in a single update."""
+        job_info = VideoJobInfo.objects.filter(video=self)
+        if not job_info.update(
+            **{column: F(column) - amount, "updatedAt": timezone.now()}
+        ):
             return None
 
+        return job_info.values_list(column, flat=True).get()
+
 
 class VideoJobInfo(models.Model):
     """Model keeping track of video job completion."""
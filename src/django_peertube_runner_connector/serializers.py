@@ -2,7 +2,13 @@
 
 from rest_framework import serializers
 
-from django_peertube_runner_connector.models import Runner, RunnerJob, RunnerJobState
+from django_peertube_runner_connector.models import (
+    Runner,
+    RunnerJob,
+    RunnerJobState,
+    RunnerStats,
+)
+from django_peertube_runner_connector.utils.progress import get_live_progress
 
 
 # pylint: disable=missing-class-docstring
@@ -25,6 +31,32 @@ class RunnerSerializer(serializers.ModelSerializer):
         )
 
 
+class RunnerStatsSerializer(serializers.ModelSerializer):
+    """Serializer for the RunnerStats model."""
+
+    runner = serializers.CharField(source="runner.name", read_only=True)
+    encodeSpeed = serializers.FloatField(read_only=True)
+    failureRate = serializers.FloatField(read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = RunnerStats
+        fields = (
+            "runner",
+            "jobType",
+            "resolution",
+            "completedJobs",
+            "failedJobs",
+            "abortedJobs",
+            "processingSeconds",
+            "videoSeconds",
+            "encodeSpeed",
+            "failureRate",
+            "throughput",
+            "updatedAt",
+        )
+
+
 class SimpleRunnerJobSerializer(serializers.ModelSerializer):
     """Simple Serializer for the RunnerJob model."""
 
@@ -67,9 +99,14 @@ class RunnerJobSerializer(BaseRunnerJobSerializer):
     """Serializer for the a RunnerJob model."""
 
     jobToken = serializers.CharField(source="processingJobToken", read_only=True)
+    progress = serializers.SerializerMethodField(read_only=True)
     runner = RunnerSerializer()
     parent = ParentRunnerJobSerializer(source="dependsOnRunnerJob")
 
+    def get_progress(self, obj):
+        """Get the live progress of the RunnerJob."""
+        return get_live_progress(obj)
+
     class Meta:
         model = RunnerJob
         fields = (
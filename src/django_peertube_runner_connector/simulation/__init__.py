@@ -0,0 +1 @@
+"""Simulation of a fleet of runners, to load test the connector without ffmpeg."""
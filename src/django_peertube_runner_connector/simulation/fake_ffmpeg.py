@@ -0,0 +1,101 @@
+"""Stubs of ffmpeg returning deterministic metadata without running it."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import re
+from unittest.mock import patch
+
+import ffmpeg
+
+
+RESOLUTION_PATTERN = re.compile(r"-(\d+)-fragmented\.mp4")
+# Smallest valid JPEG file, written as the output of the thumbnail extraction
+FAKE_JPEG = bytes.fromhex("ffd8ffe000104a46494600010100000100010000ffd9")
+
+
+def build_probe(
+    filename: str = "",
+    *,
+    duration: float = 60.0,
+    width: int = 1920,
+    height: int = 1080,
+    fps: int = 30,
+    size: int = 1024 * 1024,
+    has_audio: bool = True,
+):
+    """
+    Return the metadata ffprobe would return for a H.264 video.
+
+    The files produced by a HLS transcoding job have their resolution in their
+    name, they are given the dimensions of this resolution.
+    """
+    if match := RESOLUTION_PATTERN.search(filename):
+        height = int(match.group(1))
+        width = height * 16 // 9 // 2 * 2
+
+    streams = [
+        {
+            "index": 0,
+            "codec_name": "h264",
+            "codec_type": "video",
+            "codec_tag_string": "avc1",
+            "profile": "High",
+            "level": 40,
+            "width": width,
+            "height": height,
+            "r_frame_rate": f"{fps}/1",
+            "avg_frame_rate": f"{fps}/1",
+            "duration": f"{duration:.6f}",
+        }
+    ]
+    if has_audio:
+        streams.append(
+            {
+                "index": 1,
+                "codec_name": "aac",
+                "codec_type": "audio",
+                "sample_rate": "48000",
+                "channels": 2,
+                "bit_rate": "128000",
+                "duration": f"{duration:.6f}",
+            }
+        )
+
+    return {
+        "streams": streams,
+        "format": {
+            "filename": filename,
+            "nb_streams": len(streams),
+            "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+            "duration": f"{duration:.6f}",
+            "size": str(size),
+            "bit_rate": str(int(size * 8 / duration)) if duration else "0",
+        },
+    }
+
+
+def fake_run(stream_spec, **_kwargs):
+    """Write a fake JPEG file to the output of a stream instead of running ffmpeg."""
+    output_path = ffmpeg.get_args(stream_spec)[-1]
+    with open(output_path, "wb") as output_file:
+        output_file.write(FAKE_JPEG)
+    return b"", b""
+
+
+@contextmanager
+def fake_ffmpeg(**probe_kwargs):
+    """
+    Replace `ffmpeg.probe` and `ffmpeg.run` by deterministic stubs.
+
+    The keyword arguments are passed to `build_probe` to describe the probed
+    files.
+    """
+
+    def fake_probe(filename, **_kwargs):
+        return build_probe(str(filename), **probe_kwargs)
+
+    with patch.object(ffmpeg, "probe", side_effect=fake_probe), patch.object(
+        ffmpeg, "run", side_effect=fake_run
+    ):
+        yield
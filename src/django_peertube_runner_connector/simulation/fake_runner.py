@@ -0,0 +1,199 @@
+"""Fake runners driving the jobs through the REST API of the connector in-process."""
+
+from __future__ import annotations
+
+from collections import Counter
+import logging
+import random
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.urls import reverse
+
+from django_peertube_runner_connector.models import RunnerJobType
+
+
+logger = logging.getLogger(__name__)
+
+
+class FakeRunner:  # pylint: disable=too-many-instance-attributes
+    """
+    A PeerTube runner speaking the REST protocol of the connector in-process.
+
+    The runner requests the available jobs, accepts the first one it can, sends
+    progress updates while waiting for `processing_time` seconds, then uploads
+    synthetic results of `result_size` bytes. A job fails with a probability of
+    `failure_rate` and is aborted with a probability of `abort_rate`.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        name: str,
+        registration_token: str,
+        *,
+        client: Client | None = None,
+        result_size: int = 1024,
+        processing_time: float = 0,
+        progress_updates: int = 2,
+        failure_rate: float = 0,
+        abort_rate: float = 0,
+        seed: int | None = None,
+    ):
+        self.name = name
+        self.registration_token = registration_token
+        self.client = client or Client()
+        self.result_size = result_size
+        self.processing_time = processing_time
+        self.progress_updates = progress_updates
+        self.failure_rate = failure_rate
+        self.abort_rate = abort_rate
+        # Seeded for deterministic simulations, not for security
+        self.random = random.Random(seed)  # nosec B311
+        self.runner_token = None
+        self.stats = Counter()
+
+    def post(self, url_name: str, data=None, files=None, **kwargs):
+        """
+        Post to an endpoint of the runner API, with the runner token.
+
+        The data is sent as JSON, like PeerTube runners do, or as a multipart form
+        along with the files if any.
+        """
+        data = {"runnerToken": self.runner_token or "", **(data or {})}
+        if files:
+            return self.client.post(
+                reverse(url_name, kwargs=kwargs), data={**data, **files}
+            )
+        return self.client.post(
+            reverse(url_name, kwargs=kwargs), data=data, content_type="application/json"
+        )
+
+    def register(self):
+        """Register the runner and keep its token."""
+        response = self.post(
+            "runner-register",
+            {"registrationToken": self.registration_token, "name": self.name},
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Runner {self.name} registration failed.")
+        self.runner_token = response.json()["runnerToken"]
+
+    def unregister(self):
+        """Unregister the runner."""
+        self.post("runner-unregister")
+        self.runner_token = None
+
+    def request_jobs(self, job_types: list[str] | None = None):
+        """Return the jobs available to the runner."""
+        response = self.post(
+            "runner-jobs-request-runner-job",
+            {"jobTypes": job_types} if job_types else None,
+        )
+        return response.json()["availableJobs"]
+
+    def build_result(self, job: dict):
+        """Return the synthetic result of a job, with its files."""
+        content = bytes(self.result_size)
+        if job["type"] == RunnerJobType.VIDEO_TRANSCRIPTION:
+            return {
+                "payload[inputLanguage]": "en",
+                "payload[vttFile]": SimpleUploadedFile(
+                    "transcript.vtt", b"WEBVTT\n\n", content_type="text/vtt"
+                ),
+            }
+
+        return {
+            "payload[videoFile]": SimpleUploadedFile(
+                "video.mp4", content, content_type="video/mp4"
+            ),
+            "payload[resolutionPlaylistFile]": SimpleUploadedFile(
+                "video.m3u8",
+                b"#EXTM3U\n#EXT-X-VERSION:7\n#EXTINF:4.000000,\nvideo.mp4\n",
+                content_type="application/vnd.apple.mpegurl",
+            ),
+        }
+
+    def process(self, job: dict):
+        """
+        Accept and process a job, returning the outcome of the processing.
+
+        The outcome is "success", "error", "abort" or "conflict" when the job was
+        accepted by another runner first.
+        """
+        uuid = job["uuid"]
+        response = self.post("runner-jobs-accept-runner-job", uuid=uuid)
+        if response.status_code != 200:
+            return "conflict"
+        job_token = {"jobToken": response.json()["job"]["jobToken"]}
+
+        for step in range(1, self.progress_updates + 1):
+            time.sleep(self.processing_time / (self.progress_updates + 1))
+            self.post(
+                "runner-jobs-update-runner-job",
+                {
+                    **job_token,
+                    "progress": 100 * step // (self.progress_updates + 1),
+                },
+                uuid=uuid,
+            )
+        time.sleep(self.processing_time / (self.progress_updates + 1))
+
+        draw = self.random.random()
+        if draw < self.abort_rate:
+            self.post("runner-jobs-abort-runner-job", job_token, uuid=uuid)
+            return "abort"
+        if draw < self.abort_rate + self.failure_rate:
+            self.post(
+                "runner-jobs-error-runner-job",
+                {**job_token, "message": "Simulated failure"},
+                uuid=uuid,
+            )
+            return "error"
+
+        self.post(
+            "runner-jobs-success-runner-job",
+            job_token,
+            files=self.build_result(job),
+            uuid=uuid,
+        )
+        return "success"
+
+    def run_once(self, job_types: list[str] | None = None):
+        """Process one of the available jobs, returning its outcome if any."""
+        jobs = self.request_jobs(job_types)
+        if not jobs:
+            return None
+
+        outcome = self.process(self.random.choice(jobs))
+        self.stats[outcome] += 1
+        logger.debug("Runner %s job outcome: %s.", self.name, outcome)
+        return outcome
+
+
+def simulate_runners(runners: list[FakeRunner], max_rounds: int | None = None):
+    """
+    Let the runners process the available jobs in turn until there is none left.
+
+    The runners are run sequentially, in the calling thread, so the requests of
+    the runners never overlap.
+
+    Return the outcomes of the jobs processed by all the runners and the number
+    of rounds.
+    """
+    for runner in runners:
+        runner.register()
+
+    rounds = 0
+    try:
+        while max_rounds is None or rounds < max_rounds:
+            rounds += 1
+            outcomes = [runner.run_once() for runner in runners]
+            if not any(outcomes):
+                break
+    finally:
+        for runner in runners:
+            runner.unregister()
+
+    return sum((runner.stats for runner in runners), Counter()), rounds
@@ -5,14 +5,27 @@ import logging
 from asgiref.sync import sync_to_async
 import socketio
 
-from django_peertube_runner_connector.models import Runner
+from django_peertube_runner_connector.models import Runner, RunnerJobType
+from django_peertube_runner_connector.serializers import RunnerJobSerializer
 from django_peertube_runner_connector.socketio.manager import get_client_manager
+from django_peertube_runner_connector.socketio.presence import (
+    get_presence_registry,
+    get_shared_presence_counts,
+    is_presence_shared,
+    runner_disconnected,
+)
+from django_peertube_runner_connector.utils.job_offers import (
+    accept_job_offer,
+    is_push_dispatch_enabled,
+    reserve_job_offers,
+)
 
 
 sio_logger = logging.getLogger(f"{__name__}.asyncio")
 engineio_logger = logging.getLogger(f"{__name__}.engineio")
 
 client_manager = get_client_manager()
+presence = get_presence_registry()
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
@@ -24,19 +37,71 @@ sio = socketio.AsyncServer(
 
 logger = logging.getLogger(__name__)
 
+# Room of the runners which did not declare the job types they process
+ALL_JOB_TYPES_ROOM = "job-type:all"
+
+
+def get_job_type_room(job_type: str):
+    """Return the room of the runners processing a job type."""
+    return f"job-type:{job_type}"
+
+
+def get_runner_room(runner_id: str):
+    """Return the room of the connections of a runner accepting job offers."""
+    return f"runner:{runner_id}"
+
+
+def get_runner_job_types(auth: dict):
+    """Return the known job types declared by a runner on connection."""
+    job_types = auth.get("jobTypes") or []
+    if isinstance(job_types, str):
+        job_types = job_types.split(",")
+
+    return [job_type for job_type in RunnerJobType.values if job_type in job_types]
+
+
+def get_runner_rooms(auth: dict):
+    """
+    Return the rooms a runner joins, from the job types declared on connection.
+
+    A runner declaring no known job type joins the room notified of all the jobs.
+    """
+    rooms = [get_job_type_room(job_type) for job_type in get_runner_job_types(auth)]
+    return rooms or [ALL_JOB_TYPES_ROOM]
+
+
+def serialize_runner_job(runner_job):
+    """Return the data of a job attributed to a runner."""
+    return RunnerJobSerializer(runner_job).data
+
 
 @sio.on("connect", namespace="/runners")
 async def connect(sid, _env, auth):
     """Function called when a runner connects."""
     runner_token = auth.get("runnerToken", None)
 
-    if (
-        runner_token
-        and await sync_to_async(
-            Runner.objects.filter(runnerToken=runner_token).exists
+    runner_id = None
+    if runner_token:
+        runner_id = await sync_to_async(
+            Runner.objects.filter(runnerToken=runner_token)
+            .values_list("id", flat=True)
+            .first
         )()
-    ):
+
+    if runner_id:
         logger.info("Runner with token %s connected with sid %s", runner_token, sid)
+        accepts_offers = is_push_dispatch_enabled() and bool(auth.get("jobOffers"))
+        await presence.add(
+            sid,
+            str(runner_id),
+            offer_types=get_runner_job_types(auth) if accepts_offers else None,
+        )
+        presence.start_heartbeats(sio.start_background_task)
+        for room in get_runner_rooms(auth):
+            await sio.enter_room(sid, room, namespace="/runners")
+        if accepts_offers:
+            await sio.enter_room(sid, get_runner_room(runner_id), namespace="/runners")
+            await send_job_offers()
     else:
         logger.info("Runner with token %s not found", runner_token)
         await sio.disconnect(sid, namespace="/runners")
@@ -44,15 +109,108 @@ async def connect(sid, _env, auth):
 
 @sio.on("disconnect", namespace="/runners")
 async def disconnect(sid):
-    """Function called when a runner disconnects."""
+    """
+    Function called when a runner disconnects.
+
+    When it was the last connection of the runner, the runner_disconnected
+    callback is called, to review the jobs it was processing for instance.
+    """
     logger.info("%s disconnected", sid)
+    if runner_id := await presence.remove(sid):
+        await sync_to_async(runner_disconnected)(runner_id)
 
 
-async def send_available_jobs_ping_to_runners():
-    """Send an "available jobs" ping to the runners."""
-    logger.info("Available jobs ping sent to runners")
+@sio.on("accept-offer", namespace="/runners")
+async def accept_offer(sid, data):
+    """
+    Function called when a runner accepts a job offered to it.
+
+    The job is returned in the acknowledgement, like by the accept endpoint, or
+    an error when the offer expired.
+    """
+    runner_job = None
+    if runner_id := presence.runner_ids.get(sid):
+        runner_job = await sync_to_async(accept_job_offer)(
+            runner_id, (data or {}).get("jobUUID")
+        )
+
+    if runner_job is None:
+        return {"error": "This job is not offered to the runner anymore"}
+    return {"job": await sync_to_async(serialize_runner_job)(runner_job)}
+
+
+async def emit_to_runners(event: str, data=None, room=None):
+    """Emit an event to the runners, through the client manager if any."""
     manager = get_client_manager(write_only=True)
     if manager:
-        await manager.emit("available-jobs", data=None, namespace="/runners")
+        await manager.emit(event, data=data, namespace="/runners", room=room)
     else:
-        await sio.emit("available-jobs", namespace="/runners")
+        await sio.emit(event, data=data, namespace="/runners", room=room)
+
+
+async def send_job_offers():
+    """
+    Reserve a pending job for each idle runner accepting offers and push it.
+
+    The runner accepts the offer with the "accept-offer" event, in the
+    `TRANSCODING_JOB_OFFER_TIMEOUT` seconds after which the job is available to
+    the other runners again.
+    """
+    registry = get_presence_registry() if is_presence_shared() else presence
+    try:
+        offer_runners = await registry.get_offer_runners()
+    finally:
+        if registry is not presence:
+            await registry.close()
+
+    if not offer_runners:
+        return
+
+    for runner_id, offer in await sync_to_async(reserve_job_offers)(offer_runners):
+        logger.info("Job %s offered to runner %s", offer["job"]["uuid"], runner_id)
+        await emit_to_runners("job-offer", offer, room=get_runner_room(runner_id))
+
+
+async def has_connected_runners():
+    """
+    Return whether a runner is connected to any process of the SocketIO server.
+
+    Only a registry shared by the processes can tell, a ping sent from a process
+    not running the server is never skipped otherwise.
+    """
+    try:
+        counts = await get_shared_presence_counts()
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed to count the connected runners.")
+        return True
+    return counts is None or counts["connections"] > 0
+
+
+async def send_available_jobs_ping_to_runners(job_types=None):
+    """
+    Send an "available jobs" ping to the runners.
+
+    When the types of the new jobs are given, only the runners processing them,
+    and the ones which did not declare their job types, are pinged. With the
+    push dispatch enabled, the jobs are offered to the idle runners accepting
+    offers first.
+    """
+    room = None
+    if job_types is not None:
+        # A runner in several of the rooms is pinged once, with python-socketio 5.8+
+        room = [ALL_JOB_TYPES_ROOM] + [
+            get_job_type_room(job_type) for job_type in sorted(set(job_types))
+        ]
+
+    if not await has_connected_runners():
+        logger.info("No runner connected, available jobs ping skipped")
+        return
+
+    if is_push_dispatch_enabled():
+        try:
+            await send_job_offers()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to send the job offers.")
+
+    logger.info("Available jobs ping sent to runners")
+    await emit_to_runners("available-jobs", room=room)
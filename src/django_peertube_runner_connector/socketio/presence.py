@@ -0,0 +1,337 @@
+"""Registry of the runners connected to the SocketIO server."""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from redis.asyncio import Redis
+from redis.asyncio.sentinel import Sentinel
+
+from django_peertube_runner_connector.models import Runner
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a connection is kept in the registry without heartbeat
+DEFAULT_PRESENCE_TTL = 60
+PRESENCE_KEY_PREFIX = "django_peertube_runner_connector:presence"
+DEFAULT_PRESENCE_COUNTS_CACHE_TIMEOUT = 5  # seconds
+PRESENCE_COUNTS_KEY = f"{PRESENCE_KEY_PREFIX}:counts"
+
+
+def get_presence_ttl():
+    """Return the seconds a connection is kept in the registry without heartbeat."""
+    return getattr(settings, "TRANSCODING_RUNNER_PRESENCE_TTL", DEFAULT_PRESENCE_TTL)
+
+
+def get_presence_counts_cache_timeout():
+    """Return the seconds the counts of the shared registry are cached for."""
+    return getattr(
+        settings,
+        "TRANSCODING_RUNNER_PRESENCE_COUNTS_CACHE_TIMEOUT",
+        DEFAULT_PRESENCE_COUNTS_CACHE_TIMEOUT,
+    )
+
+
+def runner_disconnected(runner_id):
+    """Call the runner_disconnected callback if it exists."""
+    if callback_path := getattr(
+        settings, "TRANSCODING_RUNNER_DISCONNECTED_CALLBACK_PATH", ""
+    ):
+        try:
+            callback = import_string(callback_path)
+        except ImportError:
+            logger.error("Error importing runner_disconnected callback.")
+            return
+        if runner := Runner.objects.filter(pk=runner_id).first():
+            callback(runner)
+
+
+def _decode(value):
+    """Return a value read from redis as a string."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class LocalPresenceRegistry:
+    """
+    Registry of the connections to this process only.
+
+    It is used when no redis is configured, the SocketIO server then runs in a
+    single process and the connections do not expire.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.runner_ids = {}
+        self.sids = {}
+        self.offer_types = {}
+        self.heartbeat_task = None
+
+    async def add(self, sid, runner_id, offer_types=None):
+        """
+        Register a connection of a runner.
+
+        `offer_types` are the job types the runner accepts offers of, all of
+        them when empty, it does not accept offers when None.
+        """
+        self.runner_ids[sid] = runner_id
+        self.sids.setdefault(runner_id, set()).add(sid)
+        if offer_types is not None:
+            self.offer_types[runner_id] = list(offer_types)
+
+    async def remove(self, sid):
+        """
+        Unregister a connection.
+
+        Return the id of its runner when it was the last connection of the runner.
+        """
+        runner_id = self.runner_ids.pop(sid, None)
+        if runner_id is None:
+            return None
+
+        sids = self.sids.get(runner_id, set())
+        sids.discard(sid)
+        if sids:
+            return None
+        self.sids.pop(runner_id, None)
+        self.offer_types.pop(runner_id, None)
+        return runner_id
+
+    async def heartbeat(self):
+        """Refresh the connections of this process, they do not expire."""
+
+    async def run_heartbeats(self):
+        """Refresh the connections of this process periodically, until cancelled."""
+        while True:
+            await asyncio.sleep(get_presence_ttl() / 3)
+            try:
+                await self.heartbeat()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to refresh the runner presence.")
+
+    def start_heartbeats(self, start_background_task):
+        """Start the heartbeats with the task runner of the server, once."""
+        if self.shared and self.heartbeat_task is None:
+            self.heartbeat_task = start_background_task(self.run_heartbeats)
+
+    async def close(self):
+        """Close the connection to the registry storage."""
+
+    async def get_sids(self, runner_id):
+        """Return the sids of the connections of a runner."""
+        return set(self.sids.get(runner_id, set()))
+
+    async def get_offer_runners(self):
+        """Return the job types of the connected runners accepting offers."""
+        return dict(self.offer_types)
+
+    async def count_runners(self):
+        """Return the number of runners connected."""
+        return len(self.sids)
+
+    async def count_connections(self):
+        """Return the number of connections."""
+        return len(self.runner_ids)
+
+
+class RedisPresenceRegistry(LocalPresenceRegistry):
+    """
+    Registry of the connections shared by the processes through redis.
+
+    Each connection is stored with its expiration date in sorted sets:
+    - `sids` with all the connections;
+    - `runners` with the runners connected, expiring with their last connection;
+    - `runner:<id>` with the connections of a runner.
+
+    The runners accepting offers are stored in the `offer-runners` sorted set,
+    with their job types in `offers:<id>`.
+
+    The processes refresh the expiration of their own connections on each
+    heartbeat, so the connections of a process which died expire after the TTL.
+    The expired members are pruned before counting, the counts then only read
+    the size of the sets.
+    """
+
+    shared = True
+
+    def __init__(self, redis: Redis):
+        super().__init__()
+        self.redis = redis
+
+    def _key(self, name):
+        return f"{PRESENCE_KEY_PREFIX}:{name}"
+
+    def _add_to_pipeline(self, pipeline, sid, runner_id, expires_at):
+        runner_key = self._key(f"runner:{runner_id}")
+        pipeline.zadd(self._key("sids"), {sid: expires_at})
+        pipeline.zadd(runner_key, {sid: expires_at})
+        pipeline.expire(runner_key, get_presence_ttl())
+        pipeline.zadd(self._key("runners"), {str(runner_id): expires_at})
+        if runner_id in self.offer_types:
+            pipeline.zadd(self._key("offer-runners"), {str(runner_id): expires_at})
+            pipeline.set(
+                self._key(f"offers:{runner_id}"),
+                ",".join(self.offer_types[runner_id]),
+                ex=get_presence_ttl(),
+            )
+
+    async def add(self, sid, runner_id, offer_types=None):
+        """
+        Register a connection of a runner.
+
+        The cached counts are forgotten, so the pings are not skipped for the
+        runner connecting.
+        """
+        await super().add(sid, runner_id, offer_types)
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            self._add_to_pipeline(
+                pipeline, sid, runner_id, time.time() + get_presence_ttl()
+            )
+            await pipeline.execute()
+        await cache.adelete(PRESENCE_COUNTS_KEY)
+
+    async def remove(self, sid):
+        """
+        Unregister a connection.
+
+        Return the id of its runner when it was the last connection of the runner,
+        in any process.
+        """
+        runner_id = self.runner_ids.get(sid)
+        await super().remove(sid)
+        if runner_id is None:
+            return None
+
+        runner_key = self._key(f"runner:{runner_id}")
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            pipeline.zrem(self._key("sids"), sid)
+            pipeline.zrem(runner_key, sid)
+            pipeline.zremrangebyscore(runner_key, "-inf", time.time())
+            pipeline.zcard(runner_key)
+            *_, remaining = await pipeline.execute()
+
+        if remaining:
+            return None
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            pipeline.zrem(self._key("runners"), str(runner_id))
+            pipeline.zrem(self._key("offer-runners"), str(runner_id))
+            await pipeline.execute()
+        return runner_id
+
+    async def heartbeat(self):
+        """Refresh the expiration of the connections of this process."""
+        if not self.runner_ids:
+            return
+        expires_at = time.time() + get_presence_ttl()
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            for sid, runner_id in self.runner_ids.items():
+                self._add_to_pipeline(pipeline, sid, runner_id, expires_at)
+            await pipeline.execute()
+
+    async def close(self):
+        """Close the connection to redis."""
+        await self.redis.aclose()
+
+    async def get_sids(self, runner_id):
+        """Return the sids of the connections of a runner, in any process."""
+        sids = await self.redis.zrangebyscore(
+            self._key(f"runner:{runner_id}"), time.time(), "+inf"
+        )
+        return {_decode(sid) for sid in sids}
+
+    async def get_offer_runners(self):
+        """Return the job types of the runners accepting offers, in any process."""
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            pipeline.zremrangebyscore(self._key("offer-runners"), "-inf", time.time())
+            pipeline.zrange(self._key("offer-runners"), 0, -1)
+            _, runner_ids = await pipeline.execute()
+        if not runner_ids:
+            return {}
+
+        runner_ids = [_decode(runner_id) for runner_id in runner_ids]
+        offer_types = await self.redis.mget(
+            [self._key(f"offers:{runner_id}") for runner_id in runner_ids]
+        )
+        return {
+            runner_id: [
+                job_type for job_type in _decode(job_types).split(",") if job_type
+            ]
+            for runner_id, job_types in zip(runner_ids, offer_types)
+            if job_types is not None
+        }
+
+    async def _count(self, name):
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            pipeline.zremrangebyscore(self._key(name), "-inf", time.time())
+            pipeline.zcard(self._key(name))
+            _, count = await pipeline.execute()
+        return count
+
+    async def count_runners(self):
+        """Return the number of runners connected to any process."""
+        return await self._count("runners")
+
+    async def count_connections(self):
+        """Return the number of connections to any process."""
+        return await self._count("sids")
+
+
+def is_presence_shared():
+    """Return whether the presence registry is shared by the processes."""
+    return hasattr(settings, "DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS") or hasattr(
+        settings, "DJANGO_PEERTUBE_RUNNER_CONNECTOR_SENTINELS"
+    )
+
+
+def get_presence_registry():
+    """
+    Return a presence registry based on the settings of the client manager.
+
+    The registry is shared through the redis, or redis sentinel, of the client
+    manager when one is configured, it is local to the process otherwise.
+    """
+    if hasattr(settings, "DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS"):
+        return RedisPresenceRegistry(
+            Redis.from_url(settings.DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS)
+        )
+
+    if hasattr(settings, "DJANGO_PEERTUBE_RUNNER_CONNECTOR_SENTINELS"):
+        return RedisPresenceRegistry(
+            Sentinel(settings.DJANGO_PEERTUBE_RUNNER_CONNECTOR_SENTINELS).master_for(
+                settings.DJANGO_PEERTUBE_RUNNER_CONNECTOR_SENTINELS_MASTER
+            )
+        )
+
+    return LocalPresenceRegistry()
+
+
+async def get_shared_presence_counts():
+    """
+    Return the numbers of runners and of connections of the shared registry.
+
+    The counts are cached for `TRANSCODING_RUNNER_PRESENCE_COUNTS_CACHE_TIMEOUT`
+    seconds, so the pings of a burst of new jobs count the runners once. A new
+    client is used to count them, as the call can be made from outside the event
+    loop of the SocketIO server. Return None when the registry is not shared.
+    """
+    if not is_presence_shared():
+        return None
+    if (counts := await cache.aget(PRESENCE_COUNTS_KEY)) is not None:
+        return counts
+
+    registry = get_presence_registry()
+    try:
+        counts = {
+            "runners": await registry.count_runners(),
+            "connections": await registry.count_connections(),
+        }
+    finally:
+        await registry.close()
+
+    await cache.aset(PRESENCE_COUNTS_KEY, counts, get_presence_counts_cache_timeout())
+    return counts
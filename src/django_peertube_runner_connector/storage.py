@@ -1,13 +1,37 @@
 """Video storage for the Django Peertube Runner Connector app."""
 
+from concurrent.futures import ThreadPoolExecutor, wait
+import posixpath
+
+from django.conf import settings
 from django.core.files.storage import storages
 from django.utils.functional import LazyObject
 
+from storages.utils import clean_name
+
+from django_peertube_runner_connector.utils.tracing import bind_trace_context
+
+
+DEFAULT_STORAGE_MAX_WORKERS = 4
+# Maximum number of keys of a S3 listing page or multi-object delete request
+S3_MAX_KEYS = 1000
+
 
 class VideoNotFoundError(Exception):
     """Exception class for video not found error."""
 
 
+class StorageBatchError(Exception):
+    """Exception raised when one or more operations of a storage batch failed."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} storage operation(s) failed: "
+            + "; ".join(str(error) for error in errors)
+        )
+
+
 class ConfiguredStorage(LazyObject):
     """Lazy object for the video storage."""
 
@@ -17,3 +41,157 @@ class ConfiguredStorage(LazyObject):
 
 
 video_storage = ConfiguredStorage()
+
+
+class StorageBatch:
+    """
+    Run independent storage operations concurrently on a bounded thread pool.
+
+    Operations are scheduled with `submit` (or the `save` and `delete` shortcuts)
+    and awaited together with `wait`, which raises a StorageBatchError aggregating
+    every failure. Used as a context manager, the batch is awaited on exit.
+
+    Operations must not access the database: they run in other threads, which do
+    not share the caller's connection nor its transaction.
+    """
+
+    def __init__(self, storage=None, max_workers=None):
+        self.storage = storage if storage is not None else video_storage
+        self.max_workers = max_workers or getattr(
+            settings, "TRANSCODING_STORAGE_MAX_WORKERS", DEFAULT_STORAGE_MAX_WORKERS
+        )
+        self._executor = None
+        self._futures = []
+
+    def submit(self, function, *args, **kwargs):
+        """Schedule a callable in the batch and return its future."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="storage-batch"
+            )
+        future = self._executor.submit(
+            bind_trace_context(
+                function, f"storage.{getattr(function, '__name__', 'operation')}"
+            ),
+            *args,
+            **kwargs,
+        )
+        self._futures.append(future)
+        return future
+
+    def save(self, name, content):
+        """Schedule a file save, the future result is the saved filename."""
+        return self.submit(self.storage.save, name, content)
+
+    def delete(self, name):
+        """Schedule a file deletion."""
+        return self.submit(self.storage.delete, name)
+
+    def _drain(self):
+        """Wait for the scheduled operations and release the thread pool."""
+        wait(self._futures)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        futures, self._futures = self._futures, []
+        return futures
+
+    def wait(self):
+        """Wait for all the scheduled operations and return their results."""
+        futures = self._drain()
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            raise StorageBatchError(errors)
+
+        return [future.result() for future in futures]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # Let the running operations end but keep the original exception
+            self._drain()
+            return
+
+        self.wait()
+
+
+def _get_s3_key(name):
+    """Return the S3 key of a file when the video storage is a S3 like storage."""
+    if not hasattr(video_storage, "bucket"):
+        return None
+
+    # pylint: disable=protected-access
+    return video_storage._normalize_name(clean_name(name))
+
+
+def list_stored_files(prefix):
+    """
+    Iterate over the files stored under a directory of the video storage.
+
+    Yield the name, size and last modification time of each file. Files of S3 like
+    storages are listed page by page, other storages are walked recursively.
+    """
+    if (key_prefix := _get_s3_key(prefix)) is not None:
+        location = video_storage.location.strip("/")
+        stored_objects = video_storage.bucket.objects.filter(
+            Prefix=key_prefix.rstrip("/") + "/"
+        ).page_size(S3_MAX_KEYS)
+        for stored_object in stored_objects:
+            name = stored_object.key
+            if location:
+                name = name[len(location) :].lstrip("/")
+            yield name, stored_object.size, stored_object.last_modified
+        return
+
+    try:
+        directories, filenames = video_storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+
+    for filename in filenames:
+        name = posixpath.join(prefix, filename)
+        yield name, video_storage.size(name), video_storage.get_modified_time(name)
+
+    for directory in directories:
+        yield from list_stored_files(posixpath.join(prefix, directory))
+
+
+def delete_stored_files(names):
+    """
+    Delete files of the video storage in bulk.
+
+    S3 like storages delete up to 1000 files per request, other storages delete
+    them concurrently. A StorageBatchError is raised once every deletion has been
+    attempted if some of them failed.
+    """
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    if _get_s3_key("") is None:
+        with StorageBatch() as batch:
+            for name in names:
+                batch.delete(name)
+        return
+
+    errors = []
+    for index in range(0, len(names), S3_MAX_KEYS):
+        response = video_storage.bucket.delete_objects(
+            Delete={
+                "Objects": [
+                    {"Key": _get_s3_key(name)}
+                    for name in names[index : index + S3_MAX_KEYS]
+                ],
+                "Quiet": True,
+            }
+        )
+        errors.extend(
+            OSError(f"Cannot delete {error['Key']}: {error.get('Message')}")
+            for error in response.get("Errors", [])
+        )
+
+    if errors:
+        raise StorageBatchError(errors)
@@ -1,14 +1,21 @@
 """Base function to start the transcoding process."""
 
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import logging
 
-import ffmpeg
+from django.db import IntegrityError, connections, transaction
 
 from django_peertube_runner_connector.models import Video
 from django_peertube_runner_connector.storage import VideoNotFoundError, video_storage
-from django_peertube_runner_connector.utils.ffprobe import get_video_stream_duration
+from django_peertube_runner_connector.utils.ffprobe import (
+    get_video_stream_duration,
+    probe_stored_file,
+)
 from django_peertube_runner_connector.utils.files import build_new_file
+from django_peertube_runner_connector.utils.media_cache import get_media_version
 from django_peertube_runner_connector.utils.thumbnail import build_video_thumbnails
+from django_peertube_runner_connector.utils.tracing import bind_trace_context, traced
 from django_peertube_runner_connector.utils.transcoding.job_creation import (
     create_transcoding_jobs,
 )
@@ -17,45 +24,125 @@ from django_peertube_runner_connector.utils.video_state import build_next_video_
 
 logger = logging.getLogger(__name__)
 
+VIDEO_CREATION_ATTEMPTS = 3
+
+
+def _build_video_thumbnails(**kwargs):
+    """Build the thumbnails of a video in a thread, closing its database connections."""
+    try:
+        return build_video_thumbnails(**kwargs)
+    finally:
+        connections.close_all()
+
 
 def _process_transcoding(video: Video, video_path: str, domain: str):
     """
     Create a video_file, thumbnails and transcoding jobs for a video.
     The request will be used to build the video download url.
     """
-    url = video_storage.url(video_path)
-    probe = ffmpeg.probe(url)
+    probe = probe_stored_file(video_path)
 
     video_file = build_new_file(video=video, filename=video_path, existing_probe=probe)
 
     video.duration = get_video_stream_duration(video_path, existing_probe=probe)
 
-    video.thumbnailFilename = build_video_thumbnails(
-        video=video, video_file=video_file, existing_probe=probe
-    )
     video.save()
 
     logger.info("Video at %s and uuid %s created.", video_path, video.uuid)
 
-    create_transcoding_jobs(
-        video=video,
-        video_file=video_file,
-        existing_probe=probe,
-        domain=domain,
-    )
+    # The thumbnail is extracted and uploaded while the transcoding jobs are
+    # created, in a thread of its own as it is not a storage operation
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail") as executor:
+        thumbnail = executor.submit(
+            bind_trace_context(_build_video_thumbnails, "thumbnail"),
+            video=video,
+            video_file=video_file,
+            existing_probe=probe,
+        )
+
+        try:
+            create_transcoding_jobs(
+                video=video,
+                video_file=video_file,
+                existing_probe=probe,
+                domain=domain,
+            )
+        finally:
+            try:
+                video.thumbnailFilename = thumbnail.result()
+            except Exception:  # pylint: disable=broad-except
+                # The transcoding jobs already exist, the video is usable without
+                # thumbnail
+                logger.exception("Thumbnail creation failed for video %s.", video.uuid)
+
+    video.save(update_fields=["thumbnailFilename", "updatedAt"])
+
+
+def build_idempotency_key(file_path: str, destination: str):
+    """
+    Return the key identifying the transcoding of a version of a stored file.
+
+    Submitting the same file again, unchanged, to the same destination gives
+    the same key.
+    """
+    version = get_media_version(file_path)
+    return hashlib.sha256(f"{file_path}:{destination}:{version}".encode()).hexdigest()
+
 
+def _create_video(destination: str, base_name: str, idempotency_key: str):
+    """
+    Create the video of a transcoding request, unless its key already has one.
 
+    The unique key keeps concurrent requests from creating two videos. The video
+    holding the key may fail, releasing its key, between the failed creation and
+    its lookup, the creation is then attempted again. Return the video and
+    whether it was created.
+    """
+    for _ in range(VIDEO_CREATION_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return (
+                    Video.objects.create(
+                        state=build_next_video_state(),
+                        directory=destination,
+                        baseFilename=base_name,
+                        idempotencyKey=idempotency_key,
+                    ),
+                    True,
+                )
+        except IntegrityError as error:
+            try:
+                return Video.objects.get(idempotencyKey=idempotency_key), False
+            except Video.DoesNotExist:
+                integrity_error = error
+
+    raise integrity_error
+
+
+@traced("transcode_video")
 def transcode_video(
-    file_path: str, destination: str, domain: str, base_name: str = None
+    file_path: str,
+    destination: str,
+    domain: str,
+    base_name: str = None,
+    idempotency_key: str = None,
 ):
     """
     Transcodes a video file to a specified destination.
 
+    Transcoding requests are idempotent: when a video has already been created for
+    the same idempotency key, it is returned and nothing is transcoded again. Its
+    transcoding jobs can be listed with `Video.get_in_flight_runner_jobs`. The key
+    of a video whose transcoding failed is released, so the request can be
+    submitted again.
+
     Parameters:
         file_path (str): The path to the video file.
         destination (str): The destination directory for the transcoded video.
         domain (str): The domain name used to construct the download URL for peerTube runners.
         base_name (str, optional): The base name for the transcoded video.
+        idempotency_key (str, optional): The key identifying the request, defaults to
+            a hash of the file path, its version (ETag or size) and the destination.
 
     Returns:
         Video: The transcoded video object.
@@ -66,12 +153,23 @@ def transcode_video(
     if not video_storage.exists(file_path):
         raise VideoNotFoundError("Video file does not exist.")
 
-    video = Video.objects.create(
-        state=build_next_video_state(),
-        directory=destination,
-        baseFilename=base_name,
-    )
-
-    _process_transcoding(video=video, video_path=file_path, domain=domain)
+    if idempotency_key is None:
+        idempotency_key = build_idempotency_key(file_path, destination)
+
+    video, created = _create_video(destination, base_name, idempotency_key)
+    if not created:
+        logger.info(
+            "Video %s already created for %s, not transcoding it again.",
+            video.uuid,
+            file_path,
+        )
+        return video
+
+    try:
+        _process_transcoding(video=video, video_path=file_path, domain=domain)
+    except Exception:
+        # Let the request be submitted again
+        Video.objects.filter(pk=video.pk).update(idempotencyKey=None)
+        raise
 
     return video
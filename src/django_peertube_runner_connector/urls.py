@@ -1,16 +1,25 @@
 """django-peertube-runner-connector URL configuration"""
 
-from django.urls import include, re_path
+from django.urls import include, path, re_path
 
 from rest_framework import routers
 
-from django_peertube_runner_connector.views import RunnerJobViewSet, RunnerViewSet
+from django_peertube_runner_connector.views import (
+    RunnerJobViewSet,
+    RunnerStatsViewSet,
+    RunnerViewSet,
+    VideoViewSet,
+    metrics_view,
+)
 
 
 router = routers.DefaultRouter(trailing_slash=False)
 router.register(r"runners/jobs", RunnerJobViewSet, basename="runner-jobs")
+router.register(r"runners/stats", RunnerStatsViewSet, basename="runner-stats")
 router.register(r"runners", RunnerViewSet)
+router.register(r"videos", VideoViewSet)
 
 urlpatterns = [
     re_path(r"api/v1/", include(router.urls)),
+    path("metrics", metrics_view, name="runner-connector-metrics"),
 ]
@@ -0,0 +1,175 @@
+"""Estimation of the time left before the transcoding of a video is done."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerStats,
+    Video,
+)
+from django_peertube_runner_connector.utils.metrics import get_gauges
+from django_peertube_runner_connector.utils.progress import get_live_progress
+from django_peertube_runner_connector.utils.runner_stats import get_job_resolution
+
+
+DEFAULT_ETA_CACHE_TIMEOUT = 10  # seconds
+# Seconds of video encoded per second when no job of the type was completed yet
+DEFAULT_ENCODE_SPEED = 1.0
+HISTORY_CACHE_TIMEOUT = 5 * 60  # seconds
+ETA_KEY_PREFIX = "django_peertube_runner_connector:eta"
+HISTORY_KEY = f"{ETA_KEY_PREFIX}:history"
+
+
+def get_eta_cache_timeout():
+    """Return the seconds an estimation is cached for."""
+    return getattr(settings, "TRANSCODING_ETA_CACHE_TIMEOUT", DEFAULT_ETA_CACHE_TIMEOUT)
+
+
+def get_history():
+    """
+    Return the encode speeds per job type and resolution and the mean job duration.
+
+    They are computed from the runner stats of all the runners and cached, the
+    history changes slowly compared to the queue.
+    """
+    if (history := cache.get(HISTORY_KEY)) is not None:
+        return history
+
+    totals = RunnerStats.objects.aggregate(
+        completedJobs=Sum("completedJobs"), processingSeconds=Sum("processingSeconds")
+    )
+    history = {
+        "speeds": RunnerStats.objects.get_encode_speeds(),
+        "mean_job_seconds": (
+            totals["processingSeconds"] / totals["completedJobs"]
+            if totals["completedJobs"]
+            else None
+        ),
+    }
+    cache.set(HISTORY_KEY, history, HISTORY_CACHE_TIMEOUT)
+    return history
+
+
+def get_encode_seconds(runner_job: RunnerJob, duration: float, speeds: dict):
+    """Return the expected wall time to encode the video of a job."""
+    speed = speeds.get((runner_job.type, get_job_resolution(runner_job))) or getattr(
+        settings, "TRANSCODING_ETA_DEFAULT_ENCODE_SPEED", DEFAULT_ENCODE_SPEED
+    )
+    return duration / speed
+
+
+def get_remaining_seconds(runner_job: RunnerJob, encode_seconds: float, now):
+    """
+    Return the expected wall time left to a processing job.
+
+    Once the runner sent a progress, the time left is extrapolated from the
+    elapsed time, otherwise it is the expected encode time not elapsed yet.
+    """
+    elapsed = (
+        (now - runner_job.startedAt).total_seconds() if runner_job.startedAt else 0
+    )
+    progress = get_live_progress(runner_job)
+    if progress and elapsed:
+        return elapsed * (100 - min(progress, 100)) / progress
+    return max(encode_seconds - elapsed, 0)
+
+
+def get_queue_position(runner_jobs: list[RunnerJob]):
+    """Return the number of pending jobs offered before the pending jobs given."""
+    ranks = [
+        job.schedulingRank for job in runner_jobs if job.state == RunnerJobState.PENDING
+    ]
+    if not ranks:
+        return None
+    return RunnerJob.objects.filter(
+        state=RunnerJobState.PENDING, schedulingRank__lt=min(ranks)
+    ).count()
+
+
+def estimate_video(video: Video):
+    """
+    Estimate the seconds left before the in-flight jobs of a video are completed.
+
+    The jobs depending on another one start when it ends, the others in
+    parallel:
+    - a job whose results are being stored is considered done;
+    - a processing job ends when its progress extrapolated from its elapsed time
+      reaches 100%;
+    - a pending job waits for the jobs offered before it to be processed by the
+      active runners, then takes the expected encode time of its type and
+      resolution;
+    - a job waiting for its parent takes its encode time after the parent ends.
+    """
+    now = timezone.now()
+    runner_jobs = list(
+        video.get_in_flight_runner_jobs().defer("privatePayload").order_by("createdAt")
+    )
+    queue_position = get_queue_position(runner_jobs)
+    if not runner_jobs:
+        return {"estimatedSeconds": 0, "queuePosition": None, "inFlightJobs": 0}
+
+    history = get_history()
+    wait_seconds = 0
+    if queue_position:
+        wait_seconds = (
+            queue_position
+            * (history["mean_job_seconds"] or video.duration or 0)
+            / max(get_gauges()["active_runners"], 1)
+        )
+
+    end_seconds = {}
+    for runner_job in runner_jobs:
+        encode_seconds = get_encode_seconds(
+            runner_job, video.duration or 0, history["speeds"]
+        )
+        if runner_job.state == RunnerJobState.COMPLETING:
+            end_seconds[runner_job.id] = 0
+        elif runner_job.state == RunnerJobState.PROCESSING:
+            end_seconds[runner_job.id] = get_remaining_seconds(
+                runner_job, encode_seconds, now
+            )
+        elif runner_job.state == RunnerJobState.PENDING:
+            end_seconds[runner_job.id] = wait_seconds + encode_seconds
+        else:
+            end_seconds[runner_job.id] = (
+                end_seconds.get(runner_job.dependsOnRunnerJob_id, wait_seconds)
+                + encode_seconds
+            )
+
+    return {
+        "estimatedSeconds": round(max(end_seconds.values())),
+        "queuePosition": queue_position,
+        "inFlightJobs": len(runner_jobs),
+    }
+
+
+def get_video_eta(video: Video):
+    """
+    Return the estimated seconds and date at which the transcoding of a video ends.
+
+    The estimation is cached for `TRANSCODING_ETA_CACHE_TIMEOUT` seconds, so a
+    status page polled by many viewers costs a few queries per period only.
+    """
+    key = f"{ETA_KEY_PREFIX}:{video.uuid}"
+    if (eta := cache.get(key)) is None:
+        eta = estimate_video(video)
+        eta["estimatedAt"] = timezone.now() + timedelta(
+            seconds=eta.pop("estimatedSeconds")
+        )
+        cache.set(key, eta, get_eta_cache_timeout())
+
+    return {
+        "videoUUID": str(video.uuid),
+        "estimatedSeconds": max(
+            round((eta["estimatedAt"] - timezone.now()).total_seconds()), 0
+        ),
+        **eta,
+    }
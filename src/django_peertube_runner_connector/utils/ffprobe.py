@@ -5,11 +5,19 @@ import logging
 import ffmpeg
 
 from ..models import VideoResolution
+from .media_cache import get_media_input
+from .tracing import traced
 
 
 logger = logging.getLogger(__name__)
 
 
+@traced("ffprobe")
+def probe_stored_file(filename: str):
+    """Probe a file of the video storage, through the media cache if enabled."""
+    return ffmpeg.probe(get_media_input(filename))
+
+
 def get_video_stream_duration(path: str, existing_probe=None):
     """Return the duration of a video stream."""
     metadata = existing_probe or ffmpeg.probe(path)
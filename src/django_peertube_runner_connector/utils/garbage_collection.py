@@ -0,0 +1,191 @@
+"""Garbage collection of the files left behind in the video storage."""
+
+from datetime import timedelta
+import logging
+import posixpath
+
+from django.db.models import Q
+from django.utils import timezone
+
+from django_peertube_runner_connector.models import (
+    Video,
+    VideoFile,
+    VideoStreamingPlaylist,
+)
+from django_peertube_runner_connector.storage import (
+    delete_stored_files,
+    list_stored_files,
+    video_storage,
+)
+from django_peertube_runner_connector.utils.files import (
+    get_hls_resolution_playlist_filename,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ORPHAN_GRACE_PERIOD = timedelta(days=1)
+DEFAULT_ORPHAN_BATCH_SIZE = 100
+# Maximum number of filenames checked against the database by a single query
+REFERENCE_CHECK_SIZE = 1000
+
+
+def get_referenced_files(video: Video):
+    """Return the set of the stored files a video references."""
+    referenced_files = {video.thumbnailFilename, video.transcriptFileName}
+
+    for video_file in video.files.all():
+        referenced_files.add(video_file.filename)
+        if video_file.streamingPlaylist_id:
+            referenced_files.add(
+                get_hls_resolution_playlist_filename(video_file.filename)
+            )
+
+    if playlist := getattr(video, "streamingPlaylist", None):
+        referenced_files.add(playlist.playlistFilename)
+
+    referenced_files.discard(None)
+    return referenced_files
+
+
+def find_orphan_files(video: Video, grace_period=DEFAULT_ORPHAN_GRACE_PERIOD):
+    """
+    Return the name and size of the files of a video directory no row references.
+
+    Files modified during the grace period are kept: they may belong to a job
+    being completed.
+    """
+    referenced_files = get_referenced_files(video)
+    deadline = timezone.now() - grace_period
+
+    return [
+        (name, size)
+        for name, size, modified_time in list_stored_files(video.directory)
+        if name not in referenced_files and modified_time < deadline
+    ]
+
+
+def filter_unreferenced_files(files):
+    """Return the name and size of the given files no row references."""
+    unreferenced_files = []
+    for start in range(0, len(files), REFERENCE_CHECK_SIZE):
+        batch = files[start : start + REFERENCE_CHECK_SIZE]
+        names = [name for name, _ in batch]
+        referenced_files = {
+            *VideoFile.objects.filter(filename__in=names).values_list(
+                "filename", flat=True
+            ),
+            *VideoStreamingPlaylist.objects.filter(
+                playlistFilename__in=names
+            ).values_list("playlistFilename", flat=True),
+            *Video.objects.filter(thumbnailFilename__in=names).values_list(
+                "thumbnailFilename", flat=True
+            ),
+            *Video.objects.filter(transcriptFileName__in=names).values_list(
+                "transcriptFileName", flat=True
+            ),
+        }
+        unreferenced_files.extend(
+            (name, size) for name, size in batch if name not in referenced_files
+        )
+    return unreferenced_files
+
+
+def _list_files_outside_videos(prefix, deadline):
+    """List the files of a prefix, older than the deadline, outside of the videos."""
+    try:
+        directories, filenames = video_storage.listdir(prefix)
+    except FileNotFoundError:
+        return []
+
+    files = []
+    for filename in filenames:
+        name = posixpath.join(prefix, filename)
+        if video_storage.get_modified_time(name) < deadline:
+            files.append((name, video_storage.size(name)))
+
+    for directory in directories:
+        path = posixpath.join(prefix, directory)
+        videos = Video.objects.filter(
+            Q(directory=path) | Q(directory__startswith=f"{path}/")
+        )
+        if not videos.exists():
+            files.extend(
+                (name, size)
+                for name, size, modified_time in list_stored_files(path)
+                if modified_time < deadline
+            )
+        elif not videos.filter(directory__in=[path, f"{path}/"]).exists():
+            files.extend(_list_files_outside_videos(path, deadline))
+
+    return files
+
+
+def find_files_outside_videos(prefix, grace_period=DEFAULT_ORPHAN_GRACE_PERIOD):
+    """
+    Return the name and size of the files of a prefix outside of any video directory.
+
+    They are left by the deleted videos or by the uploads never transcoded. The
+    prefix is walked down to the directories holding video directories only, it
+    is required so the other data sharing the storage is never swept. Like in
+    the video directories, the files modified during the grace period and the
+    files referenced by a row are kept.
+    """
+    prefix = prefix.strip("/")
+    if not prefix:
+        raise ValueError("A prefix is required to sweep the files outside videos.")
+
+    return filter_unreferenced_files(
+        _list_files_outside_videos(prefix, timezone.now() - grace_period)
+    )
+
+
+def collect_orphan_files(
+    grace_period=DEFAULT_ORPHAN_GRACE_PERIOD,
+    batch_size=DEFAULT_ORPHAN_BATCH_SIZE,
+    start_after=None,
+    dry_run=False,
+    outside_videos_prefix=None,
+):
+    """
+    Find and delete the orphan files of every video directory, batch by batch.
+
+    Videos are walked in primary key order, starting after the `start_after`
+    video id to resume a previous collection. For each batch of videos, the
+    orphan files are deleted at once and the last video id of the batch is yielded
+    with the orphan files found, so the caller can report the progress. When an
+    `outside_videos_prefix` is given, the files of the prefix outside of any video
+    directory are deleted last, and yielded without video id.
+    """
+    videos = (
+        Video.objects.order_by("id")
+        .select_related("streamingPlaylist")
+        .prefetch_related("files")
+    )
+    last_video_id = start_after
+
+    while True:
+        page = videos.filter(id__gt=last_video_id) if last_video_id else videos
+        batch = list(page[:batch_size])
+        if not batch:
+            break
+
+        orphan_files = []
+        for video in batch:
+            orphan_files.extend(find_orphan_files(video, grace_period))
+
+        if orphan_files and not dry_run:
+            delete_stored_files([name for name, _ in orphan_files])
+            logger.info("%d orphan files deleted.", len(orphan_files))
+
+        last_video_id = batch[-1].id
+        yield last_video_id, orphan_files
+
+    if outside_videos_prefix is None:
+        return
+
+    orphan_files = find_files_outside_videos(outside_videos_prefix, grace_period)
+    if orphan_files and not dry_run:
+        delete_stored_files([name for name, _ in orphan_files])
+        logger.info("%d files outside of the videos deleted.", len(orphan_files))
+    yield None, orphan_files
@@ -0,0 +1,118 @@
+"""Archival of the finished runner jobs and retention of the archives."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from django_peertube_runner_connector.models import (
+    FINISHED_RUNNER_JOB_STATES,
+    RunnerJob,
+    RunnerJobArchive,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_AFTER = 30  # days
+DEFAULT_ARCHIVE_RETENTION = 0  # days, archives are kept forever
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+
+
+def get_archive_after():
+    """Return the age from which the finished jobs are archived."""
+    return timedelta(
+        days=getattr(
+            settings, "TRANSCODING_RUNNER_JOB_ARCHIVE_AFTER", DEFAULT_ARCHIVE_AFTER
+        )
+    )
+
+
+def get_archive_retention():
+    """Return the age from which the archived jobs are deleted, if any."""
+    days = getattr(
+        settings, "TRANSCODING_RUNNER_JOB_ARCHIVE_RETENTION", DEFAULT_ARCHIVE_RETENTION
+    )
+    return timedelta(days=days) if days else None
+
+
+def get_archivable_jobs(older_than: timedelta | None = None):
+    """
+    Filter the jobs finished for longer than `older_than` no other job depends on.
+
+    A job depending on another one is archived first, its parent becomes
+    archivable afterward.
+    """
+    if older_than is None:
+        older_than = get_archive_after()
+
+    return RunnerJob.objects.filter(
+        state__in=FINISHED_RUNNER_JOB_STATES,
+        finishedAt__lt=timezone.now() - older_than,
+        children__isnull=True,
+    )
+
+
+def archive_runner_jobs(
+    older_than: timedelta | None = None,
+    batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE,
+    throttle: float = 0,
+):
+    """
+    Move the archivable jobs to the archive table, batch by batch.
+
+    Each batch is copied and deleted in its own transaction, and the number of
+    jobs archived is yielded. `throttle` seconds are waited between two batches
+    to spread the load on the database.
+    """
+    archivable_jobs = get_archivable_jobs(older_than).order_by("finishedAt")
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                archivable_jobs.select_for_update(skip_locked=True, of=("self",))[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                return
+
+            RunnerJobArchive.objects.bulk_create(
+                [RunnerJobArchive.from_runner_job(job) for job in batch],
+                ignore_conflicts=True,
+            )
+            RunnerJob.objects.filter(pk__in=[job.pk for job in batch]).delete()
+
+        logger.info("%d runner jobs archived.", len(batch))
+        yield len(batch)
+
+        if throttle:
+            time.sleep(throttle)
+
+
+def purge_archived_jobs(
+    retention: timedelta | None = None,
+    batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE,
+):
+    """
+    Delete the archived jobs finished for longer than the retention, batch by batch.
+
+    Nothing is deleted when no retention is given nor configured. The number of
+    archives deleted is yielded for each batch.
+    """
+    if retention is None and (retention := get_archive_retention()) is None:
+        return
+
+    expired_archives = RunnerJobArchive.objects.filter(
+        finishedAt__lt=timezone.now() - retention
+    )
+
+    while ids := list(expired_archives.values_list("pk", flat=True)[:batch_size]):
+        deleted, _ = RunnerJobArchive.objects.filter(pk__in=ids).delete()
+        logger.info("%d archived runner jobs deleted.", deleted)
+        yield deleted
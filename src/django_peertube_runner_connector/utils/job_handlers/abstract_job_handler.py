@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 import logging
+import time
 from uuid import UUID
 
 from django.conf import settings
@@ -12,11 +13,36 @@ from django.utils import timezone
 from asgiref.sync import async_to_sync
 
 from django_peertube_runner_connector.models import (
+    FINISHED_RUNNER_JOB_STATES,
     RunnerJob,
     RunnerJobState,
     RunnerJobType,
 )
 from django_peertube_runner_connector.socket import send_available_jobs_ping_to_runners
+from django_peertube_runner_connector.utils.leases import should_renew_lease
+from django_peertube_runner_connector.utils.metrics import (
+    ABORTS,
+    COMPLETION,
+    EXECUTION,
+    FAILURES,
+    increment_counter,
+    observe_duration,
+)
+from django_peertube_runner_connector.utils.progress import (
+    set_live_progress,
+    should_persist_progress,
+)
+from django_peertube_runner_connector.utils.runner_stats import (
+    record_aborted_job,
+    record_completed_job,
+    record_failed_job,
+)
+from django_peertube_runner_connector.utils.scheduling import get_retry_delay
+from django_peertube_runner_connector.utils.tracing import (
+    TRACE_CONTEXT_KEY,
+    get_trace_context,
+    start_span,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -43,24 +69,36 @@ class AbstractJobHandler(ABC):
         priority: int,
         depends_on_runner_job: RunnerJob | None,
     ):
-        """This method creates a RunnerJob and send a ping to the runners."""
-        runner_job = RunnerJob.objects.create(
-            type=job_type,
-            domain=domain,
-            payload=payload,
-            privatePayload=private_payload,
-            uuid=job_uuid,
-            state=(
-                RunnerJobState.WAITING_FOR_PARENT_JOB
-                if depends_on_runner_job
-                else RunnerJobState.PENDING
-            ),
-            dependsOnRunnerJob=depends_on_runner_job,
-            priority=priority,
-        )
+        """
+        This method creates a RunnerJob and send a ping to the runners.
+
+        When tracing, the trace context is kept in the private payload of the job
+        for the spans of its runner requests to join the trace of its creation.
+        """
+        with start_span(
+            "create_runner_job",
+            {"runner_job.uuid": job_uuid, "runner_job.type": job_type},
+        ):
+            if trace_context := get_trace_context():
+                private_payload = {**private_payload, TRACE_CONTEXT_KEY: trace_context}
+
+            runner_job = RunnerJob.objects.create(
+                type=job_type,
+                domain=domain,
+                payload=payload,
+                privatePayload=private_payload,
+                uuid=job_uuid,
+                state=(
+                    RunnerJobState.WAITING_FOR_PARENT_JOB
+                    if depends_on_runner_job
+                    else RunnerJobState.PENDING
+                ),
+                dependsOnRunnerJob=depends_on_runner_job,
+                priority=priority,
+            )
 
         if runner_job.state == RunnerJobState.PENDING:
-            async_to_sync(send_available_jobs_ping_to_runners)()
+            async_to_sync(send_available_jobs_ping_to_runners)([runner_job.type])
 
         return runner_job
 
@@ -78,13 +116,37 @@ class AbstractJobHandler(ABC):
         progress: int | None = None,
         update_payload=None,
     ):
-        """This method updates a RunnerJob progress."""
+        """
+        This method updates a RunnerJob progress.
+
+        The progress is stored in the cache on each update, and saved only when
+        it changed significantly or was not saved for a while. The lease of the
+        runner is then renewed with a conditional update, as well as when less
+        than half of it is left, it is only checked in memory otherwise. Nothing
+        else is done if it expired or was reclaimed in the meantime.
+        Return whether the job is still leased.
+        """
+        if progress is not None:
+            progress = float(progress)
+
+        changed_fields = []
+        if should_persist_progress(runner_job, progress):
+            if progress is not None:
+                runner_job.progress = progress
+            changed_fields.append("progress")
+
+        if changed_fields or should_renew_lease(runner_job):
+            leased = runner_job.renew_lease(*changed_fields)
+        else:
+            leased = runner_job.is_leased(runner_job.processingJobToken)
+        if not leased:
+            return False
+
         self.specific_update(runner_job, update_payload)
 
         if progress is not None:
-            runner_job.progress = progress
-
-        runner_job.save()
+            set_live_progress(runner_job, progress)
+        return True
 
     @abstractmethod
     def specific_complete(self, runner_job: RunnerJob, result_payload):
@@ -94,30 +156,55 @@ class AbstractJobHandler(ABC):
         """
         This method will set the job to completed state
         and update its dependant to be put them in the pending state.
+        The job may already be set completing when its runner released its lease.
         """
-        runner_job.state = RunnerJobState.COMPLETING
-        runner_job.save()
+        if runner_job.state != RunnerJobState.COMPLETING:
+            runner_job.state = RunnerJobState.COMPLETING
+            runner_job.save(update_fields=["state", "updatedAt"])
 
+        start = time.perf_counter()
         try:
-            self.specific_complete(runner_job, result_payload)
+            with start_span("specific_complete"):
+                self.specific_complete(runner_job, result_payload)
             runner_job.state = RunnerJobState.COMPLETED
         except Exception as err:  # pylint: disable=broad-except
             runner_job.state = RunnerJobState.ERRORED
             runner_job.error = str(err)
+        observe_duration(COMPLETION, runner_job.type, time.perf_counter() - start)
 
         runner_job.progress = None
         runner_job.finishedAt = timezone.now()
+        if runner_job.startedAt:
+            observe_duration(
+                EXECUTION, runner_job.type, runner_job.finishedAt - runner_job.startedAt
+            )
 
-        runner_job.save()
+        runner_job.save(
+            update_fields=["state", "error", "progress", "finishedAt", "updatedAt"]
+        )
+        if runner_job.state == RunnerJobState.COMPLETED:
+            record_completed_job(runner_job)
 
         affected_count = runner_job.update_dependant_jobs()
         if affected_count != 0:
-            async_to_sync(send_available_jobs_ping_to_runners)()
+            async_to_sync(send_available_jobs_ping_to_runners)(
+                list(runner_job.children.values_list("type", flat=True).distinct())
+            )
 
     @abstractmethod
     def specific_cancel(self, runner_job: RunnerJob):
         """This method should be implemented by subclasses."""
 
+    def specific_bulk_cancel(self, runner_jobs: list[RunnerJob]):
+        """
+        Run the cancel side effects of several jobs of a cancelled tree.
+
+        Handlers can override it to group the side effects, it runs the specific
+        cancel of each job by default.
+        """
+        for runner_job in runner_jobs:
+            self.specific_cancel(runner_job)
+
     def cancel(self, runner_job: RunnerJob, from_parent: bool = False):
         """This method will set the job and its dependant to a cancelled state."""
         self.specific_cancel(runner_job)
@@ -127,11 +214,49 @@ class AbstractJobHandler(ABC):
         )
         runner_job.set_to_error_or_cancel(cancel_state)
 
-        runner_job.save()
+        descendants = self.propagate_to_descendants(
+            runner_job, RunnerJobState.PARENT_CANCELLED
+        )
+        if descendants:
+            self.specific_bulk_cancel(descendants)
 
-        children = runner_job.children.all()
-        for child in children:
-            self.cancel(child, from_parent=True)
+    def propagate_to_descendants(
+        self, runner_job: RunnerJob, state: RunnerJobState, error: str | None = None
+    ):
+        """
+        Set all the unfinished jobs depending on a job to a parent error or cancel state.
+
+        The descendants are fetched with a single recursive query and updated with
+        a single statement. Return the updated jobs so their side effects can be
+        run at once.
+        """
+        descendants = list(
+            RunnerJob.objects.descendants_of(runner_job)
+            .exclude(state__in=FINISHED_RUNNER_JOB_STATES)
+            .only("id", "uuid", "type", "state", "privatePayload")
+        )
+        if not descendants:
+            return []
+
+        now = timezone.now()
+        RunnerJob.objects.filter(id__in=[job.id for job in descendants]).update(
+            state=state,
+            processingJobToken=None,
+            leaseExpiresAt=None,
+            finishedAt=now,
+            updatedAt=now,
+            **({"error": error} if error is not None else {}),
+        )
+        for descendant in descendants:
+            descendant.state = state
+
+        logger.info(
+            "%d jobs depending on %s set to state %s.",
+            len(descendants),
+            runner_job.uuid,
+            RunnerJobState(state).label,
+        )
+        return descendants
 
     @abstractmethod
     def is_abort_supported(self):
@@ -149,18 +274,32 @@ class AbstractJobHandler(ABC):
             )
             return
 
+        increment_counter(ABORTS, runner_job.type)
+        record_aborted_job(runner_job)
         self.specific_abort(runner_job)
-        runner_job.reset_to_pending()
-        runner_job.save()
+        runner_job.reset_to_pending("failures")
 
     @abstractmethod
     def specific_abort(self, runner_job: RunnerJob):
         """This method should be implemented by subclasses."""
 
+    def specific_bulk_error(
+        self, runner_jobs: list[RunnerJob], message: str, next_state: RunnerJobState
+    ):
+        """
+        Run the error side effects of several jobs of an errored tree.
+
+        Handlers can override it to group the side effects, it runs the specific
+        error of each job by default.
+        """
+        for runner_job in runner_jobs:
+            self.specific_error(runner_job, message, next_state)
+
     def error(self, runner_job: RunnerJob, message: str, from_parent: bool = False):
         """
-        This method try to reset the job to the pending state.
-        If the job has failed too many times, it will be set to errored.
+        This method try to reset the job to the pending state, retried after an
+        exponential backoff. If the job has failed too many times, it will be set
+        to errored and the jobs depending on it to parent errored.
         """
         error_state = (
             RunnerJobState.PARENT_ERRORED if from_parent else RunnerJobState.ERRORED
@@ -172,20 +311,31 @@ class AbstractJobHandler(ABC):
             else RunnerJobState.PENDING
         )
 
+        if not from_parent:
+            increment_counter(FAILURES, runner_job.type)
+            record_failed_job(runner_job)
         self.specific_error(runner_job, message, next_state)
 
-        if next_state == error_state:
-            runner_job.set_to_error_or_cancel(error_state)
-            runner_job.error = message
-        else:
-            runner_job.reset_to_pending()
+        if next_state != error_state:
+            # The runners are pinged for the job by the stale job reaper, once
+            # its backoff elapsed
+            runner_job.notBefore = timezone.now() + get_retry_delay(
+                runner_job.type, runner_job.failures
+            )
+            runner_job.reset_to_pending("failures", "notBefore")
+            return
 
-        runner_job.save()
+        runner_job.error = message
+        runner_job.set_to_error_or_cancel(error_state, "error", "failures")
 
-        if runner_job.state == error_state:
-            children = runner_job.children.all()
-            for child in children:
-                self.error(child, "Parent error", from_parent=True)
+        message = "Parent error"
+        descendants = self.propagate_to_descendants(
+            runner_job, RunnerJobState.PARENT_ERRORED, error=message
+        )
+        if descendants:
+            self.specific_bulk_error(
+                descendants, message, RunnerJobState.PARENT_ERRORED
+            )
 
     @abstractmethod
     def specific_error(
@@ -8,7 +8,10 @@ from django_peertube_runner_connector.models import RunnerJob, RunnerJobState
 from django_peertube_runner_connector.utils.job_handlers.abstract_job_handler import (
     AbstractJobHandler,
 )
-from django_peertube_runner_connector.utils.job_handlers.utils import load_runner_video
+from django_peertube_runner_connector.utils.job_handlers.utils import (
+    load_runner_video,
+    load_runner_videos,
+)
 from django_peertube_runner_connector.utils.video_state import (
     move_to_failed_transcoding_state,
     move_to_next_state,
@@ -56,7 +59,16 @@ class AbstractVODTranscodingJobHandler(AbstractJobHandler):
         if not video:
             return
 
-        pending = video.decrease_job_info("pendingTranscode")
+        self._on_jobs_cancelled(video, 1)
+
+    def specific_bulk_cancel(self, runner_jobs):
+        """Decrease the video job info once per video of the cancelled jobs."""
+        for video, count in load_runner_videos(runner_jobs):
+            self._on_jobs_cancelled(video, count)
+
+    def _on_jobs_cancelled(self, video, count):
+        """Decrease the video job info and move the video if nothing is pending."""
+        pending = video.decrease_job_info("pendingTranscode", count)
 
         logger.debug("Pending transcode decreased to %s after cancel", pending)
 
@@ -22,6 +22,7 @@ from .abstract_job_handler import AbstractJobHandler
 from .utils import (
     is_transcription_language_valid,
     load_runner_video,
+    load_runner_videos,
     on_transcription_ended,
     on_transcription_error,
 )
@@ -67,6 +68,11 @@ class TranscriptionJobHandler(AbstractJobHandler):
 
         video.decrease_job_info(VideoJobInfoColumnType.PENDING_TRANSCRIPT)
 
+    def specific_bulk_cancel(self, runner_jobs: list[RunnerJob]):
+        """Decrease the video job info once per video of the cancelled jobs."""
+        for video, count in load_runner_videos(runner_jobs):
+            video.decrease_job_info(VideoJobInfoColumnType.PENDING_TRANSCRIPT, count)
+
     # pylint: disable=arguments-differ
     def create(self, video: Video, domain: str, video_url: str = None):
         """Create a transcription job."""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections import Counter
 import logging
 
 from django.conf import settings
@@ -29,6 +30,18 @@ def load_runner_video(runner_job: RunnerJob):
     return video
 
 
+def load_runner_videos(runner_jobs: list[RunnerJob]):
+    """
+    Get the videos of several runner jobs with a single query.
+
+    Return each video with the number of given jobs related to it.
+    """
+    job_counts = Counter(job.privatePayload["videoUUID"] for job in runner_jobs)
+    videos = Video.objects.filter(uuid__in=job_counts)
+
+    return [(video, job_counts[str(video.uuid)]) for video in videos]
+
+
 def on_transcoding_ended(video: Video, move_video_to_next_state: bool):
     """Handle transcoding ended event."""
     video.decrease_job_info("pendingTranscode")
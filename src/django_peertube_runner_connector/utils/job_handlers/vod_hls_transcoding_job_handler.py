@@ -6,10 +6,11 @@ import logging
 import os
 import uuid
 
+from django.core.files.base import ContentFile
 from django.urls import reverse
 
 from django_peertube_runner_connector.models import RunnerJob, RunnerJobType, Video
-from django_peertube_runner_connector.storage import video_storage
+from django_peertube_runner_connector.storage import StorageBatch
 from django_peertube_runner_connector.utils.files import (
     build_new_file,
     generate_hls_video_filename,
@@ -18,7 +19,7 @@ from django_peertube_runner_connector.utils.files import (
 )
 from django_peertube_runner_connector.utils.transcoding.hls_playlist import (
     on_hls_video_file_transcoding,
-    rename_video_file_in_playlist,
+    replace_video_filename_in_playlist,
 )
 
 from .abstract_vod_transcoding_job_handler import AbstractVODTranscodingJobHandler
@@ -79,33 +80,47 @@ class VODHLSTranscodingJobHandler(AbstractVODTranscodingJobHandler):
         if not video:
             return
 
-        # Saving the mp4 file in the video folder and creating the VideoFile object
-        uploaded_video_file = result_payload["video_file"]
+        # The mp4 file and its m3u8 playlist are saved in the video folder at once,
+        # under unique names chosen first because the playlist references the mp4
         resolution = runner_job.payload["output"]["resolution"]
-
-        filename = video_storage.save(
-            get_video_directory(
-                video,
-                generate_hls_video_filename(resolution, video.baseFilename),
-            ),
-            uploaded_video_file,
+        basename = (
+            f"{video.baseFilename}-{uuid.uuid4().hex}" if video.baseFilename else None
         )
-
-        video_file = build_new_file(video=video, filename=filename)
-
-        # Saving the associated m3u8 file
-        resolution_playlist_file = result_payload["resolution_playlist_file"]
-        resolution_playlist_filename = video_storage.save(
-            get_hls_resolution_playlist_filename(video_file.filename),
-            resolution_playlist_file,
+        video_filename = get_video_directory(
+            video, generate_hls_video_filename(resolution, basename)
+        )
+        resolution_playlist_filename = get_hls_resolution_playlist_filename(
+            video_filename
         )
 
         # The content of the m3u8 file is not correct, we need to replace the video filename
         # because we gave it a new name
-        rename_video_file_in_playlist(
-            resolution_playlist_filename, os.path.basename(video_file.filename)
+        resolution_playlist_content = replace_video_filename_in_playlist(
+            result_payload["resolution_playlist_file"].read().decode(),
+            os.path.basename(video_filename),
         )
 
+        with StorageBatch() as batch:
+            video_filename_future = batch.save(
+                video_filename, result_payload["video_file"]
+            )
+            resolution_playlist_filename_future = batch.save(
+                resolution_playlist_filename,
+                ContentFile(resolution_playlist_content.encode()),
+            )
+
+        # The playlists would reference missing files if the storage renamed them
+        if (
+            video_filename_future.result() != video_filename
+            or resolution_playlist_filename_future.result()
+            != resolution_playlist_filename
+        ):
+            raise ValueError(
+                f"The files of the job {runner_job.uuid} were saved under other names."
+            )
+
+        video_file = build_new_file(video=video, filename=video_filename)
+
         on_hls_video_file_transcoding(
             video=video,
             video_file=video_file,
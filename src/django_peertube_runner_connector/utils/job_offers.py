@@ -0,0 +1,180 @@
+"""Offers of the pending jobs pushed to the idle runners over SocketIO."""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from datetime import timedelta
+import logging
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from django_peertube_runner_connector.models import RunnerJob, RunnerJobState
+from django_peertube_runner_connector.serializers import SimpleRunnerJobSerializer
+from django_peertube_runner_connector.utils.leases import get_lease_duration
+from django_peertube_runner_connector.utils.metrics import QUEUE_WAIT, observe_duration
+from django_peertube_runner_connector.utils.scheduling import get_domain_max_concurrency
+from django_peertube_runner_connector.utils.tracing import start_job_span
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_OFFER_TIMEOUT = 15  # seconds
+
+
+def is_push_dispatch_enabled():
+    """Return whether the pending jobs are offered to the idle runners."""
+    return getattr(settings, "TRANSCODING_PUSH_DISPATCH", False)
+
+
+def get_job_offer_timeout():
+    """Return the seconds a runner has to accept a job offered to it."""
+    return getattr(settings, "TRANSCODING_JOB_OFFER_TIMEOUT", DEFAULT_JOB_OFFER_TIMEOUT)
+
+
+def reserve_job_offers(offer_runners: dict[str, list[str]]):
+    """
+    Reserve a pending job for each idle runner accepting offers.
+
+    `offer_runners` maps the ids of the connected runners accepting offers to the
+    job types they process, all of them when empty. A runner is idle when it is
+    not processing a job and has no offer pending. Each job is reserved with a
+    conditional update, so a job accepted through the API in the meantime is
+    left to its runner. The offers count against the concurrency cap of the
+    domain of their job, the reservation is rolled back when it exceeds the cap.
+    Return the runner ids with the data of their offer.
+    """
+    now = timezone.now()
+    busy_runner_ids = {
+        str(runner_id)
+        for runner_id in RunnerJob.objects.filter(runner_id__in=offer_runners)
+        .filter(
+            Q(state=RunnerJobState.PROCESSING)
+            | Q(state=RunnerJobState.PENDING, offerExpiresAt__gt=now)
+        )
+        .values_list("runner_id", flat=True)
+    }
+    expires_at = now + timedelta(seconds=get_job_offer_timeout())
+    max_concurrency = get_domain_max_concurrency()
+
+    offers = []
+    offered_job_ids = set()
+    for runner_id, job_types in offer_runners.items():
+        if runner_id in busy_runner_ids:
+            continue
+
+        for runner_job in RunnerJob.objects.list_available_jobs(job_types).only(
+            "id", "domain", *SimpleRunnerJobSerializer.Meta.fields
+        ):
+            if runner_job.id in offered_job_ids:
+                continue
+
+            capped = runner_job.domain in max_concurrency
+            with transaction.atomic() if capped else nullcontext():
+                reserved = (
+                    RunnerJob.objects.filter(
+                        pk=runner_job.pk, state=RunnerJobState.PENDING
+                    )
+                    .exclude(offerExpiresAt__gt=now)
+                    .update(
+                        runner_id=runner_id, offerExpiresAt=expires_at, updatedAt=now
+                    )
+                )
+                if (
+                    reserved
+                    and capped
+                    and RunnerJob.objects.is_domain_over_capacity(runner_job.domain)
+                ):
+                    transaction.set_rollback(True)
+                    reserved = 0
+
+            if reserved:
+                offered_job_ids.add(runner_job.id)
+                offers.append(
+                    (
+                        runner_id,
+                        {
+                            "job": SimpleRunnerJobSerializer(runner_job).data,
+                            "offerExpiresAt": expires_at.isoformat(),
+                        },
+                    )
+                )
+                break
+
+    return offers
+
+
+def accept_job_offer(runner_id: str, job_uuid: str):
+    """
+    Attribute a job offered to a runner, if the offer did not expire.
+
+    The concurrency cap of the domain of the job is checked in the transaction
+    of the claim, which is rolled back when the cap is exceeded. Return the job,
+    or None when it is not offered to the runner anymore or its domain is
+    processing too many jobs.
+    """
+    try:
+        runner_job = (
+            RunnerJob.objects.select_related("runner", "dependsOnRunnerJob")
+            .defer("privatePayload")
+            .get(uuid=job_uuid)
+        )
+    except (RunnerJob.DoesNotExist, ValidationError):
+        return None
+
+    now = timezone.now()
+    fields = {
+        "state": RunnerJobState.PROCESSING,
+        "processingJobToken": "ptrjt-" + str(uuid4()),
+        "startedAt": now,
+        "offerExpiresAt": None,
+        "leaseExpiresAt": now + get_lease_duration(),
+        "updatedAt": now,
+    }
+    capped = runner_job.domain in get_domain_max_concurrency()
+    with start_job_span("runner_job.accept_offer", runner_job), (
+        transaction.atomic() if capped else nullcontext()
+    ):
+        updated_rows = RunnerJob.objects.filter(
+            pk=runner_job.pk,
+            state=RunnerJobState.PENDING,
+            runner_id=runner_id,
+            offerExpiresAt__gt=now,
+        ).update(**fields)
+        if (
+            updated_rows
+            and capped
+            and RunnerJob.objects.is_domain_over_capacity(runner_job.domain)
+        ):
+            transaction.set_rollback(True)
+            updated_rows = 0
+
+    if updated_rows == 0:
+        return None
+
+    for field, value in fields.items():
+        setattr(runner_job, field, value)
+    observe_duration(QUEUE_WAIT, runner_job.type, now - runner_job.createdAt)
+
+    logger.info(
+        "Remote runner %s has accepted the offer of job %s (%s)",
+        runner_job.runner.name,
+        runner_job.uuid,
+        runner_job.type,
+    )
+    return runner_job
+
+
+def release_expired_offers():
+    """Release the jobs whose offer expired, return their types."""
+    expired_offers = RunnerJob.objects.filter(
+        state=RunnerJobState.PENDING, offerExpiresAt__lte=timezone.now()
+    )
+    job_types = set(expired_offers.values_list("type", flat=True))
+    if job_types:
+        expired_offers.update(runner=None, offerExpiresAt=None)
+    return job_types
@@ -0,0 +1,36 @@
+"""Leases of the processing jobs to their runner."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+DEFAULT_RUNNER_JOB_TIMEOUT = 10 * 60  # seconds
+
+
+def get_lease_duration():
+    """
+    Return the duration of the lease of a processing job to its runner.
+
+    The lease is renewed by the updates of the runner, the stale job reaper
+    reclaims the jobs whose lease expired.
+    """
+    return timedelta(
+        seconds=getattr(
+            settings, "TRANSCODING_RUNNER_JOB_TIMEOUT", DEFAULT_RUNNER_JOB_TIMEOUT
+        )
+    )
+
+
+def should_renew_lease(runner_job):
+    """
+    Return whether the lease of a processing job should be renewed.
+
+    It is renewed once less than half of it is left, so the updates of a runner
+    between two renewals only check it in memory.
+    """
+    return (
+        runner_job.leaseExpiresAt is None
+        or runner_job.leaseExpiresAt - timezone.now() < get_lease_duration() / 2
+    )
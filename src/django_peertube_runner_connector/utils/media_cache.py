@@ -0,0 +1,173 @@
+"""Local read-through disk cache of the media files stored in the video storage."""
+
+from contextlib import contextmanager
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+
+from storages.utils import clean_name
+
+from django_peertube_runner_connector.storage import video_storage
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024  # 10 GiB
+TEMPORARY_FILE_SUFFIX = ".part"
+
+# The fill locks of this process with the number of threads holding or waiting
+# for them, keyed by cache entry
+_fill_locks = {}
+_fill_locks_lock = threading.Lock()
+
+
+def get_media_version(filename: str):
+    """
+    Return a version identifier of a file stored in the video storage.
+
+    The ETag is used on S3 like storages, otherwise the size and the modification
+    time of the file identify its version.
+    """
+    if hasattr(video_storage, "bucket"):
+        # pylint: disable=protected-access
+        s3_object = video_storage.bucket.Object(
+            video_storage._normalize_name(clean_name(filename))
+        )
+        return s3_object.e_tag.strip('"')
+
+    modified_time = video_storage.get_modified_time(filename)
+    return f"{video_storage.size(filename)}-{modified_time.timestamp()}"
+
+
+@contextmanager
+def _fill_lock(key: str):
+    """
+    Hold the lock used to fill a cache entry from this process.
+
+    The lock is forgotten once no thread holds or waits for it anymore.
+    """
+    with _fill_locks_lock:
+        lock_entry = _fill_locks.setdefault(key, [threading.Lock(), 0])
+        lock_entry[1] += 1
+    try:
+        with lock_entry[0]:
+            yield
+    finally:
+        with _fill_locks_lock:
+            lock_entry[1] -= 1
+            if not lock_entry[1]:
+                del _fill_locks[key]
+
+
+class MediaCache:
+    """
+    Bounded local disk cache of the media files stored in the video storage.
+
+    Entries are keyed by the storage filename and the version of the file, so an
+    overwritten file is never read from a stale entry. Entries are filled through
+    a temporary file atomically renamed once complete, and the least recently used
+    ones are evicted when the cache grows bigger than its maximum size.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MEDIA_CACHE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_path(self, filename: str, version: str):
+        """Return the local path of a cache entry."""
+        key = hashlib.sha256(f"{filename}:{version}".encode()).hexdigest()
+        return os.path.join(self.directory, key + os.path.splitext(filename)[1].lower())
+
+    def get(self, filename: str):
+        """Return the local path of a stored file, downloading it if needed."""
+        path = self.get_path(filename, get_media_version(filename))
+
+        with _fill_lock(path):
+            if os.path.exists(path):
+                # Mark the entry as recently used
+                os.utime(path)
+                return path
+
+            self._fill(filename, path)
+
+        self.evict(keep=path)
+        return path
+
+    def _fill(self, filename: str, path: str):
+        """Download a stored file to the cache."""
+        os.makedirs(self.directory, exist_ok=True)
+        logger.debug("Caching %s to %s.", filename, path)
+
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=TEMPORARY_FILE_SUFFIX, delete=False
+        ) as temporary_file:
+            try:
+                with video_storage.open(filename, "rb") as stored_file:
+                    shutil.copyfileobj(stored_file, temporary_file)
+            except Exception:
+                temporary_file.close()
+                os.remove(temporary_file.name)
+                raise
+
+        os.replace(temporary_file.name, path)
+
+    def evict(self, keep: str = None):
+        """Remove the least recently used entries until the cache fits its size."""
+        entries = []
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                if (
+                    entry.is_file()
+                    and entry.path != keep
+                    and not entry.name.endswith(TEMPORARY_FILE_SUFFIX)
+                ):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        if keep and os.path.exists(keep):
+            total_size += os.path.getsize(keep)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another process
+                pass
+            total_size -= size
+
+
+def get_media_cache():
+    """Return the media cache if it is enabled in the settings."""
+    directory = getattr(settings, "TRANSCODING_MEDIA_CACHE_DIR", None)
+    if not directory:
+        return None
+
+    return MediaCache(
+        directory=directory,
+        max_size=getattr(
+            settings, "TRANSCODING_MEDIA_CACHE_MAX_SIZE", DEFAULT_MEDIA_CACHE_MAX_SIZE
+        ),
+    )
+
+
+def get_media_input(filename: str):
+    """
+    Return the path ffmpeg should read a stored file from.
+
+    It is a local copy when the media cache is enabled, the storage url otherwise
+    or when the file cannot be cached.
+    """
+    if media_cache := get_media_cache():
+        try:
+            return media_cache.get(filename)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Cannot cache %s, reading it from the storage.", filename)
+
+    return video_storage.url(filename)
@@ -0,0 +1,226 @@
+"""Metrics of the jobs and the runners, in the Prometheus text format."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync
+
+from django_peertube_runner_connector.models import (
+    Runner,
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
+from django_peertube_runner_connector.socketio.presence import (
+    get_shared_presence_counts,
+    is_presence_shared,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_CACHE_TIMEOUT = 15  # seconds
+# Runners update their last contact every 5 minutes at most
+DEFAULT_ACTIVE_RUNNER_WINDOW = 10 * 60  # seconds
+METRICS_KEY_PREFIX = "django_peertube_runner_connector:metrics"
+GAUGES_KEY = f"{METRICS_KEY_PREFIX}:gauges"
+
+# Upper bounds in seconds of the buckets of the duration histograms
+DURATION_BUCKETS = (1, 5, 15, 60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 86400)
+
+QUEUE_WAIT = "peertube_runner_job_queue_wait_seconds"
+EXECUTION = "peertube_runner_job_execution_seconds"
+COMPLETION = "peertube_runner_job_completion_handler_seconds"
+FAILURES = "peertube_runner_job_failures_total"
+ABORTS = "peertube_runner_job_aborts_total"
+
+HISTOGRAMS = {
+    QUEUE_WAIT: "Seconds between the creation of a job and its acceptance by a runner.",
+    EXECUTION: "Seconds between the acceptance of a job and its completion.",
+    COMPLETION: "Seconds spent storing the results of a job on its completion.",
+}
+COUNTERS = {
+    FAILURES: "Number of errors reported for the jobs, or detected by the reaper.",
+    ABORTS: "Number of jobs aborted by their runner.",
+}
+
+
+def _increment(key: str, amount: int = 1):
+    """Increment a counter stored in the cache, without expiration."""
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, None):
+            cache.incr(key, amount)
+
+
+def _get_bucket(seconds: float):
+    """Return the upper bound of the bucket a duration falls in."""
+    return next((bound for bound in DURATION_BUCKETS if seconds <= bound), "+Inf")
+
+
+def increment_counter(name: str, job_type: str, amount: int = 1):
+    """Increment a counter of a job type."""
+    try:
+        _increment(f"{METRICS_KEY_PREFIX}:{name}:{job_type}", amount)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed to record the %s metric.", name)
+
+
+def observe_duration(name: str, job_type: str, duration: timedelta | float):
+    """
+    Record a duration in a histogram of a job type.
+
+    Only the bucket the duration falls in and the sum are incremented, in the
+    cache shared by the replicas. The buckets are cumulated when rendered.
+    """
+    seconds = duration.total_seconds() if isinstance(duration, timedelta) else duration
+    prefix = f"{METRICS_KEY_PREFIX}:{name}:{job_type}"
+    try:
+        _increment(f"{prefix}:{_get_bucket(seconds)}")
+        # The cache only increments integers, the sum is kept in milliseconds
+        _increment(f"{prefix}:sum", round(seconds * 1000))
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed to record the %s metric.", name)
+
+
+def get_presence_counts():
+    """Return the numbers of connected runners and connections, when shared."""
+    if not is_presence_shared():
+        return None
+
+    try:
+        return async_to_sync(get_shared_presence_counts)()
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed to count the connected runners.")
+        return None
+
+
+def get_gauges():
+    """
+    Return the number of jobs per state, type and domain, of active runners and
+    of runners connected to the SocketIO server.
+
+    The aggregates are cached for `TRANSCODING_METRICS_CACHE_TIMEOUT` seconds, so
+    frequent scrapes do not query the database each time.
+    """
+    if (gauges := cache.get(GAUGES_KEY)) is not None:
+        return gauges
+
+    window = getattr(
+        settings,
+        "TRANSCODING_METRICS_ACTIVE_RUNNER_WINDOW",
+        DEFAULT_ACTIVE_RUNNER_WINDOW,
+    )
+    gauges = {
+        "jobs": list(
+            RunnerJob.objects.order_by()
+            .values_list("state", "type", "domain")
+            .annotate(count=Count("id"))
+        ),
+        "active_runners": Runner.objects.filter(
+            lastContact__gte=timezone.now() - timedelta(seconds=window)
+        ).count(),
+        "presence": get_presence_counts(),
+    }
+    cache.set(
+        GAUGES_KEY,
+        gauges,
+        getattr(
+            settings,
+            "TRANSCODING_METRICS_CACHE_TIMEOUT",
+            DEFAULT_METRICS_CACHE_TIMEOUT,
+        ),
+    )
+    return gauges
+
+
+def _escape(value):
+    """Escape a label value of the Prometheus text format."""
+    return (
+        str(value or "").replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _format_labels(**labels):
+    """Format the labels of a sample."""
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _render_histogram(name: str, values: dict):
+    """Return the lines of a histogram of each job type."""
+    lines = [f"# HELP {name} {HISTOGRAMS[name]}", f"# TYPE {name} histogram"]
+    for job_type in RunnerJobType.values:
+        prefix = f"{METRICS_KEY_PREFIX}:{name}:{job_type}"
+        cumulated = 0
+        for bound in (*DURATION_BUCKETS, "+Inf"):
+            cumulated += values.get(f"{prefix}:{bound}", 0)
+            labels = _format_labels(type=job_type, le=bound)
+            lines.append(f"{name}_bucket{{{labels}}} {cumulated}")
+        labels = _format_labels(type=job_type)
+        lines.append(f"{name}_sum{{{labels}}} {values.get(f'{prefix}:sum', 0) / 1000}")
+        lines.append(f"{name}_count{{{labels}}} {cumulated}")
+    return lines
+
+
+def render_metrics():
+    """Return the metrics in the Prometheus text exposition format."""
+    gauges = get_gauges()
+    lines = [
+        "# HELP peertube_runner_jobs Number of jobs per state, type and domain.",
+        "# TYPE peertube_runner_jobs gauge",
+    ]
+    for state, job_type, domain, count in gauges["jobs"]:
+        labels = _format_labels(
+            state=RunnerJobState(state).name.lower(), type=job_type, domain=domain
+        )
+        lines.append(f"peertube_runner_jobs{{{labels}}} {count}")
+
+    lines += [
+        "# HELP peertube_runner_active_runners Number of runners in contact recently.",
+        "# TYPE peertube_runner_active_runners gauge",
+        f"peertube_runner_active_runners {gauges['active_runners']}",
+    ]
+    # The connections are only known when the presence registry is shared
+    if presence := gauges.get("presence"):
+        lines += [
+            "# HELP peertube_runner_connected_runners Number of runners connected "
+            "to the SocketIO server.",
+            "# TYPE peertube_runner_connected_runners gauge",
+            f"peertube_runner_connected_runners {presence['runners']}",
+            "# HELP peertube_runner_socket_connections Number of connections to "
+            "the SocketIO server.",
+            "# TYPE peertube_runner_socket_connections gauge",
+            f"peertube_runner_socket_connections {presence['connections']}",
+        ]
+
+    keys = [
+        f"{METRICS_KEY_PREFIX}:{name}:{job_type}"
+        for name in COUNTERS
+        for job_type in RunnerJobType.values
+    ]
+    keys += [
+        f"{METRICS_KEY_PREFIX}:{name}:{job_type}:{suffix}"
+        for name in HISTOGRAMS
+        for job_type in RunnerJobType.values
+        for suffix in (*DURATION_BUCKETS, "+Inf", "sum")
+    ]
+    values = cache.get_many(keys)
+
+    for name, description in COUNTERS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for job_type in RunnerJobType.values:
+            value = values.get(f"{METRICS_KEY_PREFIX}:{name}:{job_type}", 0)
+            lines.append(f"{name}{{{_format_labels(type=job_type)}}} {value}")
+
+    for name in HISTOGRAMS:
+        lines += _render_histogram(name, values)
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,75 @@
+"""Live progress of the processing jobs, persisted on significant changes only."""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from django_peertube_runner_connector.models import RunnerJob, RunnerJobState
+
+
+DEFAULT_PROGRESS_PERSIST_DELTA = 10  # percents
+DEFAULT_PROGRESS_PERSIST_INTERVAL = 60  # seconds
+LIVE_PROGRESS_TIMEOUT = 60 * 60  # seconds
+LIVE_PROGRESS_KEY_PREFIX = "django_peertube_runner_connector:progress"
+
+
+def get_live_progress_key(runner_job: RunnerJob):
+    """
+    Return the cache key of the live progress of a job, if it is being processed.
+
+    The key depends on the processing token, so the progress of a previous
+    attempt is not read once the job is accepted again.
+    """
+    if (
+        runner_job.state != RunnerJobState.PROCESSING
+        or not runner_job.processingJobToken
+    ):
+        return None
+    return f"{LIVE_PROGRESS_KEY_PREFIX}:{runner_job.processingJobToken}"
+
+
+def get_live_progress(runner_job: RunnerJob):
+    """Return the last progress sent by the runner, or the persisted one."""
+    if key := get_live_progress_key(runner_job):
+        live_progress = cache.get(key)
+        if live_progress is not None:
+            return live_progress
+    return runner_job.progress
+
+
+def set_live_progress(runner_job: RunnerJob, progress: float):
+    """Store the last progress sent by the runner of a job."""
+    if key := get_live_progress_key(runner_job):
+        cache.set(key, progress, LIVE_PROGRESS_TIMEOUT)
+
+
+def should_persist_progress(runner_job: RunnerJob, progress: float | None):
+    """
+    Return whether the progress of a job should be saved in the database.
+
+    It is saved when it changed by at least the persist delta, or when the job
+    was not saved for the persist interval. The interval must be shorter than
+    the runner job timeout: the lease of the runner is renewed on save.
+    """
+    interval = getattr(
+        settings,
+        "TRANSCODING_PROGRESS_PERSIST_INTERVAL",
+        DEFAULT_PROGRESS_PERSIST_INTERVAL,
+    )
+    if (
+        runner_job.updatedAt is None
+        or (timezone.now() - runner_job.updatedAt).total_seconds() >= interval
+    ):
+        return True
+
+    if progress is None:
+        return False
+    if runner_job.progress is None:
+        return True
+
+    delta = getattr(
+        settings, "TRANSCODING_PROGRESS_PERSIST_DELTA", DEFAULT_PROGRESS_PERSIST_DELTA
+    )
+    return abs(progress - runner_job.progress) >= delta
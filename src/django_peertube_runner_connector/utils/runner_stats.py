@@ -0,0 +1,82 @@
+"""Statistics of the jobs processed by each runner."""
+
+import logging
+
+from django_peertube_runner_connector.models import RunnerJob, RunnerStats, Video
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_job_resolution(runner_job: RunnerJob):
+    """
+    Return the output resolution of a job, 0 when it has no video output.
+
+    When the payload of the job is deferred, only the resolution is extracted
+    from it by the database rather than loading the whole payload.
+    """
+    if "payload" in runner_job.get_deferred_fields():
+        resolution = (
+            RunnerJob.objects.filter(pk=runner_job.pk)
+            .values_list("payload__output__resolution", flat=True)
+            .first()
+        )
+    else:
+        payload = runner_job.payload if isinstance(runner_job.payload, dict) else {}
+        resolution = (payload.get("output") or {}).get("resolution")
+    try:
+        return int(resolution or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_job_video_duration(runner_job: RunnerJob):
+    """Return the duration in seconds of the video of a job, 0 if unknown."""
+    private_payload = runner_job.privatePayload
+    if not isinstance(private_payload, dict) or not private_payload.get("videoUUID"):
+        return 0
+    duration = (
+        Video.objects.filter(uuid=private_payload["videoUUID"])
+        .values_list("duration", flat=True)
+        .first()
+    )
+    return duration or 0
+
+
+def record_runner_job(runner_job: RunnerJob, **increments):
+    """Add the increments to the stats of the runner of a job, if any."""
+    if not runner_job.runner_id:
+        return
+    try:
+        RunnerStats.objects.record(
+            runner_job.runner_id,
+            runner_job.type,
+            get_job_resolution(runner_job),
+            **increments,
+        )
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Failed to record the stats of job %s.", runner_job.uuid)
+
+
+def record_completed_job(runner_job: RunnerJob):
+    """Record the processing time and the video duration of a completed job."""
+    if not runner_job.startedAt:
+        return
+    record_runner_job(
+        runner_job,
+        completedJobs=1,
+        processingSeconds=(
+            runner_job.finishedAt - runner_job.startedAt
+        ).total_seconds(),
+        videoSeconds=get_job_video_duration(runner_job),
+    )
+
+
+def record_failed_job(runner_job: RunnerJob):
+    """Record a failure of a job."""
+    record_runner_job(runner_job, failedJobs=1)
+
+
+def record_aborted_job(runner_job: RunnerJob):
+    """Record an abort of a job."""
+    record_runner_job(runner_job, abortedJobs=1)
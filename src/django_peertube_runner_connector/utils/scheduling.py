@@ -0,0 +1,99 @@
+"""Scheduling order of the jobs offered to the runners."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import random
+
+from django.conf import settings
+
+
+# Seconds of waiting worth one priority unit
+DEFAULT_PRIORITY_AGING_INTERVAL = 60
+# Seconds between two queued jobs of a domain of weight 1
+DEFAULT_FAIR_SHARE_QUANTUM = 60
+DEFAULT_DOMAIN_WEIGHT = 1
+# Seconds before a failed job is retried the first time, doubled on each failure
+DEFAULT_RETRY_BACKOFF_DELAY = 30
+DEFAULT_RETRY_BACKOFF_MAX_DELAY = 60 * 60
+
+
+def get_priority_aging_interval(job_type: str):
+    """Return the seconds of waiting worth one priority unit for a job type."""
+    intervals = getattr(settings, "TRANSCODING_PRIORITY_AGING_INTERVALS", {})
+    return intervals.get(job_type, DEFAULT_PRIORITY_AGING_INTERVAL)
+
+
+def get_domain_weight(domain: str | None):
+    """Return the share of the runners a domain gets when several are queued."""
+    weights = getattr(settings, "TRANSCODING_DOMAIN_WEIGHTS", {})
+    return weights.get(domain, DEFAULT_DOMAIN_WEIGHT)
+
+
+def get_domain_max_concurrency():
+    """Return the max number of jobs processed at once, for the capped domains."""
+    return getattr(settings, "TRANSCODING_DOMAIN_MAX_CONCURRENCY", {})
+
+
+def get_retry_delay(job_type: str, failures: int):
+    """
+    Return the delay before a job failing for the `failures`-th time is retried.
+
+    The delay grows exponentially from the backoff delay of the job type, up to
+    the max delay. A random jitter of up to half the delay spreads the retries of
+    the jobs failing at once, like the jobs of a runner which stopped responding.
+    """
+    delays = getattr(settings, "TRANSCODING_RETRY_BACKOFF_DELAYS", {})
+    max_delay = getattr(
+        settings, "TRANSCODING_RETRY_BACKOFF_MAX_DELAY", DEFAULT_RETRY_BACKOFF_MAX_DELAY
+    )
+    delay = min(
+        delays.get(job_type, DEFAULT_RETRY_BACKOFF_DELAY) * 2 ** max(failures - 1, 0),
+        max_delay,
+    )
+    # The jitter only spreads the retries, it is not security sensitive
+    return timedelta(seconds=random.uniform(delay / 2, delay))  # nosec B311
+
+
+def get_scheduling_start(
+    created_at: datetime,
+    domain: str | None = None,
+    last_domain_start: float | None = None,
+):
+    """
+    Return the start time of a job in the fair queue of its domain.
+
+    When its domain has other jobs queued, started up to `last_domain_start`,
+    the job starts after them, one fair share quantum divided by the domain
+    weight later. The jobs of the domains are therefore interleaved in
+    proportion to their weights, like in a weighted fair queue.
+    """
+    start = created_at.timestamp()
+    if last_domain_start is not None:
+        quantum = getattr(
+            settings, "TRANSCODING_FAIR_SHARE_QUANTUM", DEFAULT_FAIR_SHARE_QUANTUM
+        )
+        start = max(start, last_domain_start + quantum / get_domain_weight(domain))
+    return start
+
+
+def get_scheduling_rank(
+    job_type: str,
+    priority: int,
+    created_at: datetime,
+    domain: str | None = None,
+    last_domain_start: float | None = None,
+):
+    """
+    Return the rank in which a job is offered to the runners, lowest first.
+
+    The rank is the start time of the job, see `get_scheduling_start`, delayed
+    by `priority` aging intervals: a job waiting for longer than the delay of a
+    job of higher priority is offered first. Being fixed at creation, the rank
+    can be indexed, unlike a priority decreasing with the waiting time. The
+    start times do not include the priority delays, which are only added once
+    to the rank.
+    """
+    return get_scheduling_start(
+        created_at, domain=domain, last_domain_start=last_domain_start
+    ) + priority * get_priority_aging_interval(job_type)
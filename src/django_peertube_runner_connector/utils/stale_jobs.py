@@ -0,0 +1,184 @@
+"""Reaper of the processing jobs whose runner stopped responding."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+import threading
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync
+
+from django_peertube_runner_connector.models import RunnerJob, RunnerJobState
+from django_peertube_runner_connector.socket import send_available_jobs_ping_to_runners
+from django_peertube_runner_connector.utils.job_handlers.get_job_handler import (
+    get_runner_job_handler_class,
+)
+from django_peertube_runner_connector.utils.job_offers import release_expired_offers
+from django_peertube_runner_connector.utils.leases import get_lease_duration
+
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_REAPER_LOCK_KEY = "django_peertube_runner_connector:stale_job_reaper"
+STALE_JOB_REAPER_TICK_KEY = "django_peertube_runner_connector:stale_job_reaper_tick"
+STALE_JOB_ERROR_MESSAGE = "Runner stopped responding"
+
+_reaper = None  # pylint: disable=invalid-name
+_reaper_lock = threading.Lock()
+
+
+def get_stale_jobs(timeout: timedelta | None = None):
+    """
+    Filter the processing jobs whose lease expired.
+
+    The jobs not updated by their runner since the timeout are stale too, their
+    lease lasting the runner job timeout by default.
+    """
+    if timeout is None:
+        timeout = get_lease_duration()
+
+    now = timezone.now()
+    return RunnerJob.objects.filter(state=RunnerJobState.PROCESSING).filter(
+        Q(leaseExpiresAt__lte=now) | Q(updatedAt__lt=now - timeout)
+    )
+
+
+def list_retried_job_types(since: datetime, until: datetime):
+    """Return the types of the pending jobs whose retry backoff elapsed meanwhile."""
+    return set(
+        RunnerJob.objects.filter(
+            state=RunnerJobState.PENDING, notBefore__gt=since, notBefore__lte=until
+        )
+        .values_list("type", flat=True)
+        .distinct()
+    )
+
+
+def reap_stale_jobs(timeout: timedelta | None = None, retry_since: datetime = None):
+    """
+    Count a failure for each stale job and send it through its handler error path.
+
+    A job is reset to pending or set to errored once it failed too many times,
+    and the jobs whose offer to a runner expired are released.
+    Each job is reclaimed with a conditional update first, revoking the lease of
+    its runner, so a job updated by its runner in the meantime, or reaped by
+    another process, is left untouched. The runners are pinged for the jobs
+    available again, the jobs reset to pending being only available once their
+    retry backoff elapsed: they are pinged for by the reaping following it, with
+    the jobs whose backoff elapsed since `retry_since`. Return the reaped jobs.
+    """
+    reaped_jobs = []
+
+    for runner_job in get_stale_jobs(timeout).select_related("runner"):
+        claimed = RunnerJob.objects.filter(
+            pk=runner_job.pk,
+            state=RunnerJobState.PROCESSING,
+            updatedAt=runner_job.updatedAt,
+        ).update(
+            failures=F("failures") + 1,
+            processingJobToken=None,
+            leaseExpiresAt=None,
+            updatedAt=timezone.now(),
+        )
+        if not claimed:
+            continue
+
+        runner_job.failures += 1
+        runner_job.processingJobToken = None
+        runner_job.leaseExpiresAt = None
+        logger.warning(
+            "Runner %s stopped responding while processing job %s (%s).",
+            runner_job.runner.name if runner_job.runner else None,
+            runner_job.uuid,
+            runner_job.type,
+        )
+
+        runner_job_handler = get_runner_job_handler_class(runner_job)
+        runner_job_handler().error(
+            runner_job=runner_job, message=STALE_JOB_ERROR_MESSAGE
+        )
+        reaped_jobs.append(runner_job)
+
+    now = timezone.now()
+    pending_types = {
+        job.type
+        for job in reaped_jobs
+        if job.state == RunnerJobState.PENDING
+        and (job.notBefore is None or job.notBefore <= now)
+    }
+    if retry_since is not None:
+        pending_types |= list_retried_job_types(retry_since, now)
+    # The jobs whose offer expired are available to the other runners again
+    pending_types |= release_expired_offers()
+    if pending_types:
+        async_to_sync(send_available_jobs_ping_to_runners)(pending_types)
+
+    return reaped_jobs
+
+
+class StaleJobReaper(threading.Thread):
+    """
+    Thread reaping the stale jobs periodically.
+
+    On each tick, the replicas compete for a leader lock stored in the Django
+    cache for the duration of the interval, so the jobs are reaped by a single
+    replica at a time. The cache must be shared between the replicas. The time
+    of the last tick is stored in the cache too, the runners being pinged for
+    the jobs whose retry backoff elapsed since then.
+    """
+
+    def __init__(self, interval: int):
+        super().__init__(name="stale-job-reaper", daemon=True)
+        self.interval = interval
+        self.token = str(uuid4())
+        self._stopped = threading.Event()
+
+    def run_once(self):
+        """Reap the stale jobs if this replica holds the leader lock."""
+        if not cache.add(STALE_JOB_REAPER_LOCK_KEY, self.token, self.interval):
+            return None
+
+        now = timezone.now()
+        retry_since = cache.get(STALE_JOB_REAPER_TICK_KEY) or now - timedelta(
+            seconds=self.interval
+        )
+        cache.set(STALE_JOB_REAPER_TICK_KEY, now, None)
+        try:
+            return reap_stale_jobs(retry_since=retry_since)
+        finally:
+            close_old_connections()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Stale jobs reaping failed.")
+
+    def stop(self):
+        """Stop the thread after the current tick."""
+        self._stopped.set()
+
+
+def start_stale_job_reaper():
+    """Start the stale job reaper of this process if enabled in the settings."""
+    global _reaper  # pylint: disable=global-statement
+
+    interval = getattr(settings, "TRANSCODING_STALE_JOB_REAPER_INTERVAL", 0)
+    if not interval:
+        return None
+
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = StaleJobReaper(interval)
+            _reaper.start()
+            logger.info("Stale job reaper started, running every %ss.", interval)
+
+    return _reaper
@@ -9,11 +9,14 @@ from django_peertube_runner_connector.storage import video_storage
 
 from .ffprobe import get_video_stream
 from .files import get_video_directory
+from .media_cache import get_media_input
+from .tracing import start_span, traced
 
 
+@traced("build_video_thumbnails")
 def build_video_thumbnails(video=Video, video_file=VideoFile, existing_probe=None):
     """Create a video thumbnails with ffmpeg and save it to a file."""
-    video_url = video_storage.url(video_file.filename)
+    video_url = get_media_input(video_file.filename)
 
     if get_video_stream(video_url, existing_probe=existing_probe) is None:
         return None
@@ -31,7 +34,8 @@ def build_video_thumbnails(video=Video, video_file=VideoFile, existing_probe=Non
             "gte(n, 0)",
         ).output(output_path, vframes=1)
 
-        ffmpeg.run(output_stream, overwrite_output=True, quiet=True)
+        with start_span("ffmpeg", {"ffmpeg.output": "thumbnail"}):
+            ffmpeg.run(output_stream, overwrite_output=True, quiet=True)
         with open(output_path, "rb") as thumbnail_file:
             thumbnail_filename = video_storage.save(thumbnail_filename, thumbnail_file)
 
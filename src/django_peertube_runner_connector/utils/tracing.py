@@ -0,0 +1,111 @@
+"""
+Optional OpenTelemetry tracing of the transcoding pipeline.
+
+Spans are only recorded when `TRANSCODING_TRACING_ENABLED` is set and the
+`opentelemetry-api` package is installed, the helpers are no-ops otherwise. The
+application configures the tracer provider and the exporter.
+"""
+
+from contextlib import contextmanager
+import functools
+
+from django.conf import settings
+
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+except ImportError:
+    otel_context = propagate = trace = None
+
+
+TRACER_NAME = "django_peertube_runner_connector"
+# Key of the private payload of the jobs keeping the trace context of their creation
+TRACE_CONTEXT_KEY = "traceContext"
+
+
+def is_tracing_enabled():
+    """Return whether the spans are recorded."""
+    return trace is not None and getattr(settings, "TRANSCODING_TRACING_ENABLED", False)
+
+
+@contextmanager
+def start_span(name: str, attributes: dict = None, context=None):
+    """
+    Run the block in a span, child of the current one or of the context given.
+
+    The span is None when tracing is disabled.
+    """
+    if not is_tracing_enabled():
+        yield None
+        return
+
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(
+        name,
+        context=context,
+        attributes={
+            key: str(value) for key, value in (attributes or {}).items() if value
+        },
+    ) as span:
+        yield span
+
+
+def traced(name: str):
+    """Decorate a function to run it in a span."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_trace_context():
+    """Return the current trace context as W3C headers, empty when disabled."""
+    carrier = {}
+    if is_tracing_enabled():
+        propagate.inject(carrier)
+    return carrier
+
+
+def start_job_span(name: str, runner_job):
+    """
+    Start a span of a job in the trace of the transcoding which created it.
+
+    The trace context is read from the private payload of the job, so the spans
+    of the runner requests join the trace of the video. When the private payload
+    is deferred, it is only loaded with tracing enabled.
+    """
+    context = None
+    if is_tracing_enabled() and isinstance(runner_job.privatePayload, dict):
+        if carrier := runner_job.privatePayload.get(TRACE_CONTEXT_KEY):
+            context = propagate.extract(carrier)
+
+    return start_span(
+        name,
+        {"runner_job.uuid": runner_job.uuid, "runner_job.type": runner_job.type},
+        context=context,
+    )
+
+
+def bind_trace_context(function, name: str):
+    """
+    Wrap a callable to run it in a span child of the current one.
+
+    The current context is captured when wrapping, so the callable can run in
+    another thread, like the operations of a storage batch.
+    """
+    if not is_tracing_enabled():
+        return function
+
+    context = otel_context.get_current()
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with start_span(name, context=context):
+            return function(*args, **kwargs)
+
+    return wrapper
@@ -15,7 +15,7 @@ from django_peertube_runner_connector.models import (
     VideoFile,
     VideoStreamingPlaylist,
 )
-from django_peertube_runner_connector.storage import video_storage
+from django_peertube_runner_connector.storage import StorageBatch, video_storage
 from django_peertube_runner_connector.utils.ffprobe import (
     get_video_stream_dimensions_info,
     get_video_stream_duration,
@@ -26,6 +26,7 @@ from django_peertube_runner_connector.utils.files import (
     get_hls_resolution_playlist_filename,
     get_video_directory,
 )
+from django_peertube_runner_connector.utils.tracing import traced
 
 from .codecs import get_audio_stream_codec, get_video_stream_codec
 
@@ -35,14 +36,17 @@ logger = logging.getLogger(__name__)
 UUID_REGEX = "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
 
 
+def replace_video_filename_in_playlist(content: str, new_video_filename: str) -> str:
+    """Return the playlist content referencing the renamed video file."""
+    return re.sub(f"{UUID_REGEX}-\\d+-fragmented.mp4", new_video_filename, content)
+
+
 def rename_video_file_in_playlist(playlist_path: str, new_video_filename: str) -> None:
     """Rename the video file in the playlist file content."""
     with video_storage.open(playlist_path, "r") as playlist_file:
         content = playlist_file.read()
 
-    new_content = re.sub(
-        f"{UUID_REGEX}-\\d+-fragmented.mp4", new_video_filename, str(content)
-    )
+    new_content = replace_video_filename_in_playlist(str(content), new_video_filename)
 
     with video_storage.open(playlist_path, "w") as playlist_file:
         playlist_file.write(new_content)
@@ -75,21 +79,27 @@ def on_hls_video_file_transcoding(video: Video, video_file: VideoFile):
     update_master_hls_playlist(video, playlist)
 
 
+# pylint: disable=too-many-locals
+@traced("update_master_hls_playlist")
 def update_master_hls_playlist(video: Video, playlist: VideoStreamingPlaylist):
     """Update the master HLS playlist file (.m3u8) of a video."""
     master_playlist_elements = ["#EXTM3U", "#EXT-X-VERSION:3"]
     playlist.refresh_from_db()
 
-    if not playlist.videoFiles.all():
+    video_files = list(playlist.videoFiles.all())
+    if not video_files:
         logger.info(
             "Cannot update master playlist file of video %s: no video files.",
             video.uuid,
         )
         return
 
-    for file in playlist.videoFiles.all():
-        video_file_url = video_storage.url(file.filename)
-        probe = ffmpeg.probe(video_file_url)
+    # Each file is probed remotely, fetch all the probes at once
+    batch = StorageBatch()
+    for file in video_files:
+        batch.submit(ffmpeg.probe, video_storage.url(file.filename))
+
+    for file, probe in zip(video_files, batch.wait()):
         playlist_filename = get_hls_resolution_playlist_filename(
             os.path.basename(file.filename)
         )
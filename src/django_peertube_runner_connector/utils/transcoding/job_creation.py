@@ -21,6 +21,7 @@ from django_peertube_runner_connector.utils.resolutions import (
     compute_max_resolution_to_transcode,
     compute_resolutions_to_transcode,
 )
+from django_peertube_runner_connector.utils.tracing import traced
 
 
 logger = logging.getLogger(__name__)
@@ -106,6 +107,7 @@ def build_lower_resolution_job_payloads(
         )
 
 
+@traced("create_transcoding_jobs")
 def create_transcoding_jobs(
     video: Video, video_file: VideoFile, domain: str, existing_probe=None
 ):
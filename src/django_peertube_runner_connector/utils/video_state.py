@@ -8,6 +8,7 @@ from django.conf import settings
 from django.utils.module_loading import import_string
 
 from django_peertube_runner_connector.models import Video, VideoState
+from django_peertube_runner_connector.utils.tracing import start_span
 
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,8 @@ def transcoding_ended(video: Video):
     if callback_path := settings.TRANSCODING_ENDED_CALLBACK_PATH:
         try:
             callback = import_string(callback_path)
-            callback(video)
+            with start_span("transcoding_ended_callback", {"video.uuid": video.uuid}):
+                callback(video)
         except ImportError:
             logger.error("Error importing transcoding_ended callback.")
 
@@ -53,9 +55,14 @@ def move_to_next_state(video: Video):
 
 
 def move_to_failed_transcoding_state(video: Video):
-    """Move video to the failed transcoding state."""
+    """
+    Move video to the failed transcoding state.
+
+    Its idempotency key is released, so its transcoding can be requested again.
+    """
     if video.state != VideoState.TRANSCODING_FAILED:
         video.state = VideoState.TRANSCODING_FAILED
+        video.idempotencyKey = None
         video.save()
         transcoding_ended(video)
 
@@ -1,5 +1,8 @@
 """Make all views available from django_peertube_runner_connector.views."""
 
 # pylint: disable=wildcard-import,unused-wildcard-import
+from .metrics import *  # noqa isort:skip
 from .runner import *  # noqa isort:skip
 from .runner_job import *  # noqa isort:skip
+from .runner_stats import *  # noqa isort:skip
+from .video import *  # noqa isort:skip
@@ -0,0 +1,27 @@
+"""Endpoint exposing the metrics of the jobs and the runners to Prometheus."""
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from django_peertube_runner_connector.utils.metrics import render_metrics
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Return the metrics in the Prometheus text format.
+
+    The scraper must send `TRANSCODING_METRICS_TOKEN` as a bearer token, the
+    metrics are not exposed while it is not set.
+    """
+    token = getattr(settings, "TRANSCODING_METRICS_TOKEN", None)
+    if not token or not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,9 +1,12 @@
 """API Endpoints for Runner Jobs with Django RestFramework viewsets."""
 
+from contextlib import nullcontext
 import logging
 from urllib.parse import urlparse
-from uuid import uuid4
+from uuid import UUID, uuid4
 
+from django.db import transaction
+from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import redirect
 from django.utils import timezone
@@ -26,11 +29,20 @@ from django_peertube_runner_connector.storage import video_storage
 from django_peertube_runner_connector.utils.job_handlers.get_job_handler import (
     get_runner_job_handler_class,
 )
+from django_peertube_runner_connector.utils.leases import get_lease_duration
+from django_peertube_runner_connector.utils.metrics import QUEUE_WAIT, observe_duration
+from django_peertube_runner_connector.utils.progress import set_live_progress
 from django_peertube_runner_connector.utils.request import get_client_ip
+from django_peertube_runner_connector.utils.scheduling import get_domain_max_concurrency
+from django_peertube_runner_connector.utils.tracing import start_job_span, start_span
 
 
 logger = logging.getLogger(__name__)
 
+# Max number of jobs a runner can claim at once
+MAX_CLAIMED_JOBS = 10
+LEASE_LOST_MESSAGE = "This job is not leased to the runner anymore"
+
 
 class RunnerJobViewSet(viewsets.GenericViewSet):
     """Viewset for the API of the runner job object."""
@@ -47,10 +59,15 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
             raise Http404("Unknown runner token") from runner_not_found
         return runner
 
-    def _get_job_from_uuid(self, uuid):
-        """Get the job from the uuid."""
+    def _get_job_from_uuid(self, uuid, deferred_fields=("payload", "privatePayload")):
+        """
+        Get the job from the uuid.
+
+        The JSON payloads are not loaded unless the endpoint needs them, a
+        deferred payload is still loaded on access.
+        """
         try:
-            runner = self.get_queryset().get(uuid=uuid)
+            runner = self.get_queryset().defer(*deferred_fields).get(uuid=uuid)
         except RunnerJob.DoesNotExist as job_not_found:
             raise Http404("Unknown job uuid") from job_not_found
         return runner
@@ -63,11 +80,67 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
             raise Http404("Unknown video uuid") from video_not_found
         return runner
 
+    def _claim_job(self, job, runner):
+        """
+        Attribute a pending job to a runner, return whether it was claimed.
+
+        The job is claimed and attributed with a single conditional update, unless
+        it is offered to another runner. The runner is given a lease on the job,
+        renewed by its updates.
+        """
+        now = timezone.now()
+        fields = {
+            "state": RunnerJobState.PROCESSING,
+            "processingJobToken": "ptrjt-" + str(uuid4()),
+            "startedAt": now,
+            "runner": runner,
+            "offerExpiresAt": None,
+            "leaseExpiresAt": now + get_lease_duration(),
+            "updatedAt": now,
+        }
+        with start_job_span("runner_job.accept", job):
+            updated_rows = (
+                RunnerJob.objects.filter(uuid=job.uuid, state=RunnerJobState.PENDING)
+                .exclude(~Q(runner=runner), offerExpiresAt__gt=now)
+                .update(**fields)
+            )
+
+        if updated_rows == 0:
+            return False
+
+        for field, value in fields.items():
+            setattr(job, field, value)
+        observe_duration(QUEUE_WAIT, job.type, job.startedAt - job.createdAt)
+        return True
+
+    def _release_lease(self, job, request, **fields):
+        """
+        Release the lease of the runner on a job, saving the fields of its transition.
+
+        A single conditional update is run, so the job is only changed once, by
+        the runner holding the lease with the `jobToken` of the request, before
+        it expired or was reclaimed. Return whether the lease was released.
+        """
+        fields = {**fields, "leaseExpiresAt": None, "updatedAt": timezone.now()}
+        updated_rows = (
+            RunnerJob.objects.filter(pk=job.pk)
+            .filter_leased(request.data.get("jobToken"))
+            .update(**fields)
+        )
+        if updated_rows == 0:
+            return False
+
+        for field, value in fields.items():
+            setattr(job, field, value)
+        return True
+
     @action(detail=False, methods=["post"], url_path="request")
     def request_runner_job(self, request):
         """Endpoint returning a list of available jobs."""
         runner = self._get_runner_from_token(request)
-        jobs = RunnerJob.objects.list_available_jobs(request.data.get("jobTypes"))
+        jobs = RunnerJob.objects.list_available_jobs(request.data.get("jobTypes")).only(
+            *SimpleRunnerJobSerializer.Meta.fields
+        )
 
         runner.update_last_contact(get_client_ip(request))
 
@@ -78,24 +151,30 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
 
     @action(detail=True, methods=["post"], url_path="accept")
     def accept_runner_job(self, request, uuid=None):
-        """Endpoint attributing a job to a runner."""
-        runner = self._get_runner_from_token(request)
-        job = self._get_job_from_uuid(uuid)
-        updated_rows = RunnerJob.objects.filter(
-            uuid=uuid, state=RunnerJobState.PENDING
-        ).update(state=RunnerJobState.PROCESSING)
+        """
+        Endpoint attributing a job to a runner.
 
-        if updated_rows == 0:
-            return Response(
-                "This job is not in pending state anymore",
-                status=status.HTTP_409_CONFLICT,
-            )
-
-        job.refresh_from_db()
-        job.processingJobToken = "ptrjt-" + str(uuid4())
-        job.startedAt = timezone.now()
-        job.runner = runner
-        job.save()
+        The concurrency cap of the domain of the job is checked in the transaction
+        of the claim, which is rolled back when the cap is exceeded.
+        """
+        runner = self._get_runner_from_token(request)
+        job = self._get_job_from_uuid(uuid, deferred_fields=("privatePayload",))
+
+        # Only the claims of the jobs of the capped domains need a transaction
+        capped = job.domain in get_domain_max_concurrency()
+        with transaction.atomic() if capped else nullcontext():
+            if not self._claim_job(job, runner):
+                return Response(
+                    "This job is not in pending state anymore",
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            if capped and RunnerJob.objects.is_domain_over_capacity(job.domain):
+                transaction.set_rollback(True)
+                return Response(
+                    "The domain of this job is processing too many jobs",
+                    status=status.HTTP_409_CONFLICT,
+                )
 
         runner.update_last_contact(get_client_ip(request))
 
@@ -109,19 +188,75 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
         serializer = self.get_serializer(job)
         return Response({"job": serializer.data}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"], url_path="claim")
+    def claim_runner_jobs(self, request):
+        """
+        Endpoint attributing up to `maxJobs` available jobs to a runner at once.
+
+        The jobs are claimed in their scheduling order in a single transaction,
+        the rows locked by a concurrent claim are skipped, and the domain
+        concurrency caps are applied to the whole batch, the capped domains being
+        locked until the end of the transaction.
+        """
+        runner = self._get_runner_from_token(request)
+        try:
+            max_jobs = int(request.data.get("maxJobs", 1))
+        except (TypeError, ValueError):
+            return Response(
+                "maxJobs must be an integer", status=status.HTTP_400_BAD_REQUEST
+            )
+        max_jobs = min(max(max_jobs, 1), MAX_CLAIMED_JOBS)
+
+        claimed_jobs = []
+        with transaction.atomic():
+            candidates = list(
+                RunnerJob.objects.list_available_jobs(
+                    request.data.get("jobTypes"), limit=max_jobs * 2
+                )
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("dependsOnRunnerJob")
+                .defer("privatePayload")
+            )
+            domains = {job.domain for job in candidates}
+            # The candidates are locked first, like by the other claims
+            RunnerJob.objects.lock_domains(domains)
+            capacities = RunnerJob.objects.get_domain_capacities(domains)
+            for job in candidates:
+                if len(claimed_jobs) == max_jobs:
+                    break
+                if capacities.get(job.domain, 1) <= 0:
+                    continue
+                if self._claim_job(job, runner):
+                    claimed_jobs.append(job)
+                    if job.domain in capacities:
+                        capacities[job.domain] -= 1
+
+        runner.update_last_contact(get_client_ip(request))
+
+        logger.info(
+            "Remote runner %s has claimed %s jobs", runner.name, len(claimed_jobs)
+        )
+
+        serializer = self.get_serializer(claimed_jobs, many=True)
+        return Response({"jobs": serializer.data}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["post"], url_path="abort")
     def abort_runner_job(self, request, uuid=None):
         """Endpoint to aborting a job."""
         runner = self._get_runner_from_token(request)
         job = self._get_job_from_uuid(uuid)
-        job.failures += 1
+        if not self._release_lease(
+            job, request, failures=job.failures + 1, processingJobToken=None
+        ):
+            return Response(LEASE_LOST_MESSAGE, status=status.HTTP_409_CONFLICT)
 
         logger.info(
             "Remote runner %s  is aborting job %s (%s)", runner.name, job.uuid, job.type
         )
 
-        runner_job_handler = get_runner_job_handler_class(job)
-        runner_job_handler().abort(runner_job=job)
+        with start_job_span("runner_job.abort", job):
+            runner_job_handler = get_runner_job_handler_class(job)
+            runner_job_handler().abort(runner_job=job)
 
         runner.update_last_contact(get_client_ip(request))
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -131,8 +266,11 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
         """Endpoint to signal an error with a job."""
         runner = self._get_runner_from_token(request)
         message = request.data.get("message")
-        job = self._get_job_from_uuid(uuid)
-        job.failures += 1
+        job = self._get_job_from_uuid(uuid, deferred_fields=("payload",))
+        if not self._release_lease(
+            job, request, failures=job.failures + 1, processingJobToken=None
+        ):
+            return Response(LEASE_LOST_MESSAGE, status=status.HTTP_409_CONFLICT)
 
         logger.error(
             "Remote runner %s had an error with job %s (%s): %s",
@@ -142,8 +280,9 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
             message,
         )
 
-        runner_job_handler = get_runner_job_handler_class(job)
-        runner_job_handler().error(runner_job=job, message=message)
+        with start_job_span("runner_job.error", job):
+            runner_job_handler = get_runner_job_handler_class(job)
+            runner_job_handler().error(runner_job=job, message=message)
 
         runner.update_last_contact(get_client_ip(request))
 
@@ -151,25 +290,100 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
 
     @action(detail=True, methods=["post"], url_path="update")
     def update_runner_job(self, request, uuid=None):
-        """Endpoint to update a job."""
+        """Endpoint to update a job, renewing the lease of its runner."""
         runner = self._get_runner_from_token(request)
         job = self._get_job_from_uuid(uuid)
+        if not job.is_leased(request.data.get("jobToken")):
+            return Response(LEASE_LOST_MESSAGE, status=status.HTTP_409_CONFLICT)
 
         runner_job_handler = get_runner_job_handler_class(job)
 
-        runner_job_handler().update(
-            runner_job=job, progress=request.data.get("progress")
-        )
+        with start_job_span("runner_job.update", job):
+            renewed = runner_job_handler().update(
+                runner_job=job, progress=request.data.get("progress")
+            )
+        if not renewed:
+            return Response(LEASE_LOST_MESSAGE, status=status.HTTP_409_CONFLICT)
 
         runner.update_last_contact(get_client_ip(request))
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=["post"], url_path="bulk-update")
+    def bulk_update_runner_jobs(self, request):
+        """
+        Endpoint to update the progress of several jobs of a runner at once.
+
+        Each item of `jobs` gives the `jobUUID`, `jobToken` and optionally the
+        `progress` of a job processed by the runner. The jobs leased with their
+        token are updated with a single query, renewing their lease, the other
+        ones, or the ones with an invalid progress, are returned as rejected.
+        """
+        runner = self._get_runner_from_token(request)
+        items = request.data.get("jobs")
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) for item in items
+        ):
+            return Response(
+                "jobs must be a list of objects", status=status.HTTP_400_BAD_REQUEST
+            )
+
+        progresses = {}
+        rejected_uuids = set()
+        for item in items:
+            job_uuid = str(item.get("jobUUID"))
+            try:
+                progress = item.get("progress")
+                progresses[str(UUID(job_uuid))] = (
+                    item.get("jobToken"),
+                    None if progress is None else float(progress),
+                )
+            except (TypeError, ValueError):
+                rejected_uuids.add(job_uuid)
+
+        # The leased jobs are locked until their update, so the jobs updated are
+        # exactly the ones found leased, none being reclaimed in the meantime
+        with transaction.atomic():
+            jobs = [
+                job
+                for job in RunnerJob.objects.filter(
+                    runner=runner, state=RunnerJobState.PROCESSING, uuid__in=progresses
+                )
+                .exclude(leaseExpiresAt__lte=timezone.now())
+                .only("id", "uuid", "state", "processingJobToken", "leaseExpiresAt")
+                .select_for_update()
+                if job.is_leased(progresses[str(job.uuid)][0])
+            ]
+
+            with start_span("runner_job.bulk_update", {"runner_job.count": len(jobs)}):
+                RunnerJob.objects.bulk_update_progress(
+                    {job.pk: progresses[str(job.uuid)][1] for job in jobs}
+                )
+        for job in jobs:
+            if (progress := progresses[str(job.uuid)][1]) is not None:
+                set_live_progress(job, progress)
+
+        runner.update_last_contact(get_client_ip(request))
+
+        updated_uuids = {str(job.uuid) for job in jobs}
+        return Response(
+            {
+                "updatedJobs": sorted(updated_uuids),
+                "rejectedJobs": sorted(
+                    rejected_uuids | (set(progresses) - updated_uuids)
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"], url_path="success")
     def success_runner_job(self, request, uuid=None):
         """Endpoint to signal the job as successfully completed."""
         runner = self._get_runner_from_token(request)
-        job = self._get_job_from_uuid(uuid)
+        job = self._get_job_from_uuid(uuid, deferred_fields=())
+        # The job is only completed once, by the runner holding its lease
+        if not self._release_lease(job, request, state=RunnerJobState.COMPLETING):
+            return Response(LEASE_LOST_MESSAGE, status=status.HTTP_409_CONFLICT)
 
         runner_job_handler = get_runner_job_handler_class(job)
 
@@ -186,7 +400,8 @@ class RunnerJobViewSet(viewsets.GenericViewSet):
                 ),
             }
 
-        runner_job_handler().complete(runner_job=job, result_payload=result)
+        with start_job_span("runner_job.success", job):
+            runner_job_handler().complete(runner_job=job, result_payload=result)
 
         runner.update_last_contact(get_client_ip(request))
 
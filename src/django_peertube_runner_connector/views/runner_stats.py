@@ -0,0 +1,31 @@
+"""API Endpoints for the statistics of the runners."""
+
+from rest_framework import mixins, permissions, viewsets
+
+from django_peertube_runner_connector.models import RunnerStats
+from django_peertube_runner_connector.serializers import RunnerStatsSerializer
+
+
+class RunnerStatsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Viewset listing the statistics of the runners, for the staff only.
+
+    The statistics can be filtered by runner name and job type with the `runner`
+    and `jobType` query parameters.
+    """
+
+    queryset = RunnerStats.objects.select_related("runner").order_by(
+        "runner__name", "jobType", "resolution"
+    )
+    serializer_class = RunnerStatsSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        filters = {
+            "runner__name": self.request.query_params.get("runner"),
+            "jobType": self.request.query_params.get("jobType"),
+        }
+        return queryset.filter(
+            **{field: value for field, value in filters.items() if value}
+        )
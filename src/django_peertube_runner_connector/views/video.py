@@ -0,0 +1,30 @@
+"""API Endpoints for the videos with Django RestFramework viewsets."""
+
+from django.utils.cache import patch_cache_control
+
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from django_peertube_runner_connector.models import Video
+from django_peertube_runner_connector.utils.eta import get_eta_cache_timeout
+
+
+class VideoViewSet(viewsets.GenericViewSet):
+    """Viewset for the API of the video object."""
+
+    queryset = Video.objects.only("id", "uuid", "duration")
+    lookup_field = "uuid"
+
+    @action(detail=True, methods=["get"], url_path="eta")
+    def eta(self, request, uuid=None):  # pylint: disable=unused-argument
+        """
+        Return the estimated time left before the transcoding of a video ends.
+
+        The estimation is cached, the response can be cached by the clients and
+        the proxies for as long.
+        """
+        video = self.get_object()
+        response = Response(video.get_estimated_time_to_publish())
+        patch_cache_control(response, public=True, max_age=get_eta_cache_timeout())
+        return response
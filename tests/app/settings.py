@@ -139,10 +139,38 @@ class Base(Configuration):
     TRANSCODING_FPS_KEEP_ORIGIN_FPS_RESOLUTION_MIN = values.IntegerValue(720)
 
     TRANSCODING_RUNNER_MAX_FAILURE = values.IntegerValue(5)
+    TRANSCODING_RUNNER_JOB_TIMEOUT = values.IntegerValue(10 * 60)
+    TRANSCODING_STALE_JOB_REAPER_INTERVAL = values.IntegerValue(0)
+    TRANSCODING_PROGRESS_PERSIST_DELTA = values.IntegerValue(10)
+    TRANSCODING_PROGRESS_PERSIST_INTERVAL = values.IntegerValue(60)
+    TRANSCODING_METRICS_CACHE_TIMEOUT = values.IntegerValue(15)
+    TRANSCODING_METRICS_ACTIVE_RUNNER_WINDOW = values.IntegerValue(10 * 60)
+    TRANSCODING_METRICS_TOKEN = values.Value(None)
+    TRANSCODING_ETA_CACHE_TIMEOUT = values.IntegerValue(10)
+    TRANSCODING_ETA_DEFAULT_ENCODE_SPEED = values.FloatValue(1.0)
+    TRANSCODING_ADMIN_ESTIMATED_COUNT_THRESHOLD = values.IntegerValue(10000)
+    TRANSCODING_ADMIN_DASHBOARD_CACHE_TIMEOUT = values.IntegerValue(30)
+    TRANSCODING_TRACING_ENABLED = values.BooleanValue(False)
+    TRANSCODING_RUNNER_JOB_ARCHIVE_AFTER = values.IntegerValue(30)
+    TRANSCODING_RUNNER_JOB_ARCHIVE_RETENTION = values.IntegerValue(0)
+    TRANSCODING_PRIORITY_AGING_INTERVALS = values.DictValue({})
+    TRANSCODING_FAIR_SHARE_QUANTUM = values.IntegerValue(60)
+    TRANSCODING_DOMAIN_WEIGHTS = values.DictValue({})
+    TRANSCODING_DOMAIN_MAX_CONCURRENCY = values.DictValue({})
+    TRANSCODING_RETRY_BACKOFF_DELAYS = values.DictValue({})
+    TRANSCODING_RETRY_BACKOFF_MAX_DELAY = values.IntegerValue(60 * 60)
+    TRANSCODING_STORAGE_MAX_WORKERS = values.IntegerValue(4)
+    TRANSCODING_MEDIA_CACHE_DIR = values.Value("")
+    TRANSCODING_MEDIA_CACHE_MAX_SIZE = values.IntegerValue(10 * 1024 * 1024 * 1024)
 
     TRANSCODING_ENDED_CALLBACK_PATH = values.Value("")
     TRANSCRIPTION_ENDED_CALLBACK_PATH = values.Value("")
     TRANSCRIPTION_ERROR_CALLBACK_PATH = values.Value("")
+    TRANSCODING_RUNNER_DISCONNECTED_CALLBACK_PATH = values.Value("")
+    TRANSCODING_RUNNER_PRESENCE_TTL = values.IntegerValue(60)
+    TRANSCODING_RUNNER_PRESENCE_COUNTS_CACHE_TIMEOUT = values.IntegerValue(5)
+    TRANSCODING_PUSH_DISPATCH = values.BooleanValue(False)
+    TRANSCODING_JOB_OFFER_TIMEOUT = values.IntegerValue(15)
 
     # Password validation
     # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,226 @@
+"""
+Benchmarks of the runner REST API over the lifecycle of the jobs.
+
+Each runner registers, requests the jobs, accepts one, updates its progress and
+reports its success or its error. The number of queries and the wall time of
+each request are recorded per endpoint, and the number of queries is checked
+against the budget of the endpoint.
+
+The query budgets are checked by the test suite. The timings are only recorded
+when the benchmarks are enabled, with `make benchmark`. The number of lifecycles
+and of runners driving them at once are set by the `BENCHMARK_LIFECYCLES` and
+`BENCHMARK_CONCURRENCY` environment variables. A concurrency above 1 needs a
+database handling concurrent writes, like PostgreSQL.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import statistics
+import time
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+import ffmpeg
+import pytest
+from tests_django_peertube_runner_connector.probe_response import probe_response
+
+from django_peertube_runner_connector.factories import (
+    RunnerJobFactory,
+    RunnerRegistrationTokenFactory,
+    VideoFactory,
+)
+from django_peertube_runner_connector.models import (
+    RunnerJobState,
+    RunnerJobType,
+    RunnerRegistrationToken,
+)
+
+
+BENCHMARK_LIFECYCLES = int(os.environ.get("BENCHMARK_LIFECYCLES", 10))
+BENCHMARK_CONCURRENCY = int(os.environ.get("BENCHMARK_CONCURRENCY", 1))
+
+# Maximum number of queries of a request to each endpoint, the runner lookup and
+# its last contact update included
+QUERY_BUDGETS = {
+    "register": 3,
+    "request": 3,
+    "accept": 4,
+    "update": 4,
+    # Including the creation of the runner stats on the first job of a runner
+    "success": 24,
+    # Including the release of the lease before the error side effects
+    "error": 9,
+}
+
+
+class RunnerLifecycle:
+    """Drive a runner through the lifecycle of a job with the test client."""
+
+    def __init__(self, records):
+        self.client = Client()
+        self.records = records
+        self.runner_token = ""
+
+    def post(self, endpoint, path, data):
+        """Post to an endpoint, recording its number of queries and wall time."""
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = self.client.post(
+                f"/api/v1/runners/{path}",
+                data={"runnerToken": self.runner_token, **data},
+            )
+            duration = time.perf_counter() - start
+
+        assert response.status_code < 400, (endpoint, response.content)
+        self.records[endpoint].append((len(context), duration))
+        return response
+
+    def run(self, job_uuid, succeed):
+        """Run the lifecycle of a job, reporting its success or an error."""
+        try:
+            response = self.post(
+                "register",
+                "register",
+                {"registrationToken": "registrationToken", "name": str(job_uuid)},
+            )
+            self.runner_token = response.json()["runnerToken"]
+
+            self.post("request", "jobs/request", {})
+            response = self.post("accept", f"jobs/{job_uuid}/accept", {})
+            job_token = response.json()["job"]["jobToken"]
+            self.post(
+                "update",
+                f"jobs/{job_uuid}/update",
+                {"jobToken": job_token, "progress": 50},
+            )
+
+            if succeed:
+                video_file = SimpleUploadedFile("video.mp4", b"video")
+                playlist_file = SimpleUploadedFile("video.m3u8", b"video.mp4")
+                self.post(
+                    "success",
+                    f"jobs/{job_uuid}/success",
+                    {
+                        "jobToken": job_token,
+                        "payload[videoFile]": video_file,
+                        "payload[resolutionPlaylistFile]": playlist_file,
+                    },
+                )
+            else:
+                self.post(
+                    "error",
+                    f"jobs/{job_uuid}/error",
+                    {"jobToken": job_token, "message": "Error"},
+                )
+        finally:
+            connection.close()
+
+
+def create_jobs(count):
+    """Create pending transcoding jobs of new videos."""
+    if not RunnerRegistrationToken.objects.filter(
+        registrationToken="registrationToken"
+    ).exists():
+        RunnerRegistrationTokenFactory(registrationToken="registrationToken")
+    return [
+        RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            state=RunnerJobState.PENDING,
+            payload={"output": {"resolution": "720", "fps": 30}},
+            privatePayload={"videoUUID": str(video.uuid), "isNewVideo": True},
+        ).uuid
+        for video in VideoFactory.create_batch(count)
+    ]
+
+
+def run_lifecycles(job_uuids, concurrency=1):
+    """
+    Run the lifecycles of the jobs with `concurrency` runners at once.
+
+    One job of two succeeds, the other errors. Return the number of queries and
+    the wall time of the requests, per endpoint.
+    """
+    records = defaultdict(list)
+    lifecycles = [
+        (RunnerLifecycle(records), job_uuid, index % 2 == 0)
+        for index, job_uuid in enumerate(job_uuids)
+    ]
+
+    with patch.object(ffmpeg, "probe", return_value=probe_response):
+        if concurrency == 1:
+            for lifecycle, job_uuid, succeed in lifecycles:
+                lifecycle.run(job_uuid, succeed)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for future in [
+                    executor.submit(lifecycle.run, job_uuid, succeed)
+                    for lifecycle, job_uuid, succeed in lifecycles
+                ]:
+                    future.result()
+
+    return records
+
+
+def summarize(records):
+    """Return the max number of queries and the wall time percentiles per endpoint."""
+    summary = {}
+    for endpoint, values in records.items():
+        durations = sorted(duration for _, duration in values)
+        quantiles = (
+            statistics.quantiles(durations, n=100)
+            if len(durations) > 1
+            else durations * 99
+        )
+        summary[endpoint] = {
+            "queries": max(queries for queries, _ in values),
+            "p50": quantiles[49],
+            "p99": quantiles[98],
+        }
+    return summary
+
+
+def assert_query_budgets(summary):
+    """Check the number of queries of each endpoint against its budget."""
+    over_budget = {
+        endpoint: (values["queries"], QUERY_BUDGETS[endpoint])
+        for endpoint, values in summary.items()
+        if values["queries"] > QUERY_BUDGETS[endpoint]
+    }
+    assert not over_budget, f"Endpoints over their query budget: {over_budget}"
+
+
+@pytest.mark.django_db
+def test_runner_api_query_budgets():
+    """The requests of a job lifecycle should be within their query budget."""
+    summary = summarize(run_lifecycles(create_jobs(2)))
+
+    assert set(summary) == set(QUERY_BUDGETS)
+    assert_query_budgets(summary)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_runner_api_benchmark(benchmark):
+    """Benchmark the job lifecycles, recording the wall time percentiles."""
+    if BENCHMARK_CONCURRENCY > 1 and connection.vendor == "sqlite":
+        pytest.skip("SQLite does not handle concurrent writes.")
+
+    summaries = []
+
+    def setup():
+        return (create_jobs(BENCHMARK_LIFECYCLES), BENCHMARK_CONCURRENCY), {}
+
+    def run(job_uuids, concurrency):
+        summaries.append(summarize(run_lifecycles(job_uuids, concurrency)))
+
+    benchmark.pedantic(run, setup=setup, rounds=3)
+
+    for summary in summaries:
+        assert_query_budgets(summary)
+    benchmark.extra_info.update(
+        {"concurrency": BENCHMARK_CONCURRENCY, "endpoints": summaries[-1]}
+    )
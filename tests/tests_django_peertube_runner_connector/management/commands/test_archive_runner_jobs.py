@@ -0,0 +1,71 @@
+"""Test the archive_runner_jobs management command."""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobArchive,
+    RunnerJobState,
+)
+
+
+class ArchiveRunnerJobsTestCase(TestCase):
+    """Test the archive_runner_jobs management command."""
+
+    def setUp(self):
+        """Create a job finished ten days ago."""
+        self.runner_job = RunnerJobFactory(
+            state=RunnerJobState.COMPLETED,
+            finishedAt=timezone.now() - timedelta(days=10),
+        )
+
+    def test_archive_runner_jobs_default_age(self):
+        """The job should not be archived before the default age."""
+        out = StringIO()
+        call_command("archive_runner_jobs", stdout=out)
+
+        self.assertIn(
+            "Archived 0 jobs, deleted 0 expired archived jobs", out.getvalue()
+        )
+        self.assertTrue(RunnerJob.objects.exists())
+
+    def test_archive_runner_jobs_older_than(self):
+        """The job should be archived after the given age."""
+        out = StringIO()
+        call_command("archive_runner_jobs", "--older-than=7", stdout=out)
+
+        self.assertIn(
+            "Archived 1 jobs, deleted 0 expired archived jobs", out.getvalue()
+        )
+        self.assertTrue(RunnerJobArchive.objects.filter(pk=self.runner_job.pk).exists())
+
+    def test_archive_runner_jobs_retention(self):
+        """The archived job should be deleted after the retention."""
+        out = StringIO()
+        call_command(
+            "archive_runner_jobs", "--older-than=7", "--retention=7", stdout=out
+        )
+
+        self.assertIn(
+            "Archived 1 jobs, deleted 1 expired archived jobs", out.getvalue()
+        )
+        self.assertFalse(RunnerJobArchive.objects.exists())
+
+    @override_settings(TRANSCODING_RUNNER_JOB_ARCHIVE_RETENTION=365)
+    def test_archive_runner_jobs_zero_retention(self):
+        """A zero retention should delete the archived jobs, not use the setting."""
+        out = StringIO()
+        call_command(
+            "archive_runner_jobs", "--older-than=7", "--retention=0", stdout=out
+        )
+
+        self.assertIn(
+            "Archived 1 jobs, deleted 1 expired archived jobs", out.getvalue()
+        )
+        self.assertFalse(RunnerJobArchive.objects.exists())
@@ -0,0 +1,77 @@
+"""Test the collect_orphan_files management command."""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from django_peertube_runner_connector.factories import VideoFactory
+from django_peertube_runner_connector.storage import video_storage
+
+
+class CollectOrphanFilesTestCase(TestCase):
+    """Test the collect_orphan_files management command."""
+
+    def setUp(self):
+        """Create a video with an orphan file."""
+        # The collection walks the storage, where other tests leave files
+        storage_patcher = patch.object(video_storage, "_wrapped", InMemoryStorage())
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+        self.video = VideoFactory(directory="video-command", thumbnailFilename=None)
+        video_storage.save("video-command/orphan.mp4", ContentFile(b"orphan"))
+        video_storage.save("uploads/never-transcoded.mp4", ContentFile(b"upload"))
+
+    def test_collect_orphan_files_dry_run(self):
+        """Should report the orphan files without deleting them."""
+        out = StringIO()
+        call_command(
+            "collect_orphan_files", "--dry-run", "--grace-period=0", stdout=out
+        )
+        output = out.getvalue()
+
+        self.assertIn("Orphan file: video-command/orphan.mp4 (6\xa0bytes)", output)
+        self.assertIn(f"Processed videos up to {self.video.id}", output)
+        self.assertNotIn("outside of the video directories", output)
+        self.assertIn("Found 1 orphan files (6\xa0bytes)", output)
+        self.assertTrue(video_storage.exists("video-command/orphan.mp4"))
+
+    def test_collect_orphan_files(self):
+        """Should delete the orphan files."""
+        out = StringIO()
+        call_command("collect_orphan_files", "--grace-period=0", stdout=out)
+
+        self.assertIn("Deleted 1 orphan files (6\xa0bytes)", out.getvalue())
+        self.assertFalse(video_storage.exists("video-command/orphan.mp4"))
+        self.assertTrue(video_storage.exists("uploads/never-transcoded.mp4"))
+
+    def test_collect_orphan_files_outside_videos(self):
+        """Should delete the files of the prefix outside of the video directories."""
+        out = StringIO()
+        call_command(
+            "collect_orphan_files",
+            "--grace-period=0",
+            "--outside-videos",
+            "--prefix=uploads",
+            stdout=out,
+        )
+        output = out.getvalue()
+
+        self.assertIn(
+            "Processed the files of uploads outside of the video directories", output
+        )
+        self.assertIn("Deleted 2 orphan files (12\xa0bytes)", output)
+        self.assertFalse(video_storage.exists("uploads/never-transcoded.mp4"))
+
+    def test_collect_orphan_files_outside_videos_without_prefix(self):
+        """The files outside of the videos should only be swept under a prefix."""
+        for args in (["--outside-videos"], ["--outside-videos", "--prefix=/"]):
+            with self.assertRaises(CommandError):
+                call_command("collect_orphan_files", *args, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("collect_orphan_files", "--prefix=uploads", stdout=StringIO())
+
+        self.assertTrue(video_storage.exists("video-command/orphan.mp4"))
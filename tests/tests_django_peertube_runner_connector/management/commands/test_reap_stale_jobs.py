@@ -0,0 +1,52 @@
+"""Test the reap_stale_jobs management command."""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerJobFactory, VideoFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
+
+
+@patch(
+    "django_peertube_runner_connector.utils.stale_jobs."
+    "send_available_jobs_ping_to_runners"
+)
+class ReapStaleJobsTestCase(TestCase):
+    """Test the reap_stale_jobs management command."""
+
+    def setUp(self):
+        """Create a processing job not updated for five minutes."""
+        self.runner_job = RunnerJobFactory(
+            state=RunnerJobState.PROCESSING,
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            privatePayload={"videoUUID": str(VideoFactory().uuid)},
+        )
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(
+            updatedAt=timezone.now() - timedelta(minutes=5)
+        )
+
+    def test_reap_stale_jobs_default_timeout(self, _mock_ping):
+        """The job should not be reaped before the default timeout."""
+        out = StringIO()
+        call_command("reap_stale_jobs", stdout=out)
+
+        self.assertIn("Reaped 0 stale jobs", out.getvalue())
+
+    def test_reap_stale_jobs_timeout(self, _mock_ping):
+        """The job should be reaped after the given timeout."""
+        out = StringIO()
+        call_command("reap_stale_jobs", "--timeout=60", stdout=out)
+
+        self.assertIn(
+            f"Job {self.runner_job.uuid} (vod-hls-transcoding) pending", out.getvalue()
+        )
+        self.assertIn("Reaped 1 stale jobs", out.getvalue())
@@ -0,0 +1,72 @@
+"""Test the simulate_runners management command."""
+
+from io import StringIO
+import logging
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from django_peertube_runner_connector.models import (
+    Runner,
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+    Video,
+)
+
+
+class SimulateRunnersTestCase(TestCase):
+    """Test the simulate_runners management command."""
+
+    def setUp(self):
+        """disable logging"""
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        """restore logging"""
+        logging.disable(logging.NOTSET)
+
+    def test_simulate_runners(self):
+        """The fake runners should transcode the synthetic videos."""
+        out = StringIO()
+        call_command(
+            "simulate_runners",
+            "--runners=2",
+            "--videos=2",
+            "--height=480",
+            "--host=testserver",
+            "--seed=1",
+            stdout=out,
+        )
+
+        self.assertEqual(Video.objects.count(), 2)
+        jobs = RunnerJob.objects.all()
+        self.assertTrue(jobs.exists())
+        self.assertFalse(jobs.exclude(state=RunnerJobState.COMPLETED).exists())
+        self.assertFalse(Runner.objects.exists())
+        self.assertIn(f"success: {jobs.count()}", out.getvalue())
+        self.assertIn(f"Processed {jobs.count()} jobs", out.getvalue())
+        self.assertIn("the 2 runners taking their turn sequentially", out.getvalue())
+
+    @override_settings(
+        TRANSCODING_RETRY_BACKOFF_DELAYS={job_type: 0 for job_type in RunnerJobType}
+    )
+    def test_simulate_runners_failures(self):
+        """The jobs should be retried, without backoff, until they fail too often."""
+        out = StringIO()
+        call_command(
+            "simulate_runners",
+            "--runners=1",
+            "--videos=1",
+            "--height=480",
+            "--host=testserver",
+            "--failure-rate=1",
+            stdout=out,
+        )
+
+        self.assertFalse(
+            RunnerJob.objects.exclude(
+                state__in=[RunnerJobState.ERRORED, RunnerJobState.PARENT_ERRORED]
+            ).exists()
+        )
+        self.assertIn("error:", out.getvalue())
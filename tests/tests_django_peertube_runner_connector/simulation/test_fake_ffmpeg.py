@@ -0,0 +1,67 @@
+"""Test the "fake_ffmpeg.py" simulation file."""
+
+import os
+import tempfile
+
+from django.test import TestCase
+
+import ffmpeg
+
+from django_peertube_runner_connector.simulation.fake_ffmpeg import (
+    FAKE_JPEG,
+    build_probe,
+    fake_ffmpeg,
+)
+from django_peertube_runner_connector.utils.ffprobe import (
+    get_video_stream_dimensions_info,
+    get_video_stream_duration,
+    get_video_stream_fps,
+    has_audio_stream,
+)
+
+
+class FakeFFmpegTestCase(TestCase):
+    """Test the fake ffmpeg simulation file."""
+
+    def test_build_probe(self):
+        """The probe should describe the requested video."""
+        probe = build_probe("source.mp4", duration=120, height=720, fps=25)
+
+        self.assertEqual(get_video_stream_duration("", existing_probe=probe), 120)
+        self.assertEqual(get_video_stream_fps(probe), 25)
+        self.assertTrue(has_audio_stream(probe))
+        self.assertEqual(
+            get_video_stream_dimensions_info("", existing_probe=probe)["resolution"],
+            720,
+        )
+
+    def test_build_probe_hls_file(self):
+        """The files of a HLS job should have the dimensions of their resolution."""
+        probe = build_probe("video-480-fragmented.mp4", has_audio=False)
+
+        self.assertEqual(
+            get_video_stream_dimensions_info("", existing_probe=probe),
+            {
+                "width": 852,
+                "height": 480,
+                "ratio": 852 / 480,
+                "resolution": 480,
+                "isPortraitMode": False,
+            },
+        )
+        self.assertFalse(has_audio_stream(probe))
+
+    def test_fake_ffmpeg(self):
+        """ffmpeg should be replaced by the stubs in the context only."""
+        with fake_ffmpeg(duration=10):
+            self.assertEqual(
+                ffmpeg.probe("source.mp4"), build_probe("source.mp4", duration=10)
+            )
+
+            with tempfile.TemporaryDirectory() as directory:
+                output_path = os.path.join(directory, "thumbnail.jpg")
+                ffmpeg.run(ffmpeg.input("source.mp4").output(output_path))
+                with open(output_path, "rb") as output_file:
+                    self.assertEqual(output_file.read(), FAKE_JPEG)
+
+        self.assertNotIn("Mock", type(ffmpeg.probe).__name__)
@@ -0,0 +1,101 @@
+"""Test the "fake_runner.py" simulation file."""
+
+import logging
+
+from django.test import TestCase
+
+from django_peertube_runner_connector.factories import (
+    RunnerJobFactory,
+    RunnerRegistrationTokenFactory,
+    VideoFactory,
+)
+from django_peertube_runner_connector.models import (
+    Runner,
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+    Video,
+)
+from django_peertube_runner_connector.simulation.fake_ffmpeg import fake_ffmpeg
+from django_peertube_runner_connector.simulation.fake_runner import (
+    FakeRunner,
+    simulate_runners,
+)
+
+
+class FakeRunnerTestCase(TestCase):
+    """Test the fake runner simulation file."""
+
+    def setUp(self):
+        """Create a registration token and pending jobs."""
+        RunnerRegistrationTokenFactory(registrationToken="registrationToken")
+        self.runner_jobs = [
+            RunnerJobFactory(
+                type=RunnerJobType.VOD_HLS_TRANSCODING,
+                payload={"output": {"resolution": "720", "fps": 30}},
+                privatePayload={"videoUUID": str(VideoFactory().uuid)},
+            )
+            for _ in range(3)
+        ]
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        """restore logging"""
+        logging.disable(logging.NOTSET)
+
+    def test_run_once_success(self):
+        """The runner should process a job and upload its results."""
+        runner = FakeRunner("runner", "registrationToken")
+        runner.register()
+
+        with fake_ffmpeg():
+            self.assertEqual(runner.run_once(), "success")
+
+        runner_job = RunnerJob.objects.get(state=RunnerJobState.COMPLETED)
+        self.assertEqual(runner_job.runner.name, "runner")
+        video = Video.objects.get(uuid=runner_job.privatePayload["videoUUID"])
+        self.assertEqual(video.files.get().resolution, 720)
+
+    def test_run_once_failure(self):
+        """The runner should report an error with a failure rate of 1."""
+        runner = FakeRunner("runner", "registrationToken", failure_rate=1)
+        runner.register()
+
+        self.assertEqual(runner.run_once(), "error")
+        runner_job = RunnerJob.objects.get(failures=1)
+        self.assertEqual(runner_job.state, RunnerJobState.PENDING)
+
+    def test_run_once_abort(self):
+        """The runner should abort the job with an abort rate of 1."""
+        runner = FakeRunner("runner", "registrationToken", abort_rate=1)
+        runner.register()
+
+        self.assertEqual(runner.run_once(), "abort")
+        self.assertEqual(runner.stats, {"abort": 1})
+
+    def test_run_once_no_job(self):
+        """The runner should do nothing when no job is available."""
+        RunnerJob.objects.update(state=RunnerJobState.COMPLETED)
+        runner = FakeRunner("runner", "registrationToken")
+        runner.register()
+
+        self.assertIsNone(runner.run_once())
+
+    def test_simulate_runners(self):
+        """The runners should process all the jobs, then unregister."""
+        runners = [
+            FakeRunner(f"runner-{index}", "registrationToken", seed=index)
+            for index in range(2)
+        ]
+
+        with fake_ffmpeg():
+            outcomes, rounds = simulate_runners(runners)
+
+        self.assertEqual(outcomes, {"success": 3})
+        self.assertEqual(rounds, 3)
+        self.assertFalse(
+            RunnerJob.objects.exclude(state=RunnerJobState.COMPLETED).exists()
+        )
+        self.assertFalse(
+            Runner.objects.filter(name__in=["runner-0", "runner-1"]).exists()
+        )
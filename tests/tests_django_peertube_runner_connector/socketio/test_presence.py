@@ -0,0 +1,193 @@
+"""Test the "presence.py" file of the socketio package."""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from django_peertube_runner_connector.factories import RunnerFactory
+from django_peertube_runner_connector.socketio.presence import (
+    PRESENCE_KEY_PREFIX,
+    LocalPresenceRegistry,
+    RedisPresenceRegistry,
+    get_presence_registry,
+    get_shared_presence_counts,
+    runner_disconnected,
+)
+
+
+def get_redis_mock(results):
+    """Return a redis client mock whose pipelines return the results given."""
+    redis = mock.MagicMock()
+    pipeline = mock.MagicMock()
+    redis.pipeline.return_value.__aenter__.return_value = pipeline
+    pipeline.execute = mock.AsyncMock(side_effect=results)
+    redis.mget = mock.AsyncMock()
+    redis.aclose = mock.AsyncMock()
+    return redis, pipeline
+
+
+class PresenceTestCase(TestCase):
+    """Test the presence registry of the runners."""
+
+    async def test_local_presence_registry(self):
+        """The connections of the runners should be counted."""
+        registry = LocalPresenceRegistry()
+        await registry.add("sid-1", "runner-1")
+        await registry.add("sid-2", "runner-1")
+        await registry.add("sid-3", "runner-2", offer_types=[])
+
+        self.assertEqual(await registry.get_offer_runners(), {"runner-2": []})
+        self.assertEqual(await registry.count_runners(), 2)
+        self.assertEqual(await registry.count_connections(), 3)
+        self.assertEqual(await registry.get_sids("runner-1"), {"sid-1", "sid-2"})
+
+        # The runner is disconnected with its last connection only
+        self.assertIsNone(await registry.remove("sid-1"))
+        self.assertEqual(await registry.remove("sid-2"), "runner-1")
+        self.assertIsNone(await registry.remove("unknown"))
+        self.assertEqual(await registry.count_runners(), 1)
+        self.assertEqual(await registry.count_connections(), 1)
+
+    @override_settings(TRANSCODING_RUNNER_PRESENCE_TTL=30)
+    @mock.patch(
+        "django_peertube_runner_connector.socketio.presence.time.time",
+        return_value=1000,
+    )
+    async def test_redis_presence_registry_add(self, _mock_time):
+        """A connection should be stored with its expiration date."""
+        redis, pipeline = get_redis_mock([[1, 1, True, 1]] * 2)
+        registry = RedisPresenceRegistry(redis)
+
+        await registry.add("sid-1", "runner-1")
+
+        pipeline.zadd.assert_has_calls(
+            [
+                mock.call(f"{PRESENCE_KEY_PREFIX}:sids", {"sid-1": 1030}),
+                mock.call(f"{PRESENCE_KEY_PREFIX}:runner:runner-1", {"sid-1": 1030}),
+                mock.call(f"{PRESENCE_KEY_PREFIX}:runners", {"runner-1": 1030}),
+            ]
+        )
+        pipeline.expire.assert_called_once_with(
+            f"{PRESENCE_KEY_PREFIX}:runner:runner-1", 30
+        )
+
+        # The heartbeat refreshes the expiration of the connections of the process
+        pipeline.zadd.reset_mock()
+        await registry.heartbeat()
+        self.assertEqual(pipeline.zadd.call_count, 3)
+
+    async def test_redis_presence_registry_remove(self):
+        """The runner should be disconnected when no process has a connection left."""
+        redis, pipeline = get_redis_mock(
+            [[1] * 4, [1] * 4, [1, 1, 0, 1], [1, 1, 0, 0], [1, 0]]
+        )
+        registry = RedisPresenceRegistry(redis)
+        await registry.add("sid-1", "runner-1")
+        await registry.add("sid-2", "runner-1")
+
+        # Another process still has a connection of the runner
+        self.assertIsNone(await registry.remove("sid-1"))
+        self.assertNotIn(
+            mock.call(f"{PRESENCE_KEY_PREFIX}:runners", "runner-1"),
+            pipeline.zrem.call_args_list,
+        )
+
+        self.assertEqual(await registry.remove("sid-2"), "runner-1")
+        pipeline.zrem.assert_has_calls(
+            [
+                mock.call(f"{PRESENCE_KEY_PREFIX}:runners", "runner-1"),
+                mock.call(f"{PRESENCE_KEY_PREFIX}:offer-runners", "runner-1"),
+            ]
+        )
+
+    async def test_redis_presence_registry_count(self):
+        """The expired members should be pruned before counting."""
+        redis, pipeline = get_redis_mock([[2, 3], [0, 5]])
+        registry = RedisPresenceRegistry(redis)
+
+        self.assertEqual(await registry.count_runners(), 3)
+        self.assertEqual(await registry.count_connections(), 5)
+        pipeline.zcard.assert_has_calls(
+            [
+                mock.call(f"{PRESENCE_KEY_PREFIX}:runners"),
+                mock.call(f"{PRESENCE_KEY_PREFIX}:sids"),
+            ]
+        )
+
+    async def test_redis_presence_registry_offer_runners(self):
+        """The job types of the runners accepting offers should be stored."""
+        redis, pipeline = get_redis_mock([[1] * 6, [0, [b"runner-1", b"runner-2"]]])
+        redis.mget.return_value = [b"vod-hls-transcoding", b""]
+        registry = RedisPresenceRegistry(redis)
+
+        await registry.add("sid-1", "runner-1", ["vod-hls-transcoding"])
+        pipeline.set.assert_called_once_with(
+            f"{PRESENCE_KEY_PREFIX}:offers:runner-1", "vod-hls-transcoding", ex=60
+        )
+
+        self.assertEqual(
+            await registry.get_offer_runners(),
+            {"runner-1": ["vod-hls-transcoding"], "runner-2": []},
+        )
+        redis.mget.assert_awaited_once_with(
+            [
+                f"{PRESENCE_KEY_PREFIX}:offers:runner-1",
+                f"{PRESENCE_KEY_PREFIX}:offers:runner-2",
+            ]
+        )
+
+    def test_get_presence_registry(self):
+        """The registry should be shared when redis is configured."""
+        self.assertIsInstance(get_presence_registry(), LocalPresenceRegistry)
+        self.assertFalse(get_presence_registry().shared)
+
+        with override_settings(
+            DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS="redis://localhost:6379/0"
+        ):
+            self.assertIsInstance(get_presence_registry(), RedisPresenceRegistry)
+
+    @override_settings(DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS="redis://localhost")
+    async def test_get_shared_presence_counts(self):
+        """The counts of the shared registry should be cached briefly."""
+        await cache.aclear()
+        redis, _pipeline = get_redis_mock([[0, 2], [0, 3], [1], [0, 3], [0, 4]])
+        registry = RedisPresenceRegistry(redis)
+        with mock.patch(
+            "django_peertube_runner_connector.socketio.presence.get_presence_registry",
+            return_value=registry,
+        ):
+            for _ in range(2):
+                self.assertEqual(
+                    await get_shared_presence_counts(),
+                    {"runners": 2, "connections": 3},
+                )
+            redis.aclose.assert_awaited_once()
+
+            # A new connection forgets the cached counts
+            await registry.add("sid-1", "runner-1")
+            self.assertEqual(
+                await get_shared_presence_counts(), {"runners": 3, "connections": 4}
+            )
+
+    async def test_get_shared_presence_counts_not_shared(self):
+        """No counts should be returned by a registry local to the process."""
+        self.assertIsNone(await get_shared_presence_counts())
+
+    def test_runner_disconnected(self):
+        """The runner_disconnected callback should be called with the runner."""
+        runner = RunnerFactory()
+        callback = mock.Mock()
+
+        runner_disconnected(runner.id)
+        callback.assert_not_called()
+
+        with override_settings(
+            TRANSCODING_RUNNER_DISCONNECTED_CALLBACK_PATH="path.to.callback"
+        ), mock.patch(
+            "django_peertube_runner_connector.socketio.presence.import_string",
+            return_value=callback,
+        ):
+            runner_disconnected(runner.id)
+
+        callback.assert_called_once_with(runner)
@@ -0,0 +1,194 @@
+"""Test the admin of the django-peertube-runner-connector app."""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from django_peertube_runner_connector.admin import EstimatedCountPaginator
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobArchive,
+    RunnerJobState,
+    RunnerJobType,
+    RunnerStats,
+)
+
+
+class RunnerJobAdminTestCase(TestCase):
+    """Test the admin of the runner jobs and their archives."""
+
+    def setUp(self):
+        """Log in as a superuser and archive a job."""
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com")
+        self.client.force_login(user)
+
+        runner_job = RunnerJobFactory(
+            state=RunnerJobState.COMPLETED, privatePayload={"videoUUID": "archived"}
+        )
+        self.archive = RunnerJobArchive.from_runner_job(runner_job)
+        self.archive.save()
+        runner_job.delete()
+
+    def test_runner_job_change_view_archived(self):
+        """An archived job should redirect to its archive."""
+        response = self.client.get(
+            reverse(
+                "admin:django_peertube_runner_connector_runnerjob_change",
+                args=(self.archive.pk,),
+            )
+        )
+
+        self.assertRedirects(
+            response,
+            reverse(
+                "admin:django_peertube_runner_connector_runnerjobarchive_change",
+                args=(self.archive.pk,),
+            ),
+        )
+
+    def test_runner_job_changelist_search_archived(self):
+        """A search matching archived jobs should point to them."""
+        response = self.client.get(
+            reverse("admin:django_peertube_runner_connector_runnerjob_changelist"),
+            {"q": str(self.archive.uuid)},
+        )
+
+        self.assertContains(response, "1 archived jobs match the search")
+
+    def test_runner_job_archive_change_view(self):
+        """An archive should be displayed read only with its payloads."""
+        response = self.client.get(
+            reverse(
+                "admin:django_peertube_runner_connector_runnerjobarchive_change",
+                args=(self.archive.pk,),
+            )
+        )
+
+        self.assertContains(response, "videoUUID")
+        self.assertNotContains(response, 'name="_save"')
+
+    def test_runner_job_changelist_queries(self):
+        """The runners and parents of the jobs should not be fetched per row."""
+        RunnerJobFactory.create_batch(
+            5, dependsOnRunnerJob=RunnerJobFactory(), state=RunnerJobState.PENDING
+        )
+        url = reverse("admin:django_peertube_runner_connector_runnerjob_changelist")
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        queries = len(context.captured_queries)
+        RunnerJobFactory.create_batch(5, dependsOnRunnerJob=RunnerJobFactory())
+        with self.assertNumQueries(queries):
+            self.client.get(url)
+
+    def test_runner_job_changelist_search_uuid(self):
+        """The jobs should be searched by exact uuid only, filtered by type."""
+        runner_job = RunnerJobFactory(type=RunnerJobType.VOD_AUDIO_MERGE_TRANSCODING)
+        RunnerJobFactory(type=RunnerJobType.VOD_HLS_TRANSCODING)
+        url = reverse("admin:django_peertube_runner_connector_runnerjob_changelist")
+
+        response = self.client.get(url, {"q": str(runner_job.uuid)})
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+        response = self.client.get(url, {"q": str(runner_job.uuid)[:8]})
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+        response = self.client.get(url, {"q": "audio-merge"})
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+        response = self.client.get(
+            url, {"type__exact": RunnerJobType.VOD_AUDIO_MERGE_TRANSCODING}
+        )
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_runner_job_changelist_estimated_count(self):
+        """The unfiltered lists above the threshold should use the estimated count."""
+        RunnerJobFactory.create_batch(3)
+        runner_jobs = RunnerJob.objects.order_by("-createdAt")
+        paginator = EstimatedCountPaginator(runner_jobs, 100)
+
+        with patch.object(paginator, "get_estimated_count", return_value=20000):
+            self.assertEqual(paginator.count, 20000)
+
+        paginator = EstimatedCountPaginator(runner_jobs, 100)
+        with patch.object(paginator, "get_estimated_count", return_value=500):
+            self.assertEqual(paginator.count, 3)
+
+        # Not supported by SQLite
+        self.assertIsNone(
+            EstimatedCountPaginator(runner_jobs, 100).get_estimated_count()
+        )
+
+    def test_runner_job_dashboard(self):
+        """The dashboard should summarize the queue of each job type, cached."""
+        cache.clear()
+        RunnerJobFactory.create_batch(
+            2, type=RunnerJobType.VOD_HLS_TRANSCODING, state=RunnerJobState.PENDING
+        )
+        RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            state=RunnerJobState.COMPLETED,
+            finishedAt=timezone.now(),
+        )
+        url = reverse("admin:django_peertube_runner_connector_runnerjob_dashboard")
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (row["type"], row["pending"], row["completed"], row["throughput"])
+                for row in response.context["rows"]
+            ],
+            [(RunnerJobType.VOD_HLS_TRANSCODING, 2, 1, 1)],
+        )
+        self.assertContains(response, "Oldest pending job")
+
+        RunnerJobFactory(state=RunnerJobState.PENDING)
+        response = self.client.get(url)
+        self.assertEqual(len(response.context["rows"]), 1)
+
+    def test_runner_job_dashboard_permission(self):
+        """The dashboard should require the permission to view the jobs."""
+        self.client.force_login(
+            get_user_model().objects.create_user("staff", is_staff=True)
+        )
+
+        response = self.client.get(
+            reverse("admin:django_peertube_runner_connector_runnerjob_dashboard")
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+
+class RunnerStatsAdminTestCase(TestCase):
+    """Test the admin of the runner stats."""
+
+    def test_runner_stats_changelist_view(self):
+        """The stats should be listed with their speed and failure rate."""
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com")
+        self.client.force_login(user)
+        RunnerStats.objects.create(
+            runner=RunnerFactory(name="fast"),
+            jobType=RunnerJobType.VOD_HLS_TRANSCODING,
+            resolution=720,
+            completedJobs=1,
+            failedJobs=1,
+            processingSeconds=60,
+            videoSeconds=120,
+        )
+
+        response = self.client.get(
+            reverse("admin:django_peertube_runner_connector_runnerstats_changelist")
+        )
+
+        self.assertContains(response, '<td class="field-encodeSpeed">2.0</td>')
+        self.assertContains(response, '<td class="field-failureRate">0.5</td>')
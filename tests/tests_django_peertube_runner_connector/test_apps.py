@@ -0,0 +1,45 @@
+"""Test the "apps.py" file."""
+
+from unittest.mock import patch
+
+from django.apps import apps
+from django.test import TestCase
+
+from django_peertube_runner_connector.apps import get_management_command
+
+
+@patch("django_peertube_runner_connector.utils.stale_jobs.start_stale_job_reaper")
+class AppsTestCase(TestCase):
+    """Test the app config."""
+
+    def test_get_management_command(self, _mock_start):
+        """The command should be read from the Django command line programs."""
+        for argv, command in (
+            (["manage.py", "migrate"], "migrate"),
+            (["/usr/bin/django-admin", "shell"], "shell"),
+            (["/venv/lib/python3/site-packages/django/__main__.py", "check"], "check"),
+            (["manage.py"], None),
+            (["/venv/bin/gunicorn", "app.wsgi"], None),
+            (["/venv/bin/uvicorn", "app.asgi:application"], None),
+        ):
+            self.assertEqual(get_management_command(argv), command)
+
+    def test_ready_starts_the_reaper_in_servers(self, mock_start):
+        """The reaper should be started by the servers and runserver."""
+        app_config = apps.get_app_config("django_peertube_runner_connector")
+
+        for argv in (["/venv/bin/gunicorn", "app.wsgi"], ["manage.py", "runserver"]):
+            with patch("sys.argv", argv):
+                app_config.ready()
+
+        self.assertEqual(mock_start.call_count, 2)
+
+    def test_ready_skips_the_reaper_in_management_commands(self, mock_start):
+        """The reaper should not be started by the other management commands."""
+        app_config = apps.get_app_config("django_peertube_runner_connector")
+
+        for argv in (["manage.py", "migrate"], ["manage.py", "shell"]):
+            with patch("sys.argv", argv):
+                app_config.ready()
+
+        mock_start.assert_not_called()
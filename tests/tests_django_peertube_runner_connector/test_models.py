@@ -1,7 +1,7 @@
 """Tests for the models of the django_peertube_runner_connector app"""
 
 from datetime import timedelta
-from unittest.mock import call, patch
+from unittest.mock import patch
 
 from django.test import TestCase
 from django.utils import timezone
@@ -14,7 +14,11 @@ from django_peertube_runner_connector.factories import (
     VideoJobInfoFactory,
 )
 from django_peertube_runner_connector.models import (
+    Runner,
+    RunnerJob,
     RunnerJobState,
+    RunnerJobType,
+    RunnerStats,
     VideoFile,
     VideoJobInfo,
     VideoJobInfoColumnType,
@@ -22,7 +26,7 @@ from django_peertube_runner_connector.models import (
 )
 
 
-class TestModel(TestCase):
+class TestModel(TestCase):  # pylint: disable=too-many-public-methods
     """Tests helper methods for the models"""
 
     def setUp(self):
@@ -67,13 +71,20 @@ class TestModel(TestCase):
             lastContact=timezone.now() - timedelta(minutes=10),
             ip="127.0.0.1",
         )
+        Runner.objects.filter(pk=runner.pk).update(
+            updatedAt=timezone.now() - timedelta(minutes=10)
+        )
         # Call the update_last_contact method with a new IP address
         runner.update_last_contact("192.168.0.1")
 
         # Check that the lastContact and ip fields were updated
+        runner.refresh_from_db()
         self.assertAlmostEqual(
             runner.lastContact, timezone.now(), delta=timedelta(seconds=1)
         )
+        self.assertAlmostEqual(
+            runner.updatedAt, timezone.now(), delta=timedelta(seconds=1)
+        )
         self.assertEqual(runner.ip, "192.168.0.1")
 
     def test_update_last_contact_within_5_minutes(self):
@@ -104,8 +115,11 @@ class TestModel(TestCase):
             finishedAt=None,
         )
 
-        runner_job.set_to_error_or_cancel(RunnerJobState.ERRORED)
+        runner_job.error = "Error"
+        runner_job.set_to_error_or_cancel(RunnerJobState.ERRORED, "error")
+        runner_job.refresh_from_db()
 
+        self.assertEqual(runner_job.error, "Error")
         self.assertEqual(runner_job.state, RunnerJobState.ERRORED)
         self.assertIsNone(runner_job.processingJobToken)
         self.assertIsNotNone(runner_job.finishedAt)
@@ -121,9 +135,12 @@ class TestModel(TestCase):
             progress=0.5,
         )
 
-        runner_job.reset_to_pending()
+        runner_job.failures = 1
+        runner_job.reset_to_pending("failures")
+        runner_job.refresh_from_db()
 
         self.assertEqual(runner_job.state, RunnerJobState.PENDING)
+        self.assertEqual(runner_job.failures, 1)
         self.assertIsNone(runner_job.processingJobToken)
         self.assertIsNone(runner_job.progress)
         self.assertIsNone(runner_job.startedAt)
@@ -153,6 +170,95 @@ class TestModel(TestCase):
         self.assertEqual(child1.state, RunnerJobState.PENDING)
         self.assertEqual(child2.state, RunnerJobState.PENDING)
 
+    def test_bulk_update_progress(self):
+        """Should save the progress of several jobs with a single query."""
+        runner_jobs = RunnerJobFactory.create_batch(
+            3, state=RunnerJobState.PROCESSING, progress=5
+        )
+        RunnerJob.objects.update(updatedAt=timezone.now() - timedelta(hours=1))
+
+        with self.assertNumQueries(1):
+            updated = RunnerJob.objects.bulk_update_progress(
+                {runner_jobs[0].pk: 50, runner_jobs[1].pk: None}
+            )
+
+        self.assertEqual(updated, 2)
+        for runner_job, progress, renewed in zip(
+            runner_jobs, (50, 5, 5), (True, True, False)
+        ):
+            runner_job.refresh_from_db()
+            self.assertEqual(runner_job.progress, progress)
+            self.assertEqual(
+                runner_job.updatedAt > timezone.now() - timedelta(minutes=1), renewed
+            )
+        self.assertEqual(RunnerJob.objects.bulk_update_progress({}), 0)
+
+    def test_runner_job_renew_lease(self):
+        """Should only renew the lease held with the job token, with one query."""
+        runner_job = RunnerJobFactory(
+            state=RunnerJobState.PROCESSING, processingJobToken="ptrjt-token"
+        )
+        runner_job.progress = 50
+
+        with self.assertNumQueries(1):
+            self.assertTrue(runner_job.renew_lease("progress"))
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 50)
+        self.assertGreater(runner_job.leaseExpiresAt, timezone.now())
+        self.assertTrue(runner_job.is_leased("ptrjt-token"))
+        self.assertFalse(runner_job.is_leased("other-token"))
+        self.assertFalse(runner_job.is_leased(None))
+        self.assertEqual(
+            list(RunnerJob.objects.filter_leased("ptrjt-token")), [runner_job]
+        )
+
+        # An expired lease is not renewed anymore
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            leaseExpiresAt=timezone.now() - timedelta(seconds=1)
+        )
+        runner_job.progress = 60
+        self.assertFalse(runner_job.renew_lease("progress"))
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 50)
+        self.assertFalse(runner_job.is_leased("ptrjt-token"))
+        self.assertFalse(RunnerJob.objects.filter_leased("ptrjt-token").exists())
+
+    def test_runner_job_descendants_of(self):
+        """Should list the jobs depending directly or not on a job."""
+        runner_job = RunnerJobFactory()
+        child = RunnerJobFactory(dependsOnRunnerJob=runner_job)
+        grandchild = RunnerJobFactory(dependsOnRunnerJob=child)
+        great_grandchild = RunnerJobFactory(dependsOnRunnerJob=grandchild)
+        RunnerJobFactory(dependsOnRunnerJob=RunnerJobFactory())
+
+        with self.assertNumQueries(1):
+            self.assertCountEqual(
+                RunnerJob.objects.descendants_of(runner_job),
+                [child, grandchild, great_grandchild],
+            )
+        self.assertEqual(list(RunnerJob.objects.descendants_of(great_grandchild)), [])
+
+    def test_get_in_flight_runner_jobs(self):
+        """Should list the unfinished runner jobs of the video."""
+        private_payload = {"videoUUID": str(self.video.uuid)}
+        pending_job = RunnerJobFactory(privatePayload=private_payload)
+        processing_job = RunnerJobFactory(
+            state=RunnerJobState.PROCESSING, privatePayload=private_payload
+        )
+        RunnerJobFactory(state=RunnerJobState.COMPLETED, privatePayload=private_payload)
+        RunnerJobFactory(privatePayload={"videoUUID": str(VideoFactory().uuid)})
+
+        self.assertCountEqual(
+            self.video.get_in_flight_runner_jobs(), [pending_job, processing_job]
+        )
+        # The jobs are read from the index of their video uuid
+        self.assertEqual(str(pending_job.videoUUID), str(self.video.uuid))
+        self.assertIn(
+            "runnerjob_video_uuid_idx",
+            self.video.get_in_flight_runner_jobs().explain(),
+        )
+
     def test_get_max_quality_file_with_not_file(self):
         """Should return None because no files exist"""
 
@@ -170,19 +276,18 @@ class TestModel(TestCase):
 
         self.assertEqual(video_file2, max_quality_file)
 
-    @patch("django_peertube_runner_connector.models.video_storage")
-    def test_remove_all_web_video_files(self, mock_storage):
-        """Should call video_storage.delete() for every related video_file and delete them"""
+    @patch("django_peertube_runner_connector.models.delete_stored_files")
+    def test_remove_all_web_video_files(self, mock_delete_stored_files):
+        """Should delete every related video_file at once and delete them"""
         video_file1 = VideoFileFactory(video=self.video)
         video_file2 = VideoFileFactory(video=self.video)
 
         self.video.remove_all_web_video_files()
 
-        mock_storage.delete.assert_has_calls(
-            [
-                call(video_file1.filename),
-                call(video_file2.filename),
-            ]
+        mock_delete_stored_files.assert_called_once()
+        self.assertCountEqual(
+            mock_delete_stored_files.call_args.args[0],
+            [video_file1.filename, video_file2.filename],
         )
         self.assertFalse(VideoFile.objects.filter(video=self.video).exists())
 
@@ -245,3 +350,119 @@ class TestModel(TestCase):
         job_info.refresh_from_db()
         self.assertEqual(num_jobs, 3)
         self.assertEqual(job_info.pendingMove, 3)
+
+    def test_decrease_job_info_amount(self):
+        """Should decrease a JobInfo model column by the given amount."""
+        job_info = VideoJobInfoFactory(video=self.video, pendingTranscode=4)
+        num_jobs = self.video.decrease_job_info(
+            VideoJobInfoColumnType.PENDING_TRANSCODE, 3
+        )
+
+        job_info.refresh_from_db()
+        self.assertEqual(num_jobs, 1)
+        self.assertEqual(job_info.pendingTranscode, 1)
+
+    def test_decrease_job_info_missing(self):
+        """Should return None when the video has no JobInfo."""
+        self.assertIsNone(
+            self.video.decrease_job_info(VideoJobInfoColumnType.PENDING_TRANSCODE)
+        )
+
+    def test_runner_stats_record(self):
+        """Should create the stats of a runner then increment them."""
+        runner = RunnerFactory()
+
+        RunnerStats.objects.record(
+            runner.id, RunnerJobType.VOD_HLS_TRANSCODING, 720, completedJobs=1
+        )
+        with self.assertNumQueries(1):
+            RunnerStats.objects.record(
+                runner.id, RunnerJobType.VOD_HLS_TRANSCODING, 720, completedJobs=1
+            )
+
+        stats = RunnerStats.objects.get(runner=runner)
+        self.assertEqual(stats.completedJobs, 2)
+        self.assertEqual(stats.failedJobs, 0)
+
+    def test_runner_stats_get_encode_speeds(self):
+        """Should combine the speeds of the runners per job type and resolution."""
+        for video_seconds in (100, 300):
+            RunnerStats.objects.create(
+                runner=RunnerFactory(),
+                jobType=RunnerJobType.VOD_HLS_TRANSCODING,
+                resolution=720,
+                completedJobs=1,
+                processingSeconds=100,
+                videoSeconds=video_seconds,
+            )
+        RunnerStats.objects.create(
+            runner=RunnerFactory(),
+            jobType=RunnerJobType.VIDEO_TRANSCRIPTION,
+            failedJobs=1,
+        )
+
+        self.assertEqual(
+            RunnerStats.objects.get_encode_speeds(),
+            {(RunnerJobType.VOD_HLS_TRANSCODING, 720): 2},
+        )
+
+    def test_runner_stats_properties(self):
+        """Should compute the speed, failure rate and throughput of the stats."""
+        stats = RunnerStats(
+            completedJobs=3,
+            failedJobs=1,
+            processingSeconds=1800,
+            videoSeconds=3600,
+        )
+
+        self.assertEqual(stats.encodeSpeed, 2)
+        self.assertEqual(stats.failureRate, 0.25)
+        self.assertEqual(stats.throughput, 6)
+        self.assertIsNone(RunnerStats().encodeSpeed)
+        self.assertIsNone(RunnerStats().failureRate)
+        self.assertIsNone(RunnerStats().throughput)
+
+    def test_runner_job_get_queue_summary(self):
+        """Should summarize the queue of each job type with a single query."""
+        old_job = RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING, state=RunnerJobState.PENDING
+        )
+        RunnerJob.objects.filter(pk=old_job.pk).update(
+            createdAt=timezone.now() - timedelta(hours=2)
+        )
+        RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING, state=RunnerJobState.PROCESSING
+        )
+        RunnerJobFactory(
+            type=RunnerJobType.VIDEO_TRANSCRIPTION,
+            state=RunnerJobState.ERRORED,
+            finishedAt=timezone.now(),
+        )
+        RunnerJobFactory(
+            type=RunnerJobType.VIDEO_TRANSCRIPTION,
+            state=RunnerJobState.COMPLETED,
+            finishedAt=timezone.now() - timedelta(hours=2),
+        )
+
+        with self.assertNumQueries(1):
+            summary = RunnerJob.objects.get_queue_summary(timedelta(hours=1))
+
+        self.assertEqual(
+            summary,
+            {
+                RunnerJobType.VIDEO_TRANSCRIPTION: {
+                    "pending": 0,
+                    "processing": 0,
+                    "completed": 0,
+                    "errored": 1,
+                    "oldestPendingAt": None,
+                },
+                RunnerJobType.VOD_HLS_TRANSCODING: {
+                    "pending": 1,
+                    "processing": 1,
+                    "completed": 0,
+                    "errored": 0,
+                    "oldestPendingAt": RunnerJob.objects.get(pk=old_job.pk).createdAt,
+                },
+            },
+        )
@@ -1,13 +1,22 @@
 """Tests for the "socket.py" file of the django_peertube_runner_connector app"""
 
+from datetime import timedelta
 from unittest import mock
 
 from django.test import TestCase, override_settings
+from django.utils import timezone
 
-from django_peertube_runner_connector.factories import RunnerFactory
+from asgiref.sync import sync_to_async
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import RunnerJobState, RunnerJobType
 from django_peertube_runner_connector.socket import (
+    ALL_JOB_TYPES_ROOM,
+    accept_offer,
     connect,
     disconnect,
+    get_runner_rooms,
+    presence,
     send_available_jobs_ping_to_runners,
 )
 
@@ -20,14 +29,59 @@ class TestSocket(TestCase):
         self.runner = RunnerFactory()
 
     @mock.patch("django_peertube_runner_connector.socket.logger")
-    @mock.patch("django_peertube_runner_connector.socket.sio")
-    async def test_socket_connect(self, _mock_sio, mock_logger):
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    async def test_socket_connect(self, mock_sio, mock_logger):
         """Known runner should be able to connect to the server."""
-        await connect(45115, None, {"runnerToken": self.runner.runnerToken})
+        with mock.patch(
+            "django_peertube_runner_connector.socket.presence.add",
+            new_callable=mock.AsyncMock,
+        ) as mock_add:
+            await connect(45115, None, {"runnerToken": self.runner.runnerToken})
+
+        mock_add.assert_awaited_once_with(45115, str(self.runner.id), offer_types=None)
 
         mock_logger.info.assert_called_with(
             "Runner with token %s connected with sid %s", self.runner.runnerToken, 45115
         )
+        mock_sio.enter_room.assert_awaited_once_with(
+            45115, ALL_JOB_TYPES_ROOM, namespace="/runners"
+        )
+
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    async def test_socket_connect_job_types(self, mock_sio):
+        """A runner should join the rooms of the job types it declares."""
+        await connect(
+            45115,
+            None,
+            {
+                "runnerToken": self.runner.runnerToken,
+                "jobTypes": [RunnerJobType.VIDEO_TRANSCRIPTION],
+            },
+        )
+
+        mock_sio.enter_room.assert_awaited_once_with(
+            45115, "job-type:video-transcription", namespace="/runners"
+        )
+
+    def test_socket_get_runner_rooms(self):
+        """The unknown job types should be ignored."""
+        self.assertEqual(get_runner_rooms({}), [ALL_JOB_TYPES_ROOM])
+        self.assertEqual(
+            get_runner_rooms({"jobTypes": ["unknown"]}), [ALL_JOB_TYPES_ROOM]
+        )
+        self.assertEqual(
+            get_runner_rooms(
+                {"jobTypes": "vod-hls-transcoding,vod-audio-merge-transcoding,unknown"}
+            ),
+            [
+                "job-type:vod-hls-transcoding",
+                "job-type:vod-audio-merge-transcoding",
+            ],
+        )
 
     @mock.patch("django_peertube_runner_connector.socket.logger")
     @mock.patch(
@@ -52,6 +106,23 @@ class TestSocket(TestCase):
 
         mock_logger.info.assert_called_with("%s disconnected", 45115)
 
+    @mock.patch("django_peertube_runner_connector.socket.runner_disconnected")
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    async def test_socket_disconnect_last_connection(
+        self, _mock_sio, mock_runner_disconnected
+    ):
+        """The runner_disconnected hook should be called on the last connection."""
+        await connect(1, None, {"runnerToken": self.runner.runnerToken})
+        await connect(2, None, {"runnerToken": self.runner.runnerToken})
+
+        await disconnect(1)
+        mock_runner_disconnected.assert_not_called()
+
+        await disconnect(2)
+        mock_runner_disconnected.assert_called_once_with(str(self.runner.id))
+
     @mock.patch(
         "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
     )
@@ -59,17 +130,54 @@ class TestSocket(TestCase):
         """server with no manager should directly use sio to emit a message."""
         await send_available_jobs_ping_to_runners()
 
-        mock_sio.emit.assert_called_with("available-jobs", namespace="/runners")
+        mock_sio.emit.assert_called_with(
+            "available-jobs", data=None, namespace="/runners", room=None
+        )
+
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    async def test_socket_send_available_jobs_ping_to_job_type_rooms(self, mock_sio):
+        """Only the runners processing the types of the new jobs should be pinged."""
+        await send_available_jobs_ping_to_runners(
+            [RunnerJobType.VOD_HLS_TRANSCODING, RunnerJobType.VOD_HLS_TRANSCODING]
+        )
+
+        mock_sio.emit.assert_called_with(
+            "available-jobs",
+            data=None,
+            namespace="/runners",
+            room=[ALL_JOB_TYPES_ROOM, "job-type:vod-hls-transcoding"],
+        )
+
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    @mock.patch(
+        "django_peertube_runner_connector.socket.get_shared_presence_counts",
+        return_value={"runners": 0, "connections": 0},
+    )
+    async def test_socket_send_available_jobs_ping_no_runner_connected(
+        self, _mock_counts, mock_sio
+    ):
+        """The ping should be skipped when the shared registry has no connection."""
+        await send_available_jobs_ping_to_runners()
+
+        mock_sio.emit.assert_not_called()
 
     @mock.patch(
         "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
     )
+    @mock.patch(
+        "django_peertube_runner_connector.socket.get_shared_presence_counts",
+        return_value={"runners": 1, "connections": 1},
+    )
     @override_settings(
         DJANGO_PEERTUBE_RUNNER_CONNECTOR_SENTINELS=[("localhost", 26379)]
     )
     @override_settings(DJANGO_PEERTUBE_RUNNER_CONNECTOR_SENTINELS_MASTER="mymaster")
     async def test_socket_send_available_jobs_ping_with_sentinel_manager(
-        self, _mock_sio
+        self, _mock_counts, _mock_sio
     ):
         """
         When a sentinel is used as client manager, this one should be used to emit a message
@@ -84,16 +192,22 @@ class TestSocket(TestCase):
             await send_available_jobs_ping_to_runners()
 
         mock_manager.emit.assert_awaited_once_with(
-            "available-jobs", data=None, namespace="/runners"
+            "available-jobs", data=None, namespace="/runners", room=None
         )
 
     @mock.patch(
         "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
     )
+    @mock.patch(
+        "django_peertube_runner_connector.socket.get_shared_presence_counts",
+        return_value={"runners": 1, "connections": 1},
+    )
     @override_settings(
         DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS="redis://localhost:6379/0"
     )
-    async def test_socket_send_available_jobs_ping_with_redis_manager(self, _mock_sio):
+    async def test_socket_send_available_jobs_ping_with_redis_manager(
+        self, _mock_counts, _mock_sio
+    ):
         """When redis is used as client manager, this one should be used to emit a message"""
         mock_manager = mock.AsyncMock()
         mock_manager.emit = mock.AsyncMock()
@@ -105,5 +219,79 @@ class TestSocket(TestCase):
             await send_available_jobs_ping_to_runners()
 
         mock_manager.emit.assert_awaited_once_with(
-            "available-jobs", data=None, namespace="/runners"
+            "available-jobs", data=None, namespace="/runners", room=None
+        )
+
+    @override_settings(TRANSCODING_PUSH_DISPATCH=True)
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    async def test_socket_job_offer(self, mock_sio):
+        """An idle runner accepting offers should be pushed a job on connection."""
+        runner_job = await sync_to_async(RunnerJobFactory)(
+            runner=None, type=RunnerJobType.VOD_HLS_TRANSCODING
+        )
+        sid = "offer-sid"
+        await connect(
+            sid,
+            None,
+            {
+                "runnerToken": self.runner.runnerToken,
+                "jobTypes": [RunnerJobType.VOD_HLS_TRANSCODING],
+                "jobOffers": True,
+            },
+        )
+
+        mock_sio.enter_room.assert_any_await(
+            sid, f"runner:{self.runner.id}", namespace="/runners"
+        )
+        offer = mock_sio.emit.call_args.kwargs["data"]
+        mock_sio.emit.assert_awaited_once_with(
+            "job-offer",
+            data=offer,
+            namespace="/runners",
+            room=f"runner:{self.runner.id}",
+        )
+        self.assertEqual(offer["job"]["uuid"], str(runner_job.uuid))
+
+        # The runner acknowledges the offer and is attributed the job
+        response = await accept_offer(sid, {"jobUUID": offer["job"]["uuid"]})
+        self.assertEqual(response["job"]["uuid"], str(runner_job.uuid))
+        self.assertEqual(response["job"]["state"]["id"], RunnerJobState.PROCESSING)
+        self.assertTrue(response["job"]["jobToken"])
+
+        # The offer is consumed
+        self.assertEqual(
+            await accept_offer(sid, {"jobUUID": offer["job"]["uuid"]}),
+            {"error": "This job is not offered to the runner anymore"},
+        )
+        await presence.remove(sid)
+
+    async def test_socket_accept_offer_expired(self):
+        """A runner should not be attributed a job whose offer expired."""
+        runner_job = await sync_to_async(RunnerJobFactory)(
+            runner=self.runner,
+            offerExpiresAt=timezone.now() - timedelta(seconds=1),
+        )
+        await presence.add("expired-sid", str(self.runner.id))
+
+        self.assertEqual(
+            await accept_offer("expired-sid", {"jobUUID": str(runner_job.uuid)}),
+            {"error": "This job is not offered to the runner anymore"},
+        )
+        await presence.remove("expired-sid")
+
+        # An unknown connection cannot accept offers
+        self.assertIn("error", await accept_offer("unknown-sid", None))
+
+    @override_settings(TRANSCODING_PUSH_DISPATCH=True)
+    @mock.patch(
+        "django_peertube_runner_connector.socket.sio", new_callable=mock.AsyncMock
+    )
+    async def test_socket_send_available_jobs_ping_with_offers(self, mock_sio):
+        """The ping should follow the offers, for the runners not accepting them."""
+        await send_available_jobs_ping_to_runners()
+
+        mock_sio.emit.assert_awaited_once_with(
+            "available-jobs", data=None, namespace="/runners", room=None
         )
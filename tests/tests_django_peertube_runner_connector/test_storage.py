@@ -1,11 +1,21 @@
 """Test the storage file."""
 
 import tempfile
+from unittest.mock import Mock, patch
 
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
+from django.utils import timezone
 
-from django_peertube_runner_connector.storage import ConfiguredStorage
+from django_peertube_runner_connector.storage import (
+    ConfiguredStorage,
+    StorageBatch,
+    StorageBatchError,
+    delete_stored_files,
+    list_stored_files,
+    video_storage,
+)
 
 
 class TestStorage(TestCase):
@@ -35,3 +45,133 @@ class TestStorage(TestCase):
         storage = ConfiguredStorage()
         self.assertTrue(storage.exists("random_file"))
         self.assertEqual(storage.path("random_file"), f"{self.tempdir}/random_file")
+
+
+class TestStorageBatch(TestCase):
+    """Test the StorageBatch class."""
+
+    def test_storage_batch_saves_files_concurrently(self):
+        """The batch should save all the files and return their names in order."""
+        with StorageBatch() as batch:
+            first = batch.save("batch/first.txt", ContentFile(b"first"))
+            second = batch.save("batch/second.txt", ContentFile(b"second"))
+
+        self.assertEqual(first.result(), "batch/first.txt")
+        self.assertEqual(second.result(), "batch/second.txt")
+        self.assertEqual(video_storage.open("batch/first.txt").read(), b"first")
+        self.assertEqual(video_storage.open("batch/second.txt").read(), b"second")
+
+    def test_storage_batch_wait_returns_results(self):
+        """Waiting for the batch should return the results in submission order."""
+        batch = StorageBatch(max_workers=2)
+        batch.submit(lambda value: value * 2, 1)
+        batch.submit(lambda value: value * 2, 2)
+        batch.submit(lambda value: value * 2, 3)
+
+        self.assertEqual(batch.wait(), [2, 4, 6])
+        # The batch can be reused once awaited
+        batch.submit(lambda: "again")
+        self.assertEqual(batch.wait(), ["again"])
+
+    def test_storage_batch_aggregates_errors(self):
+        """Every failed operation should be reported once all operations ended."""
+
+        def fail(message):
+            raise ValueError(message)
+
+        batch = StorageBatch()
+        batch.save("batch/ok.txt", ContentFile(b"ok"))
+        batch.submit(fail, "first error")
+        batch.submit(fail, "second error")
+
+        with self.assertRaises(StorageBatchError) as context:
+            batch.wait()
+
+        self.assertEqual(
+            [str(error) for error in context.exception.errors],
+            ["first error", "second error"],
+        )
+        self.assertTrue(video_storage.exists("batch/ok.txt"))
+
+    def test_storage_batch_keeps_caller_exception(self):
+        """An exception raised in the context should not be hidden by the batch."""
+        with self.assertRaises(KeyError):
+            with StorageBatch() as batch:
+                batch.save("batch/context.txt", ContentFile(b"context"))
+                raise KeyError("caller error")
+
+        self.assertTrue(video_storage.exists("batch/context.txt"))
+
+
+# pylint: disable=protected-access
+
+
+class TestStoredFiles(TestCase):
+    """Test the functions listing and deleting stored files."""
+
+    def test_list_stored_files(self):
+        """Should list the files of a directory recursively."""
+        video_storage.save("listing/first.txt", ContentFile(b"first"))
+        video_storage.save("listing/nested/second.txt", ContentFile(b"second"))
+
+        self.assertCountEqual(
+            [(name, size) for name, size, _ in list_stored_files("listing")],
+            [("listing/first.txt", 5), ("listing/nested/second.txt", 6)],
+        )
+        self.assertEqual(list(list_stored_files("missing")), [])
+
+    def test_delete_stored_files(self):
+        """Should delete all the given files."""
+        video_storage.save("deleting/first.txt", ContentFile(b"first"))
+        video_storage.save("deleting/second.txt", ContentFile(b"second"))
+
+        delete_stored_files(["deleting/first.txt", None, "deleting/second.txt"])
+
+        self.assertFalse(video_storage.exists("deleting/first.txt"))
+        self.assertFalse(video_storage.exists("deleting/second.txt"))
+
+    @patch("django_peertube_runner_connector.storage.video_storage")
+    def test_list_stored_files_s3(self, mock_storage):
+        """S3 storages should list the files page by page."""
+        mock_storage.location = "media"
+        mock_storage._normalize_name.side_effect = lambda name: f"media/{name}"
+        modified_time = timezone.now()
+        mock_storage.bucket.objects.filter.return_value.page_size.return_value = [
+            Mock(key="media/listing/first.txt", size=5, last_modified=modified_time)
+        ]
+
+        self.assertEqual(
+            list(list_stored_files("listing")),
+            [("listing/first.txt", 5, modified_time)],
+        )
+        mock_storage.bucket.objects.filter.assert_called_once_with(
+            Prefix="media/listing/"
+        )
+        mock_storage.bucket.objects.filter.return_value.page_size.assert_called_once_with(
+            1000
+        )
+
+    @patch("django_peertube_runner_connector.storage.video_storage")
+    def test_delete_stored_files_s3(self, mock_storage):
+        """S3 storages should delete up to 1000 files per request."""
+        mock_storage._normalize_name.side_effect = lambda name: name
+        mock_storage.bucket.delete_objects.side_effect = [
+            {},
+            {"Errors": [{"Key": "file-1000", "Message": "Access denied"}]},
+        ]
+
+        with self.assertRaises(StorageBatchError) as context:
+            delete_stored_files([f"file-{index}" for index in range(1001)])
+
+        self.assertEqual(mock_storage.bucket.delete_objects.call_count, 2)
+        self.assertEqual(
+            len(
+                mock_storage.bucket.delete_objects.call_args_list[0].kwargs["Delete"][
+                    "Objects"
+                ]
+            ),
+            1000,
+        )
+        self.assertEqual(
+            str(context.exception.errors[0]), "Cannot delete file-1000: Access denied"
+        )
@@ -1,5 +1,6 @@
 """Tests for the "transcode.py" file of the django_peertube_runner_connector app"""
 
+import threading
 from unittest.mock import patch
 
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -8,11 +9,16 @@ from django.test import TestCase
 import ffmpeg
 
 from django_peertube_runner_connector.factories import VideoFactory, VideoFileFactory
+from django_peertube_runner_connector.models import Video
 from django_peertube_runner_connector.storage import VideoNotFoundError, video_storage
 from django_peertube_runner_connector.transcode import (
     _process_transcoding,
+    build_idempotency_key,
     transcode_video,
 )
+from django_peertube_runner_connector.utils.video_state import (
+    move_to_failed_transcoding_state,
+)
 
 
 class TestTranscode(TestCase):
@@ -52,6 +58,126 @@ class TestTranscode(TestCase):
             domain="https://example.com",
         )
 
+    @patch("django_peertube_runner_connector.transcode._process_transcoding")
+    def test_transcode_twice(self, mock_process):
+        """Should return the existing video when the same file is submitted again."""
+        video_url = video_storage.save(
+            "test_directory/file.mp4", SimpleUploadedFile("file.mp4", b"content")
+        )
+
+        created_video = transcode_video(
+            video_url, "test_directory", "https://example.com"
+        )
+        with self.assertLogs("django_peertube_runner_connector.transcode", "INFO"):
+            existing_video = transcode_video(
+                video_url, "test_directory", "https://example.com"
+            )
+
+        self.assertEqual(existing_video, created_video)
+        self.assertEqual(
+            created_video.idempotencyKey,
+            build_idempotency_key(video_url, "test_directory"),
+        )
+        mock_process.assert_called_once()
+
+        # Another destination is another transcoding request
+        other_video = transcode_video(
+            video_url, "other_directory", "https://example.com"
+        )
+        self.assertNotEqual(other_video, created_video)
+
+    @patch("django_peertube_runner_connector.transcode._process_transcoding")
+    def test_transcode_new_file_version(self, mock_process):
+        """Should transcode a file overwritten with a new version again."""
+        video_url = video_storage.save(
+            "test_directory/file.mp4", SimpleUploadedFile("file.mp4", b"content")
+        )
+        created_video = transcode_video(
+            video_url, "test_directory", "https://example.com"
+        )
+
+        video_storage.delete(video_url)
+        video_storage.save(video_url, SimpleUploadedFile("file.mp4", b"new content"))
+        new_video = transcode_video(video_url, "test_directory", "https://example.com")
+
+        self.assertNotEqual(new_video, created_video)
+        self.assertEqual(mock_process.call_count, 2)
+
+    @patch("django_peertube_runner_connector.transcode._process_transcoding")
+    def test_transcode_idempotency_key(self, mock_process):
+        """Should deduplicate the requests with the key given by the caller."""
+        video_url = video_storage.save(
+            "test_directory/file.mp4", SimpleUploadedFile("file.mp4", b"content")
+        )
+        existing_video = VideoFactory(idempotencyKey="upload-42")
+
+        video = transcode_video(
+            video_url,
+            "test_directory",
+            "https://example.com",
+            idempotency_key="upload-42",
+        )
+
+        self.assertEqual(video, existing_video)
+        mock_process.assert_not_called()
+
+    @patch("django_peertube_runner_connector.transcode._process_transcoding")
+    def test_transcode_error_releases_idempotency_key(self, mock_process):
+        """Should let a request failing be submitted again."""
+        video_url = video_storage.save(
+            "test_directory/file.mp4", SimpleUploadedFile("file.mp4", b"content")
+        )
+        mock_process.side_effect = OSError("probe failed")
+
+        with self.assertRaises(OSError):
+            transcode_video(video_url, "test_directory", "https://example.com")
+
+        mock_process.side_effect = None
+        video = transcode_video(video_url, "test_directory", "https://example.com")
+
+        self.assertIsNotNone(video.idempotencyKey)
+        self.assertEqual(mock_process.call_count, 2)
+
+    @patch("django_peertube_runner_connector.transcode._process_transcoding")
+    def test_transcode_failed_video_releases_idempotency_key(self, mock_process):
+        """Should let a request whose transcoding failed be submitted again."""
+        video_url = video_storage.save(
+            "test_directory/file.mp4", SimpleUploadedFile("file.mp4", b"content")
+        )
+        failed_video = transcode_video(
+            video_url, "test_directory", "https://example.com"
+        )
+        move_to_failed_transcoding_state(failed_video)
+
+        video = transcode_video(video_url, "test_directory", "https://example.com")
+
+        self.assertNotEqual(video, failed_video)
+        self.assertEqual(mock_process.call_count, 2)
+
+    @patch("django_peertube_runner_connector.transcode._process_transcoding")
+    def test_transcode_idempotency_key_released_concurrently(self, mock_process):
+        """Should create the video when the key is released before its lookup."""
+        video_url = video_storage.save(
+            "test_directory/file.mp4", SimpleUploadedFile("file.mp4", b"content")
+        )
+        failing_video = VideoFactory(idempotencyKey="upload-42")
+
+        def release_key(**_kwargs):
+            Video.objects.filter(pk=failing_video.pk).update(idempotencyKey=None)
+            raise Video.DoesNotExist
+
+        with patch.object(Video.objects, "get", side_effect=release_key):
+            video = transcode_video(
+                video_url,
+                "test_directory",
+                "https://example.com",
+                idempotency_key="upload-42",
+            )
+
+        self.assertNotEqual(video, failing_video)
+        self.assertEqual(video.idempotencyKey, "upload-42")
+        mock_process.assert_called_once()
+
     @patch.object(ffmpeg, "probe")
     @patch("django_peertube_runner_connector.transcode.build_new_file")
     @patch("django_peertube_runner_connector.transcode.get_video_stream_duration")
@@ -97,3 +223,59 @@ class TestTranscode(TestCase):
 
         self.assertEqual(video.duration, 900)
         self.assertEqual(video.thumbnailFilename, "thumbnail.jpg")
+
+    @patch.object(ffmpeg, "probe")
+    @patch("django_peertube_runner_connector.transcode.build_new_file")
+    @patch("django_peertube_runner_connector.transcode.get_video_stream_duration")
+    @patch("django_peertube_runner_connector.transcode.build_video_thumbnails")
+    @patch("django_peertube_runner_connector.transcode.create_transcoding_jobs")
+    # pylint: disable=too-many-positional-arguments
+    def test_process_transcoding_thumbnail_thread(
+        self, _mock_transcoding, mock_thumbnails, mock_duration, mock_build, _mock_probe
+    ):
+        """The thumbnail should be built in a thread closing its connections."""
+        video = VideoFactory(directory="test_directory")
+        mock_build.return_value = VideoFileFactory(video=video)
+        mock_duration.return_value = 900
+        threads = []
+        mock_thumbnails.side_effect = lambda **kwargs: threads.append(
+            threading.current_thread()
+        )
+
+        with patch(
+            "django_peertube_runner_connector.transcode.connections"
+        ) as mock_connections:
+            _process_transcoding(
+                video=video, video_path="test_directory/file.mp4", domain="domain"
+            )
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        mock_connections.close_all.assert_called_once()
+
+    @patch.object(ffmpeg, "probe")
+    @patch("django_peertube_runner_connector.transcode.build_new_file")
+    @patch("django_peertube_runner_connector.transcode.get_video_stream_duration")
+    @patch("django_peertube_runner_connector.transcode.build_video_thumbnails")
+    @patch("django_peertube_runner_connector.transcode.create_transcoding_jobs")
+    # pylint: disable=too-many-positional-arguments
+    def test_process_transcoding_thumbnail_error(
+        self, mock_transcoding, mock_thumbnails, mock_duration, mock_build, _mock_probe
+    ):
+        """A thumbnail failure should not prevent the transcoding jobs creation."""
+        video = VideoFactory(directory="test_directory", thumbnailFilename=None)
+        mock_build.return_value = VideoFileFactory(video=video)
+        mock_duration.return_value = 900
+        mock_thumbnails.side_effect = OSError("ffmpeg error")
+
+        with self.assertLogs("django_peertube_runner_connector.transcode", "ERROR"):
+            _process_transcoding(
+                video=video,
+                video_path="test_directory/file.mp4",
+                domain="domain",
+            )
+
+        mock_transcoding.assert_called_once()
+        video.refresh_from_db()
+        self.assertEqual(video.duration, 900)
+        self.assertIsNone(video.thumbnailFilename)
@@ -1,16 +1,21 @@
 """Test the abstract job handler."""
 
 from datetime import timedelta
-from unittest.mock import Mock, call, patch
+from unittest.mock import Mock, patch
 
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from django_peertube_runner_connector.factories import RunnerJobFactory, VideoFactory
-from django_peertube_runner_connector.models import RunnerJobState, RunnerJobType
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
 from django_peertube_runner_connector.utils.job_handlers.vod_hls_transcoding_job_handler import (
     VODHLSTranscodingJobHandler,
 )
+from django_peertube_runner_connector.utils.progress import get_live_progress
 
 
 class TestAbstractJobHandler(TestCase):
@@ -68,7 +73,7 @@ class TestAbstractJobHandler(TestCase):
         self.assertEqual(runner_job.priority, 0)
         self.assertIsNone(runner_job.dependsOnRunnerJob)
 
-        mock_ping.assert_called_once()
+        mock_ping.assert_called_once_with([RunnerJobType.VOD_HLS_TRANSCODING])
 
     @patch(
         "django_peertube_runner_connector.utils.job_handlers."
@@ -99,6 +104,9 @@ class TestAbstractJobHandler(TestCase):
         """Should update the progress of the runner job."""
         handler = VODHLSTranscodingJobHandler()
         handler.specific_update = Mock()
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(
+            state=RunnerJobState.PROCESSING
+        )
         handler.update(
             runner_job=self.runner_job,
             progress=100,
@@ -112,6 +120,9 @@ class TestAbstractJobHandler(TestCase):
         """Should not update the progress of the runner job."""
         handler = VODHLSTranscodingJobHandler()
         handler.specific_update = Mock()
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(
+            state=RunnerJobState.PROCESSING
+        )
         handler.update(
             runner_job=self.runner_job,
             progress=None,
@@ -121,6 +132,67 @@ class TestAbstractJobHandler(TestCase):
         self.assertEqual(self.runner_job.progress, 50)
         handler.specific_update.assert_called_once_with(self.runner_job, None)
 
+    def test_update_with_small_progress(self):
+        """Should keep a small progress change in the cache only."""
+        handler = VODHLSTranscodingJobHandler()
+        handler.specific_update = Mock()
+        runner_job = RunnerJobFactory(
+            state=RunnerJobState.PROCESSING,
+            progress=50,
+            leaseExpiresAt=timezone.now() + timedelta(minutes=10),
+        )
+
+        # The lease is only checked in memory
+        with self.assertNumQueries(0):
+            self.assertTrue(handler.update(runner_job=runner_job, progress="55"))
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 50)
+        self.assertEqual(get_live_progress(runner_job), 55)
+
+        # The lease is renewed once less than half of it is left
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            leaseExpiresAt=timezone.now() + timedelta(minutes=4)
+        )
+        runner_job.refresh_from_db()
+        with self.assertNumQueries(1):
+            self.assertTrue(handler.update(runner_job=runner_job, progress="55"))
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 50)
+        self.assertGreater(
+            runner_job.leaseExpiresAt, timezone.now() + timedelta(minutes=9)
+        )
+
+        # The progress is saved once it was not for the persist interval
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            updatedAt=timezone.now() - timedelta(minutes=2)
+        )
+        runner_job.refresh_from_db()
+        with self.assertNumQueries(1):
+            handler.update(runner_job=runner_job, progress="56")
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 56)
+        self.assertGreater(runner_job.updatedAt, timezone.now() - timedelta(minutes=1))
+
+    def test_update_with_a_lost_lease(self):
+        """Should not update a job whose lease was reclaimed in the meantime."""
+        handler = VODHLSTranscodingJobHandler()
+        handler.specific_update = Mock()
+        runner_job = RunnerJobFactory(state=RunnerJobState.PROCESSING, progress=50)
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            state=RunnerJobState.PENDING, processingJobToken=None
+        )
+
+        with self.assertNumQueries(1):
+            self.assertFalse(handler.update(runner_job=runner_job, progress="80"))
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 50)
+        self.assertEqual(get_live_progress(runner_job), 50)
+        handler.specific_update.assert_not_called()
+
     @patch(
         "django_peertube_runner_connector.utils.job_handlers."
         "abstract_job_handler.send_available_jobs_ping_to_runners"
@@ -143,7 +215,7 @@ class TestAbstractJobHandler(TestCase):
             self.runner_job,
             {"test": "test"},
         )
-        mock_ping.assert_called_once()
+        mock_ping.assert_called_once_with([RunnerJobType.VOD_HLS_TRANSCODING])
 
         runner_job.refresh_from_db()
 
@@ -214,22 +286,52 @@ class TestAbstractJobHandler(TestCase):
         )
         handler = VODHLSTranscodingJobHandler()
         handler.specific_cancel = Mock()
+        handler.specific_bulk_cancel = Mock()
         handler.cancel(
             runner_job=self.runner_job,
             from_parent=False,
         )
 
-        handler.specific_cancel.assert_has_calls(
-            [
-                call(self.runner_job),
-                call(runner_job),
-            ]
-        )
+        handler.specific_cancel.assert_called_once_with(self.runner_job)
+        handler.specific_bulk_cancel.assert_called_once_with([runner_job])
 
         runner_job.refresh_from_db()
         self.assertEqual(self.runner_job.state, RunnerJobState.CANCELLED)
         self.assertEqual(runner_job.state, RunnerJobState.PARENT_CANCELLED)
 
+    def test_cancel_job_tree(self):
+        """Should cancel the whole job tree with a constant number of queries."""
+        child = RunnerJobFactory(
+            state=RunnerJobState.WAITING_FOR_PARENT_JOB,
+            dependsOnRunnerJob=self.runner_job,
+        )
+        completed_child = RunnerJobFactory(
+            state=RunnerJobState.COMPLETED,
+            dependsOnRunnerJob=self.runner_job,
+        )
+        grandchildren = RunnerJobFactory.create_batch(
+            3,
+            state=RunnerJobState.WAITING_FOR_PARENT_JOB,
+            dependsOnRunnerJob=child,
+        )
+        handler = VODHLSTranscodingJobHandler()
+        handler.specific_cancel = Mock()
+        handler.specific_bulk_cancel = Mock()
+
+        # Save the job, fetch its descendants and update them
+        with self.assertNumQueries(3):
+            handler.cancel(runner_job=self.runner_job)
+
+        [cancelled_jobs] = handler.specific_bulk_cancel.call_args.args
+        self.assertCountEqual(cancelled_jobs, [child, *grandchildren])
+        for runner_job in [child, *grandchildren]:
+            runner_job.refresh_from_db()
+            self.assertEqual(runner_job.state, RunnerJobState.PARENT_CANCELLED)
+            self.assertIsNone(runner_job.processingJobToken)
+            self.assertIsNotNone(runner_job.finishedAt)
+        completed_child.refresh_from_db()
+        self.assertEqual(completed_child.state, RunnerJobState.COMPLETED)
+
     def test_abort_with_abort_supported(self):
         """Should reset the state of the runner job."""
         handler = VODHLSTranscodingJobHandler()
@@ -289,6 +391,34 @@ class TestAbstractJobHandler(TestCase):
             self.runner_job.finishedAt, timezone.now(), delta=timedelta(seconds=1)
         )
 
+    @override_settings(TRANSCODING_RUNNER_MAX_FAILURE=1)
+    def test_error_job_tree(self):
+        """Should set the jobs depending on an errored job to parent errored."""
+        child = RunnerJobFactory(
+            state=RunnerJobState.WAITING_FOR_PARENT_JOB,
+            dependsOnRunnerJob=self.runner_job,
+        )
+        grandchild = RunnerJobFactory(
+            state=RunnerJobState.WAITING_FOR_PARENT_JOB,
+            dependsOnRunnerJob=child,
+        )
+        handler = VODHLSTranscodingJobHandler()
+        handler.specific_error = Mock()
+        handler.specific_bulk_error = Mock()
+        handler.error(runner_job=self.runner_job, message="Test")
+
+        handler.specific_error.assert_called_once_with(
+            self.runner_job, "Test", RunnerJobState.ERRORED
+        )
+        [errored_jobs, message, next_state] = handler.specific_bulk_error.call_args.args
+        self.assertCountEqual(errored_jobs, [child, grandchild])
+        self.assertEqual(message, "Parent error")
+        self.assertEqual(next_state, RunnerJobState.PARENT_ERRORED)
+        for runner_job in [child, grandchild]:
+            runner_job.refresh_from_db()
+            self.assertEqual(runner_job.state, RunnerJobState.PARENT_ERRORED)
+            self.assertEqual(runner_job.error, "Parent error")
+
     def test_error_with_abort_not_supported(self):
         """Should put the runner job in error state."""
         handler = VODHLSTranscodingJobHandler()
@@ -76,3 +76,29 @@ class TestAbstractVODTranscodingJobHandler(TestCase):
         mock_move.assert_called_once_with(video=self.video)
         self.job_info.refresh_from_db()
         self.assertEqual(self.job_info.pendingTranscode, 0)
+
+    @patch(
+        "django_peertube_runner_connector.utils.job_handlers."
+        "abstract_vod_transcoding_job_handler.move_to_next_state"
+    )
+    def test_specific_bulk_cancel(self, mock_move):
+        """Should decrease pendingTranscode once per video of the cancelled jobs."""
+        other_video = VideoFactory()
+        other_job_info = VideoJobInfoFactory(video=other_video, pendingTranscode=3)
+        self.job_info.pendingTranscode = 2
+        self.job_info.save()
+        runner_jobs = [
+            RunnerJobFactory(privatePayload={"videoUUID": str(video.uuid)})
+            for video in [self.video, self.video, other_video]
+        ]
+
+        handler = VODHLSTranscodingJobHandler()
+        # Load the videos, then decrease and read each counter
+        with self.assertNumQueries(5):
+            handler.specific_bulk_cancel(runner_jobs)
+
+        mock_move.assert_called_once_with(video=self.video)
+        self.job_info.refresh_from_db()
+        self.assertEqual(self.job_info.pendingTranscode, 0)
+        other_job_info.refresh_from_db()
+        self.assertEqual(other_job_info.pendingTranscode, 2)
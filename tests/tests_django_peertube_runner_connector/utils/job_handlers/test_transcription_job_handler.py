@@ -73,6 +73,18 @@ class TestTranscriptionJobHandler(TestCase):
         self.job_info.refresh_from_db()
         self.assertEqual(self.job_info.pendingTranscript, 0)
 
+    def test_specific_bulk_cancel(self):
+        """Should decrease pendingTranscript by the number of cancelled jobs."""
+        self.job_info.pendingTranscript = 3
+        self.job_info.save()
+        other_job = RunnerJobFactory(privatePayload=self.runner_job.privatePayload)
+        handler = TranscriptionJobHandler()
+
+        handler.specific_bulk_cancel([self.runner_job, other_job])
+
+        self.job_info.refresh_from_db()
+        self.assertEqual(self.job_info.pendingTranscript, 1)
+
     def test_create(self):
         """Should be able to create a VIDEO_TRANSCRIPTION runner job."""
         handler = TranscriptionJobHandler()
@@ -12,6 +12,7 @@ from django_peertube_runner_connector.factories import (
     VideoJobInfoFactory,
 )
 from django_peertube_runner_connector.models import RunnerJobType
+from django_peertube_runner_connector.storage import video_storage
 from django_peertube_runner_connector.utils.job_handlers.vod_hls_transcoding_job_handler import (
     VODHLSTranscodingJobHandler,
 )
@@ -81,10 +82,6 @@ class TestVODHLSTranscodingJobHandler(TestCase):
         "django_peertube_runner_connector.utils.job_handlers."
         "vod_hls_transcoding_job_handler.on_transcoding_ended"
     )
-    @patch(
-        "django_peertube_runner_connector.utils.job_handlers."
-        "vod_hls_transcoding_job_handler.rename_video_file_in_playlist"
-    )
     @patch(
         "django_peertube_runner_connector.utils.job_handlers."
         "vod_hls_transcoding_job_handler.build_new_file",
@@ -98,7 +95,6 @@ class TestVODHLSTranscodingJobHandler(TestCase):
         self,
         mock_generate_hls,
         mock_build_new_file,
-        mock_rename_video,
         mock_on_transcoding_ended,
         mock_on_hls_video,
     ):
@@ -128,7 +124,9 @@ class TestVODHLSTranscodingJobHandler(TestCase):
             "file.mp4", b"file_content", content_type="video/mp4"
         )
         uploaded_playlist_file = SimpleUploadedFile(
-            "file.m3u8", b"file_content", content_type="video/mp4"
+            "file.m3u8",
+            b"#EXTM3U\n11111111-2222-3333-4444-555555555555-720-fragmented.mp4\n",
+            content_type="video/mp4",
         )
 
         result_payload = {
@@ -146,9 +144,21 @@ class TestVODHLSTranscodingJobHandler(TestCase):
             "/4b3bbd37-4e87-48a9-8f26-c04c0b9fdbb5-720-fragmented.mp4",
         )
 
-        mock_rename_video.assert_called_once_with(
-            "test_filename.m3u8",
-            "test_filename",
+        video_filename = (
+            "video-123e4567-e89b-12d3-a456-426655440002"
+            "/4b3bbd37-4e87-48a9-8f26-c04c0b9fdbb5-720-fragmented.mp4"
+        )
+        self.assertEqual(
+            video_storage.open(video_filename).read(),
+            b"file_content",
+        )
+        # The playlist is saved next to the video file and references its new name
+        self.assertEqual(
+            video_storage.open(
+                "video-123e4567-e89b-12d3-a456-426655440002"
+                "/4b3bbd37-4e87-48a9-8f26-c04c0b9fdbb5-720.m3u8"
+            ).read(),
+            b"#EXTM3U\n4b3bbd37-4e87-48a9-8f26-c04c0b9fdbb5-720-fragmented.mp4\n",
         )
 
         mock_on_hls_video.assert_called_once_with(
@@ -159,3 +169,69 @@ class TestVODHLSTranscodingJobHandler(TestCase):
             move_video_to_next_state=True,
             video=self.video,
         )
+
+    def complete_job(self, video):
+        """Complete a VOD_HLS_TRANSCODING job of the video with a 720p result."""
+        runner_job = RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            payload={"output": {"resolution": "720", "fps": 30}},
+            privatePayload={"videoUUID": str(video.uuid)},
+        )
+        result_payload = {
+            "video_file": SimpleUploadedFile("file.mp4", b"file_content"),
+            "resolution_playlist_file": SimpleUploadedFile(
+                "file.m3u8",
+                b"#EXTM3U\n11111111-2222-3333-4444-555555555555-720-fragmented.mp4\n",
+            ),
+        }
+        VODHLSTranscodingJobHandler().specific_complete(runner_job, result_payload)
+
+    @patch(
+        "django_peertube_runner_connector.utils.job_handlers."
+        "vod_hls_transcoding_job_handler.on_hls_video_file_transcoding"
+    )
+    @patch(
+        "django_peertube_runner_connector.utils.job_handlers."
+        "vod_hls_transcoding_job_handler.on_transcoding_ended"
+    )
+    @patch(
+        "django_peertube_runner_connector.utils.job_handlers."
+        "vod_hls_transcoding_job_handler.build_new_file",
+    )
+    def test_specific_complete_unique_names(self, mock_build_new_file, *_mocks):
+        """The files should be saved under unique names, referenced as saved."""
+        video = VideoFactory(directory="video-unique", baseFilename="base")
+
+        self.complete_job(video)
+        self.complete_job(video)
+
+        filenames = [
+            call.kwargs["filename"] for call in mock_build_new_file.call_args_list
+        ]
+        self.assertEqual(len(set(filenames)), 2)
+        for filename in filenames:
+            self.assertRegex(
+                filename, r"^video-unique/base-[a-f0-9]{32}-720-fragmented\.mp4$"
+            )
+            self.assertEqual(video_storage.open(filename).read(), b"file_content")
+            self.assertEqual(
+                video_storage.open(filename.replace("-fragmented.mp4", ".m3u8")).read(),
+                f"#EXTM3U\n{filename.split('/')[-1]}\n".encode(),
+            )
+
+    @patch(
+        "django_peertube_runner_connector.utils.job_handlers."
+        "vod_hls_transcoding_job_handler.build_new_file",
+    )
+    def test_specific_complete_renamed_files(self, mock_build_new_file):
+        """The job should fail when the storage saves the files under other names."""
+        video = VideoFactory(directory="video-renamed", baseFilename="base")
+
+        with patch.object(
+            type(video_storage._wrapped),  # pylint: disable=protected-access
+            "get_available_name",
+            lambda storage, name, max_length=None: f"{name}.renamed",
+        ), self.assertRaises(ValueError):
+            self.complete_job(video)
+
+        mock_build_new_file.assert_not_called()
@@ -0,0 +1,111 @@
+"""Test the "eta.py" utils file."""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import (
+    RunnerFactory,
+    RunnerJobFactory,
+    VideoFactory,
+)
+from django_peertube_runner_connector.models import (
+    RunnerJobState,
+    RunnerJobType,
+    RunnerStats,
+)
+from django_peertube_runner_connector.utils.eta import estimate_video, get_video_eta
+from django_peertube_runner_connector.utils.progress import set_live_progress
+
+
+class EtaTestCase(TestCase):
+    """Test the eta utils file."""
+
+    def setUp(self):
+        """Create a video of 10 minutes and the history of a runner."""
+        cache.clear()
+        self.video = VideoFactory(duration=600)
+        RunnerStats.objects.create(
+            runner=RunnerFactory(lastContact=timezone.now()),
+            jobType=RunnerJobType.VOD_HLS_TRANSCODING,
+            resolution=720,
+            completedJobs=10,
+            processingSeconds=3000,
+            videoSeconds=6000,
+        )
+
+    def create_job(self, resolution, **kwargs):
+        """Create an HLS job of the video."""
+        return RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            payload={"output": {"resolution": resolution}},
+            privatePayload={"videoUUID": str(self.video.uuid)},
+            runner=None,
+            **kwargs,
+        )
+
+    def test_estimate_video_without_jobs(self):
+        """A video without jobs in flight should be done."""
+        self.assertEqual(
+            estimate_video(self.video),
+            {"estimatedSeconds": 0, "queuePosition": None, "inFlightJobs": 0},
+        )
+
+    @override_settings(TRANSCODING_ETA_DEFAULT_ENCODE_SPEED=0.5)
+    def test_estimate_video_ladder(self):
+        """The rungs should be encoded after the queued jobs and their parent."""
+        RunnerJobFactory.create_batch(
+            2, state=RunnerJobState.PENDING, schedulingRank=0, runner=None
+        )
+        main_job = self.create_job(720, state=RunnerJobState.PENDING, schedulingRank=1)
+        self.create_job(
+            480,
+            state=RunnerJobState.WAITING_FOR_PARENT_JOB,
+            dependsOnRunnerJob=main_job,
+        )
+
+        # 2 jobs of 300s ahead for 1 active runner, 300s at 720p, 1200s at 480p
+        self.assertEqual(
+            estimate_video(self.video),
+            {
+                "estimatedSeconds": 600 + 300 + 1200,
+                "queuePosition": 2,
+                "inFlightJobs": 2,
+            },
+        )
+
+    def test_estimate_video_progress(self):
+        """The time left to a processing job should follow its live progress."""
+        runner_job = self.create_job(
+            720,
+            state=RunnerJobState.PROCESSING,
+            processingJobToken="token",
+            startedAt=timezone.now() - timedelta(seconds=100),
+            progress=None,
+        )
+
+        # Without progress, the expected encode time not elapsed yet
+        self.assertEqual(estimate_video(self.video)["estimatedSeconds"], 200)
+
+        set_live_progress(runner_job, 80)
+        self.assertEqual(estimate_video(self.video)["estimatedSeconds"], 25)
+
+    def test_get_video_eta_cached(self):
+        """The estimation should be cached and count down."""
+        self.create_job(720, state=RunnerJobState.PENDING, schedulingRank=1)
+
+        eta = get_video_eta(self.video)
+        self.assertEqual(eta["videoUUID"], str(self.video.uuid))
+        self.assertEqual(eta["estimatedSeconds"], 300)
+        self.assertAlmostEqual(
+            eta["estimatedAt"],
+            timezone.now() + timedelta(seconds=300),
+            delta=timedelta(seconds=1),
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_video_eta(self.video)["estimatedAt"], eta["estimatedAt"]
+            )
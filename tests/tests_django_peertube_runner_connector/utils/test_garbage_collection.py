@@ -0,0 +1,165 @@
+"""Test the "garbage_collection.py" utils file."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase
+
+from django_peertube_runner_connector.factories import (
+    VideoFactory,
+    VideoFileFactory,
+    VideoStreamingPlaylistFactory,
+)
+from django_peertube_runner_connector.storage import video_storage
+from django_peertube_runner_connector.utils.garbage_collection import (
+    collect_orphan_files,
+    find_files_outside_videos,
+    find_orphan_files,
+    get_referenced_files,
+)
+
+
+class GarbageCollectionTestCase(TestCase):
+    """Test the garbage collection utils file."""
+
+    def setUp(self):
+        """Create a video with referenced and orphan files."""
+        # The collection walks the storage, where other tests leave files
+        storage_patcher = patch.object(video_storage, "_wrapped", InMemoryStorage())
+        storage_patcher.start()
+        self.addCleanup(storage_patcher.stop)
+        self.video = VideoFactory(
+            directory="video-gc",
+            thumbnailFilename="video-gc/thumbnail.jpg",
+            transcriptFileName=None,
+        )
+        playlist = VideoStreamingPlaylistFactory(
+            video=self.video, playlistFilename="video-gc/master.m3u8"
+        )
+        VideoFileFactory(
+            video=self.video,
+            filename="video-gc/video-720-fragmented.mp4",
+            streamingPlaylist=playlist,
+        )
+        self.filenames = [
+            "video-gc/thumbnail.jpg",
+            "video-gc/master.m3u8",
+            "video-gc/video-720-fragmented.mp4",
+            "video-gc/video-720.m3u8",
+            "video-gc/orphan-480-fragmented.mp4",
+            "video-gc/nested/orphan.m3u8",
+            "deleted-video/video-720.mp4",
+            "uploads/video-gc/source.mp4",
+            "uploads/never-transcoded.mp4",
+        ]
+        for filename in self.filenames:
+            video_storage.save(filename, ContentFile(b"content"))
+
+    def tearDown(self):
+        """Delete the stored files."""
+        for filename in self.filenames:
+            video_storage.delete(filename)
+
+    def test_get_referenced_files(self):
+        """Should return every file referenced by the video and its files."""
+        self.assertEqual(
+            get_referenced_files(self.video),
+            {
+                "video-gc/thumbnail.jpg",
+                "video-gc/master.m3u8",
+                "video-gc/video-720-fragmented.mp4",
+                "video-gc/video-720.m3u8",
+            },
+        )
+
+    def test_find_orphan_files(self):
+        """Should return the unreferenced files older than the grace period."""
+        self.assertCountEqual(
+            find_orphan_files(self.video, grace_period=timedelta(0)),
+            [
+                ("video-gc/orphan-480-fragmented.mp4", 7),
+                ("video-gc/nested/orphan.m3u8", 7),
+            ],
+        )
+
+    def test_find_orphan_files_during_grace_period(self):
+        """Recent files should be kept, they may belong to a job being completed."""
+        self.assertEqual(find_orphan_files(self.video, grace_period=timedelta(1)), [])
+
+    def test_collect_orphan_files(self):
+        """Should delete the orphan files and report each batch."""
+        other_video = VideoFactory(directory="video-gc-empty")
+
+        batches = list(collect_orphan_files(grace_period=timedelta(0), batch_size=1))
+
+        self.assertEqual(
+            [last_video_id for last_video_id, _ in batches],
+            sorted([self.video.id, other_video.id]),
+        )
+        self.assertFalse(video_storage.exists("video-gc/orphan-480-fragmented.mp4"))
+        self.assertFalse(video_storage.exists("video-gc/nested/orphan.m3u8"))
+        self.assertTrue(video_storage.exists("video-gc/video-720-fragmented.mp4"))
+        self.assertTrue(video_storage.exists("video-gc/video-720.m3u8"))
+        self.assertTrue(video_storage.exists("video-gc/master.m3u8"))
+        self.assertTrue(video_storage.exists("video-gc/thumbnail.jpg"))
+        # The files outside of the video directories are kept by default
+        self.assertTrue(video_storage.exists("deleted-video/video-720.mp4"))
+        self.assertTrue(video_storage.exists("uploads/never-transcoded.mp4"))
+
+    def test_collect_orphan_files_outside_videos(self):
+        """Should delete the files of the given prefix outside of the videos."""
+        batches = list(
+            collect_orphan_files(
+                grace_period=timedelta(0), outside_videos_prefix="uploads"
+            )
+        )
+
+        self.assertIsNone(batches[-1][0])
+        self.assertCountEqual(
+            batches[-1][1],
+            [("uploads/never-transcoded.mp4", 7), ("uploads/video-gc/source.mp4", 7)],
+        )
+        self.assertFalse(video_storage.exists("uploads/never-transcoded.mp4"))
+        self.assertTrue(video_storage.exists("deleted-video/video-720.mp4"))
+        self.assertFalse(video_storage.exists("video-gc/orphan-480-fragmented.mp4"))
+
+    def test_collect_orphan_files_dry_run(self):
+        """A dry run should report the orphan files without deleting them."""
+        batches = list(collect_orphan_files(grace_period=timedelta(0), dry_run=True))
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0][1]), 2)
+        self.assertTrue(video_storage.exists("video-gc/orphan-480-fragmented.mp4"))
+        self.assertTrue(video_storage.exists("uploads/never-transcoded.mp4"))
+
+    def test_find_files_outside_videos(self):
+        """Should return the unreferenced files outside of the video directories."""
+        # The source of a video may be stored outside of its directory
+        VideoFileFactory(video=self.video, filename="uploads/video-gc/source.mp4")
+
+        self.assertEqual(
+            find_files_outside_videos("uploads", timedelta(0)),
+            [("uploads/never-transcoded.mp4", 7)],
+        )
+        self.assertEqual(
+            find_files_outside_videos("/deleted-video/", timedelta(0)),
+            [("deleted-video/video-720.mp4", 7)],
+        )
+        self.assertEqual(find_files_outside_videos("uploads", timedelta(1)), [])
+
+    def test_find_files_outside_videos_without_prefix(self):
+        """The storage root should never be swept."""
+        for prefix in ("", "/"):
+            with self.assertRaises(ValueError):
+                find_files_outside_videos(prefix, timedelta(0))
+
+    def test_collect_orphan_files_start_after(self):
+        """A collection should resume after the given video."""
+        batches = list(
+            collect_orphan_files(grace_period=timedelta(0), start_after=self.video.id)
+        )
+
+        self.assertEqual(batches, [])
+        self.assertTrue(video_storage.exists("video-gc/orphan-480-fragmented.mp4"))
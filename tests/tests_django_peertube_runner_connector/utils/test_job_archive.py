@@ -0,0 +1,82 @@
+"""Test the "job_archive.py" utils file."""
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobArchive,
+    RunnerJobState,
+)
+from django_peertube_runner_connector.utils.job_archive import (
+    archive_runner_jobs,
+    get_archivable_jobs,
+    purge_archived_jobs,
+)
+
+
+class JobArchiveTestCase(TestCase):
+    """Test the job archive utils file."""
+
+    def setUp(self):
+        """Create a job tree finished two months ago."""
+        finished_at = timezone.now() - timedelta(days=60)
+        self.parent = RunnerJobFactory(
+            state=RunnerJobState.COMPLETED,
+            finishedAt=finished_at,
+            payload={"input": "video.mp4"},
+            privatePayload={"videoUUID": "uuid"},
+        )
+        self.child = RunnerJobFactory(
+            state=RunnerJobState.ERRORED,
+            finishedAt=finished_at,
+            dependsOnRunnerJob=self.parent,
+        )
+
+    def test_get_archivable_jobs(self):
+        """Only the old finished jobs no job depends on should be archivable."""
+        RunnerJobFactory(state=RunnerJobState.COMPLETED, finishedAt=timezone.now())
+        RunnerJobFactory(
+            state=RunnerJobState.PROCESSING,
+            finishedAt=timezone.now() - timedelta(days=60),
+        )
+
+        self.assertEqual(list(get_archivable_jobs()), [self.child])
+        self.assertEqual(list(get_archivable_jobs(timedelta(days=90))), [])
+
+    def test_archive_runner_jobs(self):
+        """The job tree should be archived leaf first, batch by batch."""
+        self.assertEqual(list(archive_runner_jobs(batch_size=1)), [1, 1])
+
+        self.assertFalse(RunnerJob.objects.exists())
+        parent_archive = RunnerJobArchive.objects.get(pk=self.parent.pk)
+        self.assertEqual(str(parent_archive.uuid), self.parent.uuid)
+        self.assertEqual(parent_archive.state, RunnerJobState.COMPLETED)
+        self.assertEqual(parent_archive.runner, self.parent.runner)
+        self.assertEqual(parent_archive.createdAt, self.parent.createdAt)
+        self.assertEqual(parent_archive.payload, {"input": "video.mp4"})
+        self.assertEqual(parent_archive.privatePayload, {"videoUUID": "uuid"})
+        child_archive = RunnerJobArchive.objects.get(pk=self.child.pk)
+        self.assertEqual(child_archive.dependsOnRunnerJobId, self.parent.pk)
+
+    def test_archive_runner_jobs_keeps_parent_of_unfinished_job(self):
+        """A job should not be archived while a job depending on it is not."""
+        self.child.state = RunnerJobState.PENDING
+        self.child.save()
+
+        self.assertEqual(list(archive_runner_jobs()), [])
+        self.assertEqual(RunnerJob.objects.count(), 2)
+
+    def test_purge_archived_jobs(self):
+        """The archives older than the retention should be deleted."""
+        list(archive_runner_jobs())
+
+        self.assertEqual(list(purge_archived_jobs()), [])
+        self.assertEqual(list(purge_archived_jobs(timedelta(days=90))), [])
+        with override_settings(TRANSCODING_RUNNER_JOB_ARCHIVE_RETENTION=30):
+            self.assertEqual(list(purge_archived_jobs(batch_size=1)), [1, 1])
+
+        self.assertFalse(RunnerJobArchive.objects.exists())
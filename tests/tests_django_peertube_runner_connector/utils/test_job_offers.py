@@ -0,0 +1,171 @@
+"""Test the "job_offers.py" utils file."""
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
+from django_peertube_runner_connector.utils.job_offers import (
+    accept_job_offer,
+    release_expired_offers,
+    reserve_job_offers,
+)
+
+
+class JobOffersTestCase(TestCase):
+    """Test the job offers utils file."""
+
+    def setUp(self):
+        """Create a runner and pending jobs."""
+        self.runner = RunnerFactory()
+        self.hls_job = RunnerJobFactory(
+            runner=None, type=RunnerJobType.VOD_HLS_TRANSCODING, priority=0
+        )
+        self.transcription_job = RunnerJobFactory(
+            runner=None, type=RunnerJobType.VIDEO_TRANSCRIPTION, priority=1
+        )
+
+    def offer(self, runner_job, runner=None, seconds=10):
+        """Offer a job to a runner until the given number of seconds from now."""
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            runner=runner or self.runner,
+            offerExpiresAt=timezone.now() + timedelta(seconds=seconds),
+        )
+
+    @override_settings(TRANSCODING_JOB_OFFER_TIMEOUT=30)
+    def test_reserve_job_offers(self):
+        """Each idle runner should be offered a different job of its types."""
+        other_runner = RunnerFactory()
+
+        offers = reserve_job_offers(
+            {
+                str(self.runner.id): [RunnerJobType.VIDEO_TRANSCRIPTION],
+                str(other_runner.id): [],
+            }
+        )
+
+        self.assertEqual(
+            [(runner_id, offer["job"]["uuid"]) for runner_id, offer in offers],
+            [
+                (str(self.runner.id), str(self.transcription_job.uuid)),
+                (str(other_runner.id), str(self.hls_job.uuid)),
+            ],
+        )
+        self.assertEqual(offers[0][1]["job"]["type"], RunnerJobType.VIDEO_TRANSCRIPTION)
+        self.transcription_job.refresh_from_db()
+        self.assertEqual(self.transcription_job.state, RunnerJobState.PENDING)
+        self.assertEqual(self.transcription_job.runner, self.runner)
+        self.assertAlmostEqual(
+            self.transcription_job.offerExpiresAt,
+            timezone.now() + timedelta(seconds=30),
+            delta=timedelta(seconds=5),
+        )
+
+        # The offered jobs are not available to the other runners
+        self.assertEqual(list(RunnerJob.objects.list_available_jobs()), [])
+
+    def test_reserve_job_offers_busy_runners(self):
+        """The runners processing a job or with an offer pending should be skipped."""
+        other_runner = RunnerFactory()
+        RunnerJobFactory(runner=self.runner, state=RunnerJobState.PROCESSING)
+        self.offer(self.transcription_job, other_runner)
+
+        self.assertEqual(
+            reserve_job_offers({str(self.runner.id): [], str(other_runner.id): []}),
+            [],
+        )
+
+        # An expired offer does not keep the runner busy
+        self.offer(self.transcription_job, other_runner, seconds=-1)
+        offers = reserve_job_offers({str(other_runner.id): []})
+        self.assertEqual(offers[0][1]["job"]["uuid"], str(self.hls_job.uuid))
+
+    @override_settings(TRANSCODING_DOMAIN_MAX_CONCURRENCY={"tenant.example.com": 2})
+    def test_reserve_job_offers_domain_cap(self):
+        """The offers should count against the concurrency cap of their domain."""
+        RunnerJobFactory(domain="tenant.example.com", state=RunnerJobState.PROCESSING)
+        tenant_jobs = [
+            RunnerJobFactory(
+                runner=None,
+                domain="tenant.example.com",
+                type=RunnerJobType.VOD_HLS_TRANSCODING,
+                priority=-1,
+            )
+            for _ in range(3)
+        ]
+        runners = [RunnerFactory() for _ in range(3)]
+
+        offers = reserve_job_offers(
+            {str(runner.id): [RunnerJobType.VOD_HLS_TRANSCODING] for runner in runners}
+        )
+
+        # The domain can only be offered one more job, the others wait for it
+        self.assertEqual(
+            [offer["job"]["uuid"] for _, offer in offers],
+            [str(tenant_jobs[0].uuid), str(self.hls_job.uuid)],
+        )
+        self.assertEqual(
+            RunnerJob.objects.filter(
+                domain="tenant.example.com", offerExpiresAt__isnull=False
+            ).count(),
+            1,
+        )
+
+    def test_accept_job_offer(self):
+        """A runner should be attributed the job offered to it."""
+        self.offer(self.hls_job)
+
+        runner_job = accept_job_offer(str(self.runner.id), str(self.hls_job.uuid))
+
+        self.assertEqual(runner_job, self.hls_job)
+        self.assertEqual(runner_job.runner, self.runner)
+        self.hls_job.refresh_from_db()
+        self.assertEqual(self.hls_job.state, RunnerJobState.PROCESSING)
+        self.assertEqual(self.hls_job.processingJobToken, runner_job.processingJobToken)
+        self.assertIsNone(self.hls_job.offerExpiresAt)
+
+    def test_accept_job_offer_not_offered(self):
+        """An expired offer, or a job offered to another runner, is not attributed."""
+        other_runner = RunnerFactory()
+        self.offer(self.hls_job, other_runner)
+        self.offer(self.transcription_job, seconds=-1)
+
+        for job_uuid in (self.hls_job.uuid, self.transcription_job.uuid, "unknown"):
+            self.assertIsNone(accept_job_offer(str(self.runner.id), str(job_uuid)))
+
+        self.assertEqual(
+            RunnerJob.objects.filter(state=RunnerJobState.PENDING).count(), 2
+        )
+
+    @override_settings(TRANSCODING_DOMAIN_MAX_CONCURRENCY={"tenant.example.com": 1})
+    def test_accept_job_offer_domain_cap(self):
+        """An offer should not be accepted when its domain reached its cap."""
+        tenant_job = RunnerJobFactory(runner=None, domain="tenant.example.com")
+        self.offer(tenant_job)
+        RunnerJobFactory(domain="tenant.example.com", state=RunnerJobState.PROCESSING)
+
+        self.assertIsNone(accept_job_offer(str(self.runner.id), str(tenant_job.uuid)))
+
+        tenant_job.refresh_from_db()
+        self.assertEqual(tenant_job.state, RunnerJobState.PENDING)
+        self.assertEqual(tenant_job.runner, self.runner)
+
+    def test_release_expired_offers(self):
+        """The jobs whose offer expired should be released."""
+        self.offer(self.hls_job, seconds=-1)
+        self.offer(self.transcription_job)
+
+        self.assertEqual(release_expired_offers(), {RunnerJobType.VOD_HLS_TRANSCODING})
+
+        self.hls_job.refresh_from_db()
+        self.assertIsNone(self.hls_job.runner)
+        self.assertIsNone(self.hls_job.offerExpiresAt)
+        self.transcription_job.refresh_from_db()
+        self.assertEqual(self.transcription_job.runner, self.runner)
+        self.assertEqual(release_expired_offers(), set())
@@ -0,0 +1,124 @@
+"""Test the "media_cache.py" utils file."""
+
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from django_peertube_runner_connector.storage import video_storage
+from django_peertube_runner_connector.utils.media_cache import (
+    MediaCache,
+    _fill_locks,
+    get_media_input,
+    get_media_version,
+)
+
+
+class MediaCacheTestCase(TestCase):
+    """Test the media cache utils file."""
+
+    def setUp(self):
+        """Create a cache directory and a stored video."""
+        # pylint: disable=consider-using-with
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.filename = video_storage.save(
+            "video-cache/source.MP4", ContentFile(b"source content")
+        )
+
+    def tearDown(self):
+        """Delete the cache directory and the stored video."""
+        self.cache_directory.cleanup()
+        video_storage.delete(self.filename)
+
+    def test_media_cache_get_fills_the_cache(self):
+        """A file missing from the cache should be downloaded once."""
+        media_cache = MediaCache(self.cache_directory.name)
+
+        with patch.object(video_storage, "open", wraps=video_storage.open) as mock_open:
+            path = media_cache.get(self.filename)
+            self.assertEqual(media_cache.get(self.filename), path)
+
+        mock_open.assert_called_once_with(self.filename, "rb")
+        self.assertTrue(path.startswith(self.cache_directory.name))
+        self.assertTrue(path.endswith(".mp4"))
+        with open(path, "rb") as cached_file:
+            self.assertEqual(cached_file.read(), b"source content")
+        # No temporary file is left behind
+        self.assertEqual(
+            os.listdir(self.cache_directory.name), [os.path.basename(path)]
+        )
+
+    def test_media_cache_get_forgets_the_fill_locks(self):
+        """The fill lock of an entry should be forgotten once it is filled."""
+        media_cache = MediaCache(self.cache_directory.name)
+
+        media_cache.get(self.filename)
+
+        self.assertEqual(_fill_locks, {})
+
+    def test_media_cache_get_new_version(self):
+        """An overwritten file should not be read from its previous entry."""
+        media_cache = MediaCache(self.cache_directory.name)
+        path = media_cache.get(self.filename)
+
+        with patch(
+            "django_peertube_runner_connector.utils.media_cache.get_media_version",
+            return_value="new-version",
+        ):
+            new_path = media_cache.get(self.filename)
+
+        self.assertNotEqual(path, new_path)
+        self.assertEqual(
+            media_cache.get_path(self.filename, get_media_version(self.filename)),
+            path,
+        )
+
+    def test_media_cache_evicts_least_recently_used(self):
+        """The least recently used entries should be evicted above the max size."""
+        other_filename = video_storage.save(
+            "video-cache/other.mp4", ContentFile(b"other content")
+        )
+        media_cache = MediaCache(self.cache_directory.name, max_size=20)
+
+        path = media_cache.get(self.filename)
+        os.utime(path, (0, 0))
+        other_path = media_cache.get(other_filename)
+
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(other_path))
+        video_storage.delete(other_filename)
+
+    def test_media_cache_keeps_entry_bigger_than_max_size(self):
+        """The entry just filled should be usable even if bigger than the cache."""
+        media_cache = MediaCache(self.cache_directory.name, max_size=1)
+
+        path = media_cache.get(self.filename)
+
+        self.assertTrue(os.path.exists(path))
+
+    def test_get_media_input_without_cache(self):
+        """The storage url should be used when the cache is disabled."""
+        self.assertEqual(
+            get_media_input(self.filename), video_storage.url(self.filename)
+        )
+
+    def test_get_media_input_with_cache(self):
+        """A local copy should be used when the cache is enabled."""
+        with override_settings(TRANSCODING_MEDIA_CACHE_DIR=self.cache_directory.name):
+            path = get_media_input(self.filename)
+
+        self.assertTrue(path.startswith(self.cache_directory.name))
+
+    def test_get_media_input_with_cache_error(self):
+        """The storage url should be used when the file cannot be cached."""
+        with override_settings(TRANSCODING_MEDIA_CACHE_DIR=self.cache_directory.name):
+            with patch.object(video_storage, "open", side_effect=OSError("error")):
+                with self.assertLogs(
+                    "django_peertube_runner_connector.utils.media_cache", "ERROR"
+                ):
+                    path = get_media_input(self.filename)
+
+        self.assertEqual(path, video_storage.url(self.filename))
+        self.assertEqual(os.listdir(self.cache_directory.name), [])
@@ -0,0 +1,122 @@
+"""Test the "metrics.py" utils file."""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import RunnerJobState, RunnerJobType
+from django_peertube_runner_connector.utils.metrics import (
+    ABORTS,
+    QUEUE_WAIT,
+    get_gauges,
+    increment_counter,
+    observe_duration,
+    render_metrics,
+)
+
+
+class MetricsTestCase(TestCase):
+    """Test the metrics utils file."""
+
+    def setUp(self):
+        """Clear the metrics stored in the cache."""
+        cache.clear()
+
+    def test_render_counter(self):
+        """The counters should be rendered per job type."""
+        increment_counter(ABORTS, RunnerJobType.VOD_HLS_TRANSCODING)
+        increment_counter(ABORTS, RunnerJobType.VOD_HLS_TRANSCODING, 2)
+
+        metrics = render_metrics()
+
+        self.assertIn("# TYPE peertube_runner_job_aborts_total counter", metrics)
+        self.assertIn(
+            'peertube_runner_job_aborts_total{type="vod-hls-transcoding"} 3', metrics
+        )
+        self.assertIn(
+            'peertube_runner_job_aborts_total{type="video-transcription"} 0', metrics
+        )
+
+    def test_render_histogram(self):
+        """The histogram buckets should be cumulated."""
+        for seconds in (0.5, 10, 4000):
+            observe_duration(
+                QUEUE_WAIT,
+                RunnerJobType.VIDEO_TRANSCRIPTION,
+                timedelta(seconds=seconds),
+            )
+
+        metrics = render_metrics().splitlines()
+        name = "peertube_runner_job_queue_wait_seconds"
+        labels = 'type="video-transcription"'
+
+        for bound, count in (("1", 1), ("5", 1), ("15", 2), ("3600", 2), ("+Inf", 3)):
+            self.assertIn(f'{name}_bucket{{{labels},le="{bound}"}} {count}', metrics)
+        self.assertIn(f"{name}_sum{{{labels}}} 4010.5", metrics)
+        self.assertIn(f"{name}_count{{{labels}}} 3", metrics)
+
+    def test_get_gauges_cached(self):
+        """The gauges should be computed once per cache timeout."""
+        RunnerJobFactory.create_batch(
+            2,
+            state=RunnerJobState.PENDING,
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            domain="example.com",
+            runner=None,
+        )
+        RunnerFactory(lastContact=timezone.now())
+        RunnerFactory(lastContact=timezone.now() - timedelta(hours=1))
+
+        with self.assertNumQueries(2):
+            gauges = get_gauges()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_gauges(), gauges)
+
+        self.assertEqual(
+            gauges["jobs"],
+            [
+                (
+                    RunnerJobState.PENDING,
+                    RunnerJobType.VOD_HLS_TRANSCODING,
+                    "example.com",
+                    2,
+                )
+            ],
+        )
+        self.assertEqual(gauges["active_runners"], 1)
+        self.assertIn(
+            'peertube_runner_jobs{state="pending",type="vod-hls-transcoding",'
+            'domain="example.com"} 2',
+            render_metrics(),
+        )
+        self.assertIn("peertube_runner_active_runners 1", render_metrics())
+
+    @override_settings(
+        DJANGO_PEERTUBE_RUNNER_CONNECTOR_REDIS="redis://localhost:6379/0"
+    )
+    @mock.patch(
+        "django_peertube_runner_connector.utils.metrics.get_shared_presence_counts",
+        new_callable=mock.AsyncMock,
+        return_value={"runners": 2, "connections": 3},
+    )
+    def test_render_presence_gauges(self, _mock_counts):
+        """The connected runners should be rendered when the registry is shared."""
+        metrics = render_metrics()
+
+        self.assertIn("peertube_runner_connected_runners 2", metrics)
+        self.assertIn("peertube_runner_socket_connections 3", metrics)
+
+    def test_render_presence_gauges_not_shared(self):
+        """The connected runners should not be rendered without shared registry."""
+        self.assertNotIn("peertube_runner_connected_runners", render_metrics())
+
+    @override_settings(TRANSCODING_METRICS_CACHE_TIMEOUT=0)
+    def test_get_gauges_not_cached(self):
+        """The gauges should be computed on each call without cache timeout."""
+        get_gauges()
+        with self.assertNumQueries(2):
+            get_gauges()
@@ -0,0 +1,59 @@
+"""Test the "progress.py" utils file."""
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerJobFactory
+from django_peertube_runner_connector.models import RunnerJobState
+from django_peertube_runner_connector.serializers import RunnerJobSerializer
+from django_peertube_runner_connector.utils.progress import (
+    get_live_progress,
+    set_live_progress,
+    should_persist_progress,
+)
+
+
+class ProgressTestCase(TestCase):
+    """Test the progress utils file."""
+
+    def test_get_live_progress(self):
+        """The live progress should be merged with the persisted one."""
+        runner_job = RunnerJobFactory(state=RunnerJobState.PROCESSING, progress=20)
+        self.assertEqual(get_live_progress(runner_job), 20)
+
+        set_live_progress(runner_job, 25)
+        self.assertEqual(get_live_progress(runner_job), 25)
+        self.assertEqual(RunnerJobSerializer(runner_job).data["progress"], 25)
+
+        # The live progress of a previous attempt is ignored
+        runner_job.processingJobToken = "ptrjt-new-token"
+        self.assertEqual(get_live_progress(runner_job), 20)
+
+    def test_get_live_progress_finished_job(self):
+        """The live progress of a job no longer processed should be ignored."""
+        runner_job = RunnerJobFactory(state=RunnerJobState.PROCESSING, progress=20)
+        set_live_progress(runner_job, 25)
+
+        runner_job.state = RunnerJobState.COMPLETED
+        runner_job.progress = None
+        self.assertIsNone(get_live_progress(runner_job))
+
+    @override_settings(
+        TRANSCODING_PROGRESS_PERSIST_DELTA=5,
+        TRANSCODING_PROGRESS_PERSIST_INTERVAL=30,
+    )
+    def test_should_persist_progress(self):
+        """The progress should be saved on significant changes or periodically."""
+        runner_job = RunnerJobFactory(state=RunnerJobState.PROCESSING, progress=20)
+
+        self.assertFalse(should_persist_progress(runner_job, 24))
+        self.assertFalse(should_persist_progress(runner_job, None))
+        self.assertTrue(should_persist_progress(runner_job, 25))
+
+        runner_job.progress = None
+        self.assertTrue(should_persist_progress(runner_job, 1))
+
+        runner_job.updatedAt = timezone.now() - timedelta(seconds=30)
+        self.assertTrue(should_persist_progress(runner_job, None))
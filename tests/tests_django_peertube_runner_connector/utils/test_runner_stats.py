@@ -0,0 +1,118 @@
+"""Test the "runner_stats.py" utils file."""
+
+from datetime import timedelta
+from unittest.mock import Mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import (
+    RunnerFactory,
+    RunnerJobFactory,
+    VideoFactory,
+)
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+    RunnerStats,
+)
+from django_peertube_runner_connector.utils.job_handlers.vod_hls_transcoding_job_handler import (
+    VODHLSTranscodingJobHandler,
+)
+from django_peertube_runner_connector.utils.runner_stats import (
+    get_job_resolution,
+    record_aborted_job,
+    record_completed_job,
+    record_failed_job,
+)
+
+
+class RunnerStatsTestCase(TestCase):
+    """Test the runner stats utils file."""
+
+    def setUp(self):
+        """Create a job of 720p processed by a runner for 60 seconds."""
+        self.runner = RunnerFactory()
+        self.video = VideoFactory(duration=120)
+        now = timezone.now()
+        self.runner_job = RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            state=RunnerJobState.PROCESSING,
+            runner=self.runner,
+            payload={"output": {"resolution": 720}},
+            privatePayload={"videoUUID": str(self.video.uuid)},
+            startedAt=now - timedelta(seconds=60),
+            finishedAt=now,
+        )
+
+    def get_stats(self):
+        """Return the stats of the runner for the job."""
+        return RunnerStats.objects.get(
+            runner=self.runner,
+            jobType=RunnerJobType.VOD_HLS_TRANSCODING,
+            resolution=720,
+        )
+
+    def test_get_job_resolution(self):
+        """The resolution should be read from the output of the payload."""
+        self.assertEqual(get_job_resolution(self.runner_job), 720)
+        self.assertEqual(get_job_resolution(RunnerJobFactory(payload={})), 0)
+        self.assertEqual(get_job_resolution(RunnerJobFactory(payload="[]")), 0)
+
+    def test_get_job_resolution_deferred_payload(self):
+        """Only the resolution should be read when the payload is deferred."""
+        runner_job = RunnerJob.objects.defer("payload").get(pk=self.runner_job.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_job_resolution(runner_job), 720)
+        self.assertIn("payload", runner_job.get_deferred_fields())
+
+    def test_record_completed_job(self):
+        """The processing time and the video duration should be added."""
+        record_completed_job(self.runner_job)
+        record_completed_job(self.runner_job)
+
+        stats = self.get_stats()
+        self.assertEqual(stats.completedJobs, 2)
+        self.assertAlmostEqual(stats.processingSeconds, 120)
+        self.assertEqual(stats.videoSeconds, 240)
+        self.assertAlmostEqual(stats.encodeSpeed, 2)
+
+    def test_record_failed_and_aborted_jobs(self):
+        """The failures and the aborts should be counted."""
+        record_failed_job(self.runner_job)
+        record_aborted_job(self.runner_job)
+        record_aborted_job(self.runner_job)
+
+        stats = self.get_stats()
+        self.assertEqual(stats.failedJobs, 1)
+        self.assertEqual(stats.abortedJobs, 2)
+        self.assertEqual(stats.completedJobs, 0)
+
+    def test_record_job_without_runner(self):
+        """Nothing should be recorded for a job without runner."""
+        self.runner_job.runner = None
+
+        with self.assertNumQueries(0):
+            record_failed_job(self.runner_job)
+
+    def test_record_on_handler_transitions(self):
+        """The job handlers should record the completions, errors and aborts."""
+        handler = VODHLSTranscodingJobHandler()
+        handler.specific_complete = Mock()
+        handler.specific_error = Mock()
+        handler.specific_abort = Mock()
+
+        handler.abort(runner_job=self.runner_job)
+        self.runner_job.state = RunnerJobState.PROCESSING
+        handler.error(runner_job=self.runner_job, message="Error")
+        self.runner_job.state = RunnerJobState.PROCESSING
+        self.runner_job.startedAt = timezone.now() - timedelta(seconds=60)
+        handler.complete(runner_job=self.runner_job, result_payload={})
+
+        stats = self.get_stats()
+        self.assertEqual(stats.abortedJobs, 1)
+        self.assertEqual(stats.failedJobs, 1)
+        self.assertEqual(stats.completedJobs, 1)
+        self.assertAlmostEqual(stats.encodeSpeed, 2, places=1)
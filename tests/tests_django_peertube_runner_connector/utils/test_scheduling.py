@@ -0,0 +1,340 @@
+"""Test the "scheduling.py" utils file."""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+import heapq
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
+from django_peertube_runner_connector.utils.scheduling import (
+    get_retry_delay,
+    get_scheduling_rank,
+)
+
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def simulate_wait_times(rank, duration=3600, low_priority_every=60):
+    """
+    Simulate a runner processing one job per second under a saturating load.
+
+    A priority 0 job is created every second during the first half of the
+    simulation, and a priority 3 job every `low_priority_every` seconds. Pending
+    jobs are processed in the order given by `rank`. Return the wait times of the
+    jobs by priority, the jobs never processed waiting until the end.
+    """
+    pending = []
+    wait_times = {0: [], 3: []}
+
+    for second in range(duration):
+        created_at = EPOCH + timedelta(seconds=second)
+        arrivals = [0] if second < duration // 2 else []
+        if second % low_priority_every == 0:
+            arrivals.append(3)
+        for priority in arrivals:
+            heapq.heappush(pending, (rank(priority, created_at), second, priority))
+
+        if pending:
+            _, created_second, priority = heapq.heappop(pending)
+            wait_times[priority].append(second - created_second)
+
+    for _, created_second, priority in pending:
+        wait_times[priority].append(duration - created_second)
+
+    return wait_times
+
+
+def percentile(values, ratio):
+    """Return the value below which `ratio` of the values are."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+class SchedulingTestCase(TestCase):
+    """Test the scheduling utils file."""
+
+    def test_get_scheduling_rank(self):
+        """The rank should be the creation time delayed by the priority."""
+        self.assertEqual(
+            get_scheduling_rank(RunnerJobType.VOD_HLS_TRANSCODING, 2, EPOCH),
+            EPOCH.timestamp() + 120,
+        )
+
+    @override_settings(
+        TRANSCODING_PRIORITY_AGING_INTERVALS={RunnerJobType.VIDEO_TRANSCRIPTION: 5}
+    )
+    def test_get_scheduling_rank_per_type_interval(self):
+        """The aging interval should be configurable per job type."""
+        self.assertEqual(
+            get_scheduling_rank(RunnerJobType.VIDEO_TRANSCRIPTION, 2, EPOCH),
+            EPOCH.timestamp() + 10,
+        )
+        self.assertEqual(
+            get_scheduling_rank(RunnerJobType.VOD_HLS_TRANSCODING, 2, EPOCH),
+            EPOCH.timestamp() + 120,
+        )
+
+    def test_get_scheduling_rank_after_domain_queue(self):
+        """A job should be ranked after the queued jobs of its domain."""
+        self.assertEqual(
+            get_scheduling_rank(
+                RunnerJobType.VOD_HLS_TRANSCODING,
+                0,
+                EPOCH,
+                domain="tenant.example.com",
+                last_domain_start=EPOCH.timestamp() + 600,
+            ),
+            EPOCH.timestamp() + 660,
+        )
+        # A queue ranked in the past does not delay the job
+        self.assertEqual(
+            get_scheduling_rank(
+                RunnerJobType.VOD_HLS_TRANSCODING,
+                0,
+                EPOCH,
+                last_domain_start=EPOCH.timestamp() - 600,
+            ),
+            EPOCH.timestamp(),
+        )
+
+    def test_scheduling_rank_domain_spacing_with_priority(self):
+        """The jobs of a domain should be one quantum apart, whatever their priority."""
+        runner_jobs = RunnerJobFactory.create_batch(
+            4,
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            domain="tenant.example.com",
+            priority=5,
+        )
+
+        ranks = [runner_job.schedulingRank for runner_job in runner_jobs]
+        self.assertEqual(
+            [round(later - earlier) for earlier, later in zip(ranks, ranks[1:])],
+            [60, 60, 60],
+        )
+        # The priority delay is only added once to the rank
+        self.assertAlmostEqual(
+            ranks[0], runner_jobs[0].createdAt.timestamp() + 5 * 60, delta=1
+        )
+
+    def test_scheduling_rank_bulk_create(self):
+        """The jobs created at once should be ranked like the jobs saved one by one."""
+        RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            domain="tenant.example.com",
+            priority=0,
+        )
+
+        runner_jobs = RunnerJob.objects.bulk_create(
+            RunnerJobFactory.build(
+                type=RunnerJobType.VOD_HLS_TRANSCODING,
+                domain=domain,
+                priority=0,
+                dependsOnRunnerJob=None,
+                runner=None,
+            )
+            for domain in ("tenant.example.com", "tenant.example.com", None)
+        )
+
+        ranks = list(
+            RunnerJob.objects.filter(pk__in=[job.pk for job in runner_jobs])
+            .order_by("schedulingRank")
+            .values_list("domain", "schedulingRank")
+        )
+        self.assertEqual(
+            [domain for domain, _ in ranks],
+            [None, "tenant.example.com", "tenant.example.com"],
+        )
+        self.assertEqual(round(ranks[2][1] - ranks[1][1]), 60)
+
+    def test_get_last_domain_start(self):
+        """The latest start of the queued jobs of a domain should be read from its index."""
+        runner_jobs = RunnerJobFactory.create_batch(
+            3,
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            domain="tenant.example.com",
+            priority=5,
+        )
+        RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            domain="tenant.example.com",
+            priority=5,
+            state=RunnerJobState.PROCESSING,
+        )
+        RunnerJobFactory(domain="other.example.com", priority=0)
+
+        # The start is the rank without the priority delay
+        self.assertEqual(
+            runner_jobs[0].schedulingStart, runner_jobs[0].schedulingRank - 5 * 60
+        )
+        self.assertEqual(
+            RunnerJob.objects.get_last_domain_start("tenant.example.com", 5),
+            runner_jobs[2].schedulingStart,
+        )
+        # The lower priority jobs of the domain are ignored
+        self.assertIsNone(
+            RunnerJob.objects.get_last_domain_start("tenant.example.com", 0)
+        )
+        self.assertIn(
+            "runnerjob_domain_start_idx",
+            RunnerJob.objects.filter(domain="tenant.example.com")
+            .order_by("-schedulingStart")
+            .explain(),
+        )
+
+    @override_settings(TRANSCODING_DOMAIN_WEIGHTS={"big.example.com": 2})
+    def test_list_available_jobs_fair_share(self):
+        """The jobs of the domains should be interleaved by their weights."""
+        big_jobs = RunnerJobFactory.create_batch(
+            4, domain="big.example.com", priority=0
+        )
+        small_jobs = RunnerJobFactory.create_batch(
+            4, domain="small.example.com", priority=0
+        )
+        other_job = RunnerJobFactory(domain="other.example.com", priority=0)
+
+        # Twice as many jobs of the domain of weight 2
+        self.assertEqual(
+            list(RunnerJob.objects.list_available_jobs()),
+            [
+                big_jobs[0],
+                small_jobs[0],
+                other_job,
+                big_jobs[1],
+                big_jobs[2],
+                small_jobs[1],
+                big_jobs[3],
+                small_jobs[2],
+                small_jobs[3],
+            ],
+        )
+
+    @override_settings(
+        TRANSCODING_DOMAIN_MAX_CONCURRENCY={
+            "big.example.com": 1,
+            "small.example.com": 2,
+        }
+    )
+    def test_list_available_jobs_domain_max_concurrency(self):
+        """The jobs of the domains at their concurrency cap should not be listed."""
+        RunnerJobFactory(domain="big.example.com", state=RunnerJobState.PROCESSING)
+        RunnerJobFactory(domain="small.example.com", state=RunnerJobState.PROCESSING)
+        RunnerJobFactory(domain="big.example.com")
+        small_job = RunnerJobFactory(domain="small.example.com")
+
+        self.assertEqual(RunnerJob.objects.get_saturated_domains(), {"big.example.com"})
+        self.assertEqual(list(RunnerJob.objects.list_available_jobs()), [small_job])
+
+    @override_settings(TRANSCODING_DOMAIN_MAX_CONCURRENCY={"big.example.com": 1})
+    def test_list_available_jobs_saturated_domain_head(self):
+        """The jobs after the head held by a saturated domain should be listed."""
+        RunnerJobFactory(domain="big.example.com", state=RunnerJobState.PROCESSING)
+        for rank in range(5):
+            RunnerJobFactory(domain="big.example.com", schedulingRank=rank)
+        small_jobs = [
+            RunnerJobFactory(domain="small.example.com", schedulingRank=rank)
+            for rank in (20, 10)
+        ]
+        other_job = RunnerJobFactory(domain="other.example.com", schedulingRank=15)
+        job_without_domain = RunnerJobFactory(domain=None, schedulingRank=12)
+
+        self.assertEqual(
+            RunnerJob.objects.list_pending_domains(),
+            ["big.example.com", "other.example.com", "small.example.com"],
+        )
+        self.assertEqual(
+            list(RunnerJob.objects.list_available_jobs(limit=3)),
+            [small_jobs[1], job_without_domain, other_job],
+        )
+
+    @override_settings(
+        TRANSCODING_RETRY_BACKOFF_DELAYS={"video-transcription": 10},
+        TRANSCODING_RETRY_BACKOFF_MAX_DELAY=100,
+    )
+    def test_get_retry_delay(self):
+        """The delay should double on each failure, with a jitter, up to the max."""
+        for failures, delay in ((1, 10), (2, 20), (3, 40), (10, 100)):
+            retry_delay = get_retry_delay(RunnerJobType.VIDEO_TRANSCRIPTION, failures)
+            self.assertGreaterEqual(retry_delay, timedelta(seconds=delay / 2))
+            self.assertLessEqual(retry_delay, timedelta(seconds=delay))
+
+        # The other job types are retried after the default delay
+        retry_delay = get_retry_delay(RunnerJobType.VOD_HLS_TRANSCODING, 1)
+        self.assertGreaterEqual(retry_delay, timedelta(seconds=15))
+        self.assertLessEqual(retry_delay, timedelta(seconds=30))
+
+    def test_list_available_jobs_retry_backoff(self):
+        """The failed jobs should not be listed until their backoff elapsed."""
+        RunnerJobFactory(notBefore=timezone.now() + timedelta(seconds=10))
+        retried_job = RunnerJobFactory(notBefore=timezone.now() - timedelta(seconds=1))
+        new_job = RunnerJobFactory()
+
+        self.assertEqual(
+            list(RunnerJob.objects.list_available_jobs()), [retried_job, new_job]
+        )
+
+    def test_get_queue_depth_per_domain(self):
+        """The pending and processing jobs should be counted per domain."""
+        RunnerJobFactory.create_batch(2, domain="big.example.com")
+        RunnerJobFactory(domain="big.example.com", state=RunnerJobState.PROCESSING)
+        RunnerJobFactory(domain="small.example.com")
+        RunnerJobFactory(domain="small.example.com", state=RunnerJobState.COMPLETED)
+
+        self.assertEqual(
+            RunnerJob.objects.get_queue_depth_per_domain(),
+            {
+                "big.example.com": {"pending": 2, "processing": 1},
+                "small.example.com": {"pending": 1, "processing": 0},
+            },
+        )
+
+    def test_list_available_jobs_ages_priority(self):
+        """A job waiting long enough should be offered before higher priorities."""
+        old_job = RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            priority=5,
+            schedulingRank=get_scheduling_rank(
+                RunnerJobType.VOD_HLS_TRANSCODING,
+                5,
+                timezone.now() - timedelta(minutes=10),
+            ),
+        )
+        new_job = RunnerJobFactory(type=RunnerJobType.VOD_HLS_TRANSCODING, priority=0)
+        recent_job = RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING, priority=5
+        )
+        RunnerJobFactory(state=RunnerJobState.PROCESSING, priority=0)
+
+        self.assertEqual(
+            list(RunnerJob.objects.list_available_jobs()),
+            [old_job, new_job, recent_job],
+        )
+
+    def test_scheduling_tail_wait_time(self):
+        """
+        Aging should bound the tail wait time of the low priority jobs, which a
+        static priority starves, at a small cost for the high priority jobs.
+        """
+        static_wait_times = simulate_wait_times(
+            lambda priority, created_at: (priority, created_at.timestamp())
+        )
+        aging_wait_times = simulate_wait_times(
+            lambda priority, created_at: get_scheduling_rank(
+                RunnerJobType.VOD_HLS_TRANSCODING, priority, created_at
+            )
+        )
+
+        # The low priority jobs wait for the high priority stream to end
+        self.assertGreater(percentile(static_wait_times[3], 0.99), 1700)
+        # With aging, they wait for 3 aging intervals and the jobs queued before
+        self.assertLess(percentile(aging_wait_times[3], 0.99), 250)
+        self.assertLess(
+            percentile(aging_wait_times[0], 0.99),
+            percentile(static_wait_times[0], 0.99) + 200,
+        )
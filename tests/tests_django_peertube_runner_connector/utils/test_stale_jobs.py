@@ -0,0 +1,195 @@
+"""Test the "stale_jobs.py" utils file."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import (
+    RunnerJobFactory,
+    VideoFactory,
+    VideoJobInfoFactory,
+)
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+    VideoState,
+)
+from django_peertube_runner_connector.utils.stale_jobs import (
+    STALE_JOB_REAPER_LOCK_KEY,
+    STALE_JOB_REAPER_TICK_KEY,
+    StaleJobReaper,
+    get_stale_jobs,
+    reap_stale_jobs,
+)
+
+
+@patch(
+    "django_peertube_runner_connector.utils.stale_jobs."
+    "send_available_jobs_ping_to_runners"
+)
+class StaleJobsTestCase(TestCase):
+    """Test the stale jobs reaper."""
+
+    def setUp(self):
+        """Create a video and a processing job not updated for an hour."""
+        self.video = VideoFactory(state=VideoState.TO_TRANSCODE)
+        VideoJobInfoFactory(video=self.video, pendingTranscode=1)
+        self.runner_job = self._create_job(minutes_ago=60)
+
+    def tearDown(self):
+        cache.delete(STALE_JOB_REAPER_LOCK_KEY)
+        cache.delete(STALE_JOB_REAPER_TICK_KEY)
+
+    def _create_job(self, minutes_ago, **kwargs):
+        """Create a processing job last updated some minutes ago."""
+        runner_job = RunnerJobFactory(
+            state=RunnerJobState.PROCESSING,
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            privatePayload={"videoUUID": str(self.video.uuid)},
+            **kwargs,
+        )
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            updatedAt=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+        return runner_job
+
+    def test_get_stale_jobs(self, _mock_ping):
+        """Only the processing jobs not updated since the timeout are stale."""
+        self._create_job(minutes_ago=1)
+        RunnerJob.objects.filter(pk=self._create_job(minutes_ago=60).pk).update(
+            state=RunnerJobState.COMPLETED
+        )
+
+        self.assertEqual(list(get_stale_jobs()), [self.runner_job])
+        self.assertEqual(get_stale_jobs(timedelta(hours=2)).count(), 0)
+
+    def test_get_stale_jobs_expired_lease(self, _mock_ping):
+        """The processing jobs whose lease expired are stale, even updated lately."""
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(
+            leaseExpiresAt=timezone.now() + timedelta(minutes=1)
+        )
+        expired_job = self._create_job(
+            minutes_ago=1, leaseExpiresAt=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(list(get_stale_jobs(timedelta(hours=2))), [expired_job])
+
+    def test_reap_stale_jobs_reset_to_pending(self, mock_ping):
+        """A stale job should be counted as failed and reset to pending."""
+        reaped_jobs = reap_stale_jobs()
+
+        self.assertEqual(reaped_jobs, [self.runner_job])
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.PENDING)
+        self.assertEqual(self.runner_job.failures, 1)
+        self.assertIsNone(self.runner_job.processingJobToken)
+        self.assertIsNone(self.runner_job.leaseExpiresAt)
+        # The job is retried after a backoff, the runners are pinged once it elapsed
+        self.assertGreater(self.runner_job.notBefore, timezone.now())
+        mock_ping.assert_not_called()
+
+    @override_settings(
+        TRANSCODING_RETRY_BACKOFF_DELAYS={RunnerJobType.VOD_HLS_TRANSCODING: 0}
+    )
+    def test_reap_stale_jobs_reset_to_pending_without_backoff(self, mock_ping):
+        """The runners should be pinged for a job retried at once."""
+        reap_stale_jobs()
+
+        mock_ping.assert_called_once_with({self.runner_job.type})
+
+    def test_reap_stale_jobs_retried_jobs(self, mock_ping):
+        """The runners should be pinged for the jobs whose backoff elapsed since."""
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(updatedAt=timezone.now())
+        now = timezone.now()
+        RunnerJobFactory(
+            state=RunnerJobState.PENDING,
+            type=RunnerJobType.VIDEO_TRANSCRIPTION,
+            notBefore=now - timedelta(seconds=10),
+        )
+        for seconds in (-90, 30):
+            RunnerJobFactory(
+                state=RunnerJobState.PENDING,
+                type=RunnerJobType.VOD_HLS_TRANSCODING,
+                notBefore=now + timedelta(seconds=seconds),
+            )
+
+        self.assertEqual(reap_stale_jobs(retry_since=now - timedelta(minutes=1)), [])
+
+        mock_ping.assert_called_once_with({RunnerJobType.VIDEO_TRANSCRIPTION})
+
+    @override_settings(TRANSCODING_RUNNER_MAX_FAILURE=1)
+    def test_reap_stale_jobs_max_failure(self, mock_ping):
+        """A stale job failing too many times should be errored."""
+        reap_stale_jobs()
+
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.ERRORED)
+        self.assertEqual(self.runner_job.error, "Runner stopped responding")
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.state, VideoState.TRANSCODING_FAILED)
+        mock_ping.assert_not_called()
+
+    def test_reap_stale_jobs_expired_offers(self, mock_ping):
+        """The jobs whose offer expired should be released and pinged."""
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(updatedAt=timezone.now())
+        offered_job = RunnerJobFactory(
+            state=RunnerJobState.PENDING,
+            type=RunnerJobType.VIDEO_TRANSCRIPTION,
+            offerExpiresAt=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertEqual(reap_stale_jobs(), [])
+
+        offered_job.refresh_from_db()
+        self.assertIsNone(offered_job.runner)
+        self.assertIsNone(offered_job.offerExpiresAt)
+        mock_ping.assert_called_once_with({RunnerJobType.VIDEO_TRANSCRIPTION})
+
+    def test_reap_stale_jobs_updated_meanwhile(self, mock_ping):
+        """A job updated after being listed should not be reaped."""
+        original_update = RunnerJob.objects.filter
+
+        def update_job_first(*args, **kwargs):
+            """Simulate a runner update right before the job is claimed."""
+            if "updatedAt" in kwargs:
+                RunnerJob.objects.filter(pk=self.runner_job.pk).update(
+                    updatedAt=timezone.now()
+                )
+            return original_update(*args, **kwargs)
+
+        with patch.object(RunnerJob.objects, "filter", side_effect=update_job_first):
+            self.assertEqual(reap_stale_jobs(), [])
+
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.PROCESSING)
+        self.assertEqual(self.runner_job.failures, 0)
+        mock_ping.assert_not_called()
+
+    def test_stale_job_reaper_leader_lock(self, _mock_ping):
+        """Only the replica holding the leader lock should reap the jobs."""
+        leader = StaleJobReaper(interval=60)
+        follower = StaleJobReaper(interval=60)
+
+        self.assertEqual(leader.run_once(), [self.runner_job])
+        self.assertIsNone(follower.run_once())
+        self.assertEqual(cache.get(STALE_JOB_REAPER_LOCK_KEY), leader.token)
+
+    def test_stale_job_reaper_retry_since_last_tick(self, _mock_ping):
+        """The reaper should ping for the backoffs elapsed since its last tick."""
+        reaper = StaleJobReaper(interval=60)
+        last_tick = timezone.now() - timedelta(minutes=5)
+        cache.set(STALE_JOB_REAPER_TICK_KEY, last_tick)
+
+        with patch(
+            "django_peertube_runner_connector.utils.stale_jobs.reap_stale_jobs"
+        ) as mock_reap:
+            reaper.run_once()
+            cache.delete(STALE_JOB_REAPER_LOCK_KEY)
+            reaper.run_once()
+
+        self.assertEqual(mock_reap.call_args_list[0].kwargs["retry_since"], last_tick)
+        self.assertGreater(mock_reap.call_args_list[1].kwargs["retry_since"], last_tick)
@@ -42,6 +42,15 @@ class ThumbnailTestCase(TestCase):
         self.assertEqual(thumbnail_filename, self.thumbnail_filename)
         self.assertTrue(video_storage.exists(thumbnail_filename))
 
+    @patch.object(ffmpeg, "run")
+    @patch.object(ffmpeg, "probe", return_value=probe_response)
+    def test_build_video_thumbnails_probes_the_media_input(self, mock_probe, mock_run):
+        """Should probe the file ffmpeg reads when no probe is given."""
+        build_video_thumbnails(video=self.video, video_file=self.video_file)
+
+        mock_probe.assert_called_once_with(self.video_url)
+        mock_run.assert_called_once()
+
     @patch.object(ffmpeg, "run")
     def test_build_video_thumbnails_with_no_video_stream(self, mock_run):
         """Should create a thumbnail file."""
@@ -0,0 +1,112 @@
+"""Test the "tracing.py" utils file."""
+
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from django_peertube_runner_connector.factories import RunnerFactory
+from django_peertube_runner_connector.models import RunnerJobType
+from django_peertube_runner_connector.storage import StorageBatch
+from django_peertube_runner_connector.utils import tracing
+from django_peertube_runner_connector.utils.job_handlers.vod_hls_transcoding_job_handler import (
+    VODHLSTranscodingJobHandler,
+)
+
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+except ImportError:
+    TracerProvider = None
+
+
+class TracingDisabledTestCase(TestCase):
+    """Test the tracing utils without tracing enabled."""
+
+    def test_start_span_disabled(self):
+        """No span should be started."""
+        with tracing.start_span("test") as span:
+            self.assertIsNone(span)
+
+    def test_get_trace_context_disabled(self):
+        """No trace context should be propagated."""
+        self.assertEqual(tracing.get_trace_context(), {})
+
+    def test_bind_trace_context_disabled(self):
+        """The callables should not be wrapped."""
+        self.assertIs(tracing.bind_trace_context(len, "len"), len)
+
+
+@skipIf(TracerProvider is None, "OpenTelemetry SDK is not installed")
+@override_settings(TRANSCODING_TRACING_ENABLED=True)
+class TracingTestCase(TestCase):
+    """Test the tracing utils with tracing enabled."""
+
+    def setUp(self):
+        """Record the spans in memory."""
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        patcher = patch.object(
+            tracing.trace, "get_tracer", side_effect=provider.get_tracer
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_spans(self):
+        """Return the finished spans by name."""
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    @patch(
+        "django_peertube_runner_connector.utils.job_handlers."
+        "abstract_job_handler.send_available_jobs_ping_to_runners"
+    )
+    def test_job_spans_join_the_trace_of_its_creation(self, mock_ping):
+        """The spans of a job should be in the trace which created it."""
+        with tracing.start_span("transcode_video"):
+            runner_job = VODHLSTranscodingJobHandler().create_runner_job(
+                job_type=RunnerJobType.VOD_HLS_TRANSCODING,
+                job_uuid="123e4567-e89b-12d3-a456-426655440003",
+                domain="domain",
+                payload={},
+                private_payload={"videoUUID": "test_uuid"},
+                priority=0,
+                depends_on_runner_job=None,
+            )
+
+        mock_ping.assert_called_once()
+        self.assertIn("traceparent", runner_job.privatePayload["traceContext"])
+        self.assertEqual(runner_job.privatePayload["videoUUID"], "test_uuid")
+
+        runner_job.runner = RunnerFactory()
+        with tracing.start_job_span("runner_job.accept", runner_job):
+            pass
+
+        spans = self.get_spans()
+        trace_id = spans["transcode_video"].context.trace_id
+        self.assertEqual(spans["create_runner_job"].context.trace_id, trace_id)
+        self.assertEqual(spans["runner_job.accept"].context.trace_id, trace_id)
+        self.assertEqual(
+            spans["runner_job.accept"].parent.span_id,
+            spans["create_runner_job"].context.span_id,
+        )
+        self.assertEqual(
+            spans["runner_job.accept"].attributes["runner_job.uuid"],
+            "123e4567-e89b-12d3-a456-426655440003",
+        )
+
+    def test_storage_batch_spans(self):
+        """The operations of a storage batch should be traced in their threads."""
+        with tracing.start_span("specific_complete"):
+            with StorageBatch() as batch:
+                batch.submit(len, "test")
+
+        spans = self.get_spans()
+        self.assertEqual(
+            spans["storage.len"].parent.span_id,
+            spans["specific_complete"].context.span_id,
+        )
@@ -98,11 +98,14 @@ class VideoStateTestCase(TestCase):
     def test_move_to_failed_transcoding_state(self, mock_transcoding_ended):
         """Should  move to a failed transcoding state."""
         self.video.state = VideoState.TO_TRANSCODE
+        self.video.idempotencyKey = "upload-42"
         self.video.save()
 
         move_to_failed_transcoding_state(self.video)
 
+        self.video.refresh_from_db()
         self.assertEqual(self.video.state, VideoState.TRANSCODING_FAILED)
+        self.assertIsNone(self.video.idempotencyKey)
         mock_transcoding_ended.assert_called_once_with(self.video)
 
     @patch("django_peertube_runner_connector.utils.video_state.transcoding_ended")
@@ -0,0 +1,59 @@
+"""Tests for the runner stats API."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from django_peertube_runner_connector.factories import RunnerFactory
+from django_peertube_runner_connector.models import RunnerJobType, RunnerStats
+
+
+class RunnerStatsAPITest(TestCase):
+    """Test for the runner stats API."""
+
+    def setUp(self):
+        """Create the stats of two runners."""
+        self.runner = RunnerFactory(name="fast")
+        RunnerStats.objects.create(
+            runner=self.runner,
+            jobType=RunnerJobType.VOD_HLS_TRANSCODING,
+            resolution=720,
+            completedJobs=2,
+            failedJobs=2,
+            processingSeconds=60,
+            videoSeconds=120,
+        )
+        RunnerStats.objects.create(
+            runner=RunnerFactory(name="slow"),
+            jobType=RunnerJobType.VIDEO_TRANSCRIPTION,
+        )
+
+    def test_list_runner_stats_anonymous(self):
+        """Should not list the stats to an anonymous user."""
+        response = self.client.get("/api/v1/runners/stats")
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_list_runner_stats(self):
+        """Should list the stats of the runners to the staff."""
+        self.client.force_login(
+            get_user_model().objects.create_user("staff", is_staff=True)
+        )
+
+        response = self.client.get("/api/v1/runners/stats", {"runner": "fast"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        stats = response.json()[0]
+        self.assertEqual(stats["runner"], "fast")
+        self.assertEqual(stats["jobType"], RunnerJobType.VOD_HLS_TRANSCODING)
+        self.assertEqual(stats["resolution"], 720)
+        self.assertEqual(stats["encodeSpeed"], 2)
+        self.assertEqual(stats["failureRate"], 0.5)
+        self.assertEqual(stats["throughput"], 120)
+
+        response = self.client.get(
+            "/api/v1/runners/stats",
+            {"jobType": RunnerJobType.VIDEO_TRANSCRIPTION},
+        )
+        self.assertEqual(response.json()[0]["runner"], "slow")
+        self.assertIsNone(response.json()[0]["encodeSpeed"])
@@ -32,6 +32,7 @@ class AbortRunnerJobAPITest(TestCase):
             payload={"foo": "bar"},
             privatePayload={"foo": "bar"},
             state=RunnerJobState.PROCESSING,
+            processingJobToken="ptrjt-token",
         )
 
     def test_abort_with_an_invalid_job_uuid(self):
@@ -41,6 +42,7 @@ class AbortRunnerJobAPITest(TestCase):
             "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e01/abort",
             data={
                 "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
             },
         )
 
@@ -69,6 +71,7 @@ class AbortRunnerJobAPITest(TestCase):
                 "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/abort",
                 data={
                     "runnerToken": "runnerToken",
+                    "jobToken": "ptrjt-token",
                 },
             )
 
@@ -81,3 +84,17 @@ class AbortRunnerJobAPITest(TestCase):
         self.assertEqual(runner_job.startedAt, None)
         self.assertEqual(runner_job.processingJobToken, None)
         self.assertEqual(runner_job.progress, None)
+
+    def test_abort_with_an_invalid_job_token(self):
+        """Should not be able to abort a job leased with another token."""
+        runner_job = self.create_processing_job(RunnerJobType.VOD_HLS_TRANSCODING)
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/abort",
+            data={"runnerToken": "runnerToken", "jobToken": "invalid_token"},
+        )
+
+        self.assertEqual(response.status_code, 409)
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.state, RunnerJobState.PROCESSING)
+        self.assertEqual(runner_job.failures, 0)
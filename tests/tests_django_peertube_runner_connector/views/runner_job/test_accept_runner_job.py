@@ -1,9 +1,9 @@
 """Tests for the Runner Job Accept API."""
 
-from datetime import datetime, timezone as tz
+from datetime import datetime, timedelta, timezone as tz
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
@@ -100,6 +100,8 @@ class AcceptRunnerJobAPITest(TestCase):
                 "uuid": "02404b18-3c50-4929-af61-913f4df65e00",
             },
         )
+        # The runner is given a lease on the job for the runner job timeout
+        self.assertEqual(self.runner_job.leaseExpiresAt, now + timedelta(minutes=10))
 
     def test_accept_an_already_processing_job(self):
         """Should not be able to accept an already processing job."""
@@ -115,3 +117,87 @@ class AcceptRunnerJobAPITest(TestCase):
 
         self.assertEqual(response.status_code, 409)
         self.assertEqual(response.data, "This job is not in pending state anymore")
+
+    @override_settings(TRANSCODING_DOMAIN_MAX_CONCURRENCY={"tenant.example.com": 1})
+    def test_accept_a_job_of_a_saturated_domain(self):
+        """Should not be able to accept a job of a domain at its concurrency cap."""
+        self.runner_job.domain = "tenant.example.com"
+        self.runner_job.save()
+        RunnerJobFactory(domain="tenant.example.com", state=RunnerJobState.PROCESSING)
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/accept",
+            data={
+                "runnerToken": "runnerToken",
+            },
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.data, "The domain of this job is processing too many jobs"
+        )
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.PENDING)
+
+    @override_settings(TRANSCODING_DOMAIN_MAX_CONCURRENCY={"tenant.example.com": 2})
+    def test_accept_the_last_job_of_a_capped_domain(self):
+        """Should be able to accept a job taking the last slot of its domain."""
+        self.runner_job.domain = "tenant.example.com"
+        self.runner_job.save()
+        RunnerJobFactory(domain="tenant.example.com", state=RunnerJobState.PROCESSING)
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/accept",
+            data={"runnerToken": "runnerToken"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.PROCESSING)
+
+    def test_accept_a_job_offered_to_another_runner(self):
+        """Should not be able to accept a job offered to another runner."""
+        self.runner_job.runner = self.other_runner
+        self.runner_job.offerExpiresAt = timezone.now() + timedelta(seconds=10)
+        self.runner_job.save()
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/accept",
+            data={
+                "runnerToken": "runnerToken",
+            },
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.PENDING)
+
+        # The job can be accepted by the runner it is offered to
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/accept",
+            data={
+                "runnerToken": "otherRunnerToken",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.state, RunnerJobState.PROCESSING)
+        self.assertIsNone(self.runner_job.offerExpiresAt)
+
+    def test_accept_a_job_whose_offer_expired(self):
+        """Should be able to accept a job whose offer to another runner expired."""
+        self.runner_job.runner = self.other_runner
+        self.runner_job.offerExpiresAt = timezone.now() - timedelta(seconds=1)
+        self.runner_job.save()
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/accept",
+            data={
+                "runnerToken": "runnerToken",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.runner_job.refresh_from_db()
+        self.assertEqual(self.runner_job.runner, self.runner)
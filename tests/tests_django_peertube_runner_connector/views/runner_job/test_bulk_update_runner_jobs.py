@@ -0,0 +1,153 @@
+"""Tests for the Runner Job Bulk Update API."""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import RunnerJob, RunnerJobState
+from django_peertube_runner_connector.utils.progress import get_live_progress
+
+
+class BulkUpdateRunnerJobsAPITest(TestCase):
+    """Test for the Runner Job Bulk Update API."""
+
+    def setUp(self):
+        """Create a runner processing several jobs."""
+        cache.clear()
+        self.runner = RunnerFactory(
+            runnerToken="runnerToken", lastContact=timezone.now() - timedelta(hours=1)
+        )
+        self.runner_jobs = [
+            RunnerJobFactory(
+                runner=self.runner,
+                state=RunnerJobState.PROCESSING,
+                processingJobToken=f"ptrjt-{index}",
+                progress=0,
+            )
+            for index in range(3)
+        ]
+        RunnerJob.objects.update(updatedAt=timezone.now() - timedelta(minutes=5))
+
+    def bulk_update(self, jobs, runner_token="runnerToken"):
+        """Send the progress of the jobs given."""
+        return self.client.post(
+            "/api/v1/runners/jobs/bulk-update",
+            data={"runnerToken": runner_token, "jobs": jobs},
+            content_type="application/json",
+        )
+
+    def test_bulk_update_with_an_invalid_runner_token(self):
+        """Should not be able to update jobs with an invalid runner token."""
+        response = self.bulk_update([], runner_token="invalid_token")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_update_without_jobs(self):
+        """Should not be able to update jobs without a list of jobs."""
+        response = self.bulk_update("all")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_update_runner_jobs(self):
+        """The jobs whose token matches should be updated with a single query."""
+        other_runner_job = RunnerJobFactory(
+            state=RunnerJobState.PROCESSING, processingJobToken="ptrjt-other"
+        )
+        jobs = [
+            {"jobUUID": str(self.runner_jobs[0].uuid), "jobToken": "ptrjt-0"},
+            {
+                "jobUUID": str(self.runner_jobs[1].uuid),
+                "jobToken": "ptrjt-1",
+                "progress": 42.5,
+            },
+            {
+                "jobUUID": str(self.runner_jobs[2].uuid),
+                "jobToken": "wrong",
+                "progress": 10,
+            },
+            {
+                "jobUUID": str(other_runner_job.uuid),
+                "jobToken": "ptrjt-other",
+                "progress": 10,
+            },
+            {"jobUUID": "invalid", "jobToken": "ptrjt-0"},
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.bulk_update(jobs)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "updatedJobs": sorted(
+                    str(runner_job.uuid) for runner_job in self.runner_jobs[:2]
+                ),
+                "rejectedJobs": sorted(
+                    [
+                        str(self.runner_jobs[2].uuid),
+                        str(other_runner_job.uuid),
+                        "invalid",
+                    ]
+                ),
+            },
+        )
+        # The runner lookup, the locked jobs lookup, the bulk update and the last
+        # contact, with the savepoint of the transaction in the test case
+        self.assertEqual(len(context.captured_queries), 6)
+
+        for runner_job, progress in zip(self.runner_jobs, (0, 42.5, 0)):
+            runner_job.refresh_from_db()
+            self.assertEqual(runner_job.progress, progress)
+        self.assertEqual(get_live_progress(self.runner_jobs[1]), 42.5)
+        # The lease of the updated jobs is renewed
+        self.assertGreater(
+            self.runner_jobs[0].updatedAt, timezone.now() - timedelta(minutes=1)
+        )
+        self.assertGreater(self.runner_jobs[0].leaseExpiresAt, timezone.now())
+        self.assertLess(
+            self.runner_jobs[2].updatedAt, timezone.now() - timedelta(minutes=1)
+        )
+
+    def test_bulk_update_expired_lease(self):
+        """A job whose lease expired should be rejected."""
+        RunnerJob.objects.filter(pk=self.runner_jobs[0].pk).update(
+            leaseExpiresAt=timezone.now() - timedelta(seconds=1)
+        )
+
+        response = self.bulk_update(
+            [
+                {
+                    "jobUUID": str(self.runner_jobs[0].uuid),
+                    "jobToken": "ptrjt-0",
+                    "progress": 50,
+                }
+            ]
+        )
+
+        self.assertEqual(
+            response.json(),
+            {"updatedJobs": [], "rejectedJobs": [str(self.runner_jobs[0].uuid)]},
+        )
+
+    def test_bulk_update_invalid_progress(self):
+        """A job with an invalid progress should be rejected."""
+        response = self.bulk_update(
+            [
+                {
+                    "jobUUID": str(self.runner_jobs[0].uuid),
+                    "jobToken": "ptrjt-0",
+                    "progress": "half",
+                }
+            ]
+        )
+
+        self.assertEqual(
+            response.json(),
+            {"updatedJobs": [], "rejectedJobs": [str(self.runner_jobs[0].uuid)]},
+        )
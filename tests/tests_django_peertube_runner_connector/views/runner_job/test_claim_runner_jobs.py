@@ -0,0 +1,143 @@
+"""Tests for the Runner Job Claim API."""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
+
+
+class ClaimRunnerJobsAPITest(TestCase):
+    """Test for the Runner Job Claim API."""
+
+    def setUp(self):
+        """Create a runner and pending jobs."""
+        self.runner = RunnerFactory(
+            name="New Runner",
+            runnerToken="runnerToken",
+            lastContact=timezone.now() - timedelta(hours=1),
+        )
+        self.runner_jobs = [
+            RunnerJobFactory(
+                runner=None,
+                type=RunnerJobType.VOD_HLS_TRANSCODING,
+                priority=priority,
+                payload={"foo": "bar"},
+            )
+            for priority in range(3)
+        ]
+
+    def claim(self, **data):
+        """Claim jobs for the runner."""
+        return self.client.post(
+            "/api/v1/runners/jobs/claim",
+            data={"runnerToken": "runnerToken", **data},
+            content_type="application/json",
+        )
+
+    def test_claim_with_an_invalid_runner_token(self):
+        """Should not be able to claim jobs with an invalid runner token."""
+        response = self.claim(runnerToken="invalid_token")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_claim_with_an_invalid_max_jobs(self):
+        """Should not be able to claim jobs without a number of jobs."""
+        response = self.claim(maxJobs="all")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_claim_runner_jobs(self):
+        """Should claim the available jobs in their scheduling order."""
+        response = self.claim(maxJobs=2)
+
+        self.assertEqual(response.status_code, 200)
+        jobs = response.json()["jobs"]
+        self.assertEqual(
+            [job["uuid"] for job in jobs],
+            [str(runner_job.uuid) for runner_job in self.runner_jobs[:2]],
+        )
+        self.assertEqual(jobs[0]["state"], {"id": 2, "label": "Processing"})
+        self.assertEqual(jobs[0]["runner"]["name"], "New Runner")
+        self.assertEqual(jobs[0]["payload"], {"foo": "bar"})
+        self.assertNotEqual(jobs[0]["jobToken"], jobs[1]["jobToken"])
+
+        for runner_job, job in zip(self.runner_jobs, jobs):
+            runner_job.refresh_from_db()
+            self.assertEqual(runner_job.state, RunnerJobState.PROCESSING)
+            self.assertEqual(runner_job.runner, self.runner)
+            self.assertEqual(runner_job.processingJobToken, job["jobToken"])
+        self.runner_jobs[2].refresh_from_db()
+        self.assertEqual(self.runner_jobs[2].state, RunnerJobState.PENDING)
+
+    def test_claim_runner_jobs_query_count(self):
+        """The runner should be looked up and updated once for all the jobs."""
+        with CaptureQueriesContext(connection) as context:
+            self.claim(maxJobs=3)
+
+        runner_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if 'runner"' in query["sql"].split(" WHERE ")[0]
+        ]
+        self.assertEqual(len(runner_queries), 2)
+        self.assertEqual(
+            RunnerJob.objects.filter(state=RunnerJobState.PROCESSING).count(), 3
+        )
+
+    def test_claim_runner_jobs_of_types(self):
+        """Should only claim the jobs of the types given."""
+        transcription_job = RunnerJobFactory(
+            runner=None, type=RunnerJobType.VIDEO_TRANSCRIPTION, priority=5
+        )
+
+        response = self.claim(maxJobs=5, jobTypes=[RunnerJobType.VIDEO_TRANSCRIPTION])
+
+        self.assertEqual(
+            [job["uuid"] for job in response.json()["jobs"]],
+            [str(transcription_job.uuid)],
+        )
+
+    def test_claim_runner_jobs_skip_offered_jobs(self):
+        """The jobs offered to another runner should not be claimed."""
+        RunnerJob.objects.filter(pk=self.runner_jobs[0].pk).update(
+            runner=RunnerFactory(),
+            offerExpiresAt=timezone.now() + timedelta(seconds=10),
+        )
+
+        response = self.claim()
+
+        self.assertEqual(
+            [job["uuid"] for job in response.json()["jobs"]],
+            [str(self.runner_jobs[1].uuid)],
+        )
+
+    @override_settings(TRANSCODING_DOMAIN_MAX_CONCURRENCY={"tenant.example.com": 2})
+    def test_claim_runner_jobs_domain_max_concurrency(self):
+        """The batch should not exceed the concurrency cap of a domain."""
+        RunnerJob.objects.update(domain="tenant.example.com")
+        RunnerJobFactory(domain="tenant.example.com", state=RunnerJobState.PROCESSING)
+
+        response = self.claim(maxJobs=3)
+
+        self.assertEqual(
+            [job["uuid"] for job in response.json()["jobs"]],
+            [str(self.runner_jobs[0].uuid)],
+        )
+
+    def test_claim_runner_jobs_none_available(self):
+        """Should return an empty list when no job is available."""
+        RunnerJob.objects.update(state=RunnerJobState.COMPLETED)
+
+        response = self.claim(maxJobs=3)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"jobs": []})
@@ -1,6 +1,6 @@
 """Tests for the Runner Job Error API."""
 
-from datetime import datetime, timezone as tz
+from datetime import datetime, timedelta, timezone as tz
 import logging
 from unittest.mock import patch
 
@@ -52,6 +52,7 @@ class ErrorRunnerJobAPITest(TestCase):
             payload={"foo": "bar"},
             privatePayload={"videoUUID": "02404b18-3c50-4929-af61-913f4df65e99"},
             state=RunnerJobState.PROCESSING,
+            processingJobToken="ptrjt-token",
             dependsOnRunnerJob=parent,
         )
 
@@ -62,6 +63,7 @@ class ErrorRunnerJobAPITest(TestCase):
             "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e01/error",
             data={
                 "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
             },
         )
 
@@ -93,6 +95,7 @@ class ErrorRunnerJobAPITest(TestCase):
                 "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/error",
                 data={
                     "runnerToken": "runnerToken",
+                    "jobToken": "ptrjt-token",
                 },
             )
 
@@ -105,6 +108,24 @@ class ErrorRunnerJobAPITest(TestCase):
         self.assertEqual(runner_job.startedAt, None)
         self.assertEqual(runner_job.processingJobToken, None)
         self.assertEqual(runner_job.progress, None)
+        # The job is retried after a backoff
+        self.assertGreaterEqual(runner_job.notBefore, now + timedelta(seconds=15))
+        self.assertLessEqual(runner_job.notBefore, now + timedelta(seconds=30))
+
+    def test_error_only_once(self):
+        """The failure of a job should only be counted once for its lease."""
+        runner_job = self.create_processing_job(RunnerJobType.VOD_HLS_TRANSCODING)
+
+        for status_code in (204, 409):
+            response = self.client.post(
+                "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/error",
+                data={"runnerToken": "runnerToken", "jobToken": "ptrjt-token"},
+            )
+            self.assertEqual(response.status_code, status_code)
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.state, RunnerJobState.PENDING)
+        self.assertEqual(runner_job.failures, 1)
 
     @override_settings(TRANSCODING_RUNNER_MAX_FAILURE=0)
     def test_error_hls_job_limit_reached(self):
@@ -124,7 +145,11 @@ class ErrorRunnerJobAPITest(TestCase):
         with patch.object(timezone, "now", return_value=now):
             response = self.client.post(
                 "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/error",
-                data={"runnerToken": "runnerToken", "message": "Error message"},
+                data={
+                    "runnerToken": "runnerToken",
+                    "jobToken": "ptrjt-token",
+                    "message": "Error message",
+                },
             )
 
         self.assertEqual(response.status_code, 204)
@@ -0,0 +1,133 @@
+"""Tests for the size of the queries made by the Runner Job API."""
+
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=unused-argument
+
+TABLE = f'"{RunnerJob._meta.db_table}"'  # pylint: disable=protected-access
+COLUMNS = len(RunnerJob._meta.concrete_fields)  # pylint: disable=protected-access
+# Large enough for the payloads to stand out of the budgets if loaded or written
+LARGE_PAYLOAD = {"input": {"data": "x" * 20000}}
+BYTES_BUDGET = 4000
+
+
+def get_runner_job_queries(queries):
+    """Return the SQL of the captured queries reading or writing the jobs."""
+    return [query["sql"] for query in queries if TABLE in query["sql"]]
+
+
+def count_columns(sql):
+    """Count the columns a job query selects or writes."""
+    if sql.startswith("SELECT"):
+        return sql.split(" FROM ")[0].count(f"{TABLE}.")
+    if sql.startswith("UPDATE"):
+        return sql.split(" WHERE ")[0].count(" = ")
+    return 0
+
+
+@patch(
+    "django_peertube_runner_connector.views.runner_job.RunnerJob.objects."
+    "get_saturated_domains",
+    return_value=set(),
+)
+class QuerySizeRunnerJobAPITest(TestCase):
+    """Regression tests on the size of the queries of the Runner Job API."""
+
+    def setUp(self):
+        """Create a runner and a job with large payloads."""
+        self.runner = RunnerFactory(runnerToken="runnerToken")
+        self.runner_job = RunnerJobFactory(
+            uuid="02404b18-3c50-4929-af61-913f4df65e00",
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            payload=LARGE_PAYLOAD,
+            privatePayload={
+                "videoUUID": "02404b18-3c50-4929-af61-913f4df65e99",
+                **LARGE_PAYLOAD,
+            },
+            progress=0,
+        )
+
+    def post(self, endpoint, **data):
+        """Post to an endpoint of the job, returning the job queries made."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                f"/api/v1/runners/jobs/{self.runner_job.uuid}/{endpoint}",
+                data={"runnerToken": "runnerToken", **data},
+            )
+        self.assertLess(response.status_code, 400)
+        return get_runner_job_queries(context.captured_queries)
+
+    def set_processing(self):
+        """Set the job to the processing state."""
+        RunnerJob.objects.filter(pk=self.runner_job.pk).update(
+            state=RunnerJobState.PROCESSING,
+            runner=self.runner,
+            processingJobToken="ptrjt-token",
+        )
+
+    def test_request_query_size(self, mock_saturated):
+        """Requesting jobs should only select the columns of the offers."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(
+                "/api/v1/runners/jobs/request", data={"runnerToken": "runnerToken"}
+            )
+        queries = get_runner_job_queries(context.captured_queries)
+
+        self.assertEqual([count_columns(sql) for sql in queries], [4])
+        self.assertNotIn("privatePayload", queries[0].split(" FROM ")[0])
+
+    def test_accept_query_size(self, mock_saturated):
+        """Accepting a job should not load the private payload nor write payloads."""
+        queries = self.post("accept")
+
+        self.assertEqual([count_columns(sql) for sql in queries], [COLUMNS - 1, 7])
+        self.assertLess(len(queries[1]), BYTES_BUDGET)
+
+    def test_update_query_size(self, mock_saturated):
+        """Updating a job should not load the payloads nor write them."""
+        self.set_processing()
+        queries = self.post("update", jobToken="ptrjt-token", progress=50)
+
+        self.assertEqual([count_columns(sql) for sql in queries], [COLUMNS - 2, 3])
+        self.assertLess(len("".join(queries)), BYTES_BUDGET)
+
+    def test_abort_query_size(self, mock_saturated):
+        """Aborting a job should only write the fields of the transition."""
+        self.set_processing()
+        queries = self.post("abort", jobToken="ptrjt-token")
+
+        # The lease is released first, and the resolution of the runner stats is
+        # extracted from the payload
+        self.assertEqual(len(queries), 4)
+        self.assertIn("resolution", queries[2])
+        self.assertEqual(
+            [count_columns(queries[i]) for i in (0, 1, 3)], [COLUMNS - 2, 4, 8]
+        )
+        self.assertLess(len("".join(queries)), BYTES_BUDGET)
+
+    def test_error_query_size(self, mock_saturated):
+        """Erroring a job should only write the fields of the transition."""
+        self.set_processing()
+        queries = self.post("error", jobToken="ptrjt-token", message="Error")
+
+        # The job is reset to pending with its retry backoff
+        self.assertEqual(len(queries), 4)
+        self.assertIn("resolution", queries[2])
+        self.assertEqual(
+            [count_columns(queries[i]) for i in (0, 1, 3)], [COLUMNS - 1, 4, 9]
+        )
+        # The private payload is loaded, but no payload is written
+        self.assertLess(len("".join(queries[1:])), BYTES_BUDGET)
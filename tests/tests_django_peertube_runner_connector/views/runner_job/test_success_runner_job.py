@@ -51,6 +51,7 @@ class SuccessRunnerJobAPITest(TestCase):
                 "isNewVideo": True,
             },
             state=RunnerJobState.PROCESSING,
+            processingJobToken="ptrjt-token",
         )
 
     def test_success_with_an_invalid_job_uuid(self):
@@ -60,6 +61,7 @@ class SuccessRunnerJobAPITest(TestCase):
             "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e01/success",
             data={
                 "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
             },
         )
 
@@ -95,6 +97,7 @@ class SuccessRunnerJobAPITest(TestCase):
                 "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/success",
                 data={
                     "runnerToken": "runnerToken",
+                    "jobToken": "ptrjt-token",
                     "payload[videoFile]": uploaded_video,
                     "payload[resolutionPlaylistFile]": uploaded_video,
                 },
@@ -139,6 +142,7 @@ class SuccessRunnerJobAPITest(TestCase):
             "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/success",
             data={
                 "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
                 "payload[inputLanguage]": "fr",
                 "payload[vttFile]": vtt_file,
             },
@@ -156,3 +160,33 @@ class SuccessRunnerJobAPITest(TestCase):
             video_storage.open(self.video.transcriptFileName).read(), vtt_file.read()
         )
         self.assertEqual(self.video.language, "fr")
+
+    def test_success_only_once(self):
+        """The job should only be completed once, by the runner holding its lease."""
+        runner_job = self.create_processing_job(RunnerJobType.VIDEO_TRANSCRIPTION)
+        data = {"runnerToken": "runnerToken", "payload[inputLanguage]": "fr"}
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/success",
+            data={**data, "jobToken": "invalid_token"},
+        )
+        self.assertEqual(response.status_code, 409)
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.state, RunnerJobState.PROCESSING)
+
+        for status_code in (204, 409):
+            response = self.client.post(
+                "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/success",
+                data={
+                    **data,
+                    "jobToken": "ptrjt-token",
+                    "payload[vttFile]": SimpleUploadedFile(
+                        "file.vtt", b"file_content", content_type="text/vtt"
+                    ),
+                },
+            )
+            self.assertEqual(response.status_code, status_code)
+
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.state, RunnerJobState.COMPLETED)
+        self.assertIsNone(runner_job.leaseExpiresAt)
@@ -1,15 +1,22 @@
 """Tests for the Runner Job update API."""
 
+from datetime import timedelta
 import logging
+from unittest.mock import patch
 
 from django.test import TestCase
+from django.utils import timezone
 
 from django_peertube_runner_connector.factories import (
     RunnerFactory,
     RunnerJobFactory,
     VideoFactory,
 )
-from django_peertube_runner_connector.models import RunnerJobState, RunnerJobType
+from django_peertube_runner_connector.models import (
+    RunnerJob,
+    RunnerJobState,
+    RunnerJobType,
+)
 
 
 # We don't enforce arguments documentation in tests
@@ -43,6 +50,7 @@ class UpdateRunnerJobAPITest(TestCase):
                 "isNewVideo": True,
             },
             state=RunnerJobState.PROCESSING,
+            processingJobToken="ptrjt-token",
         )
 
     def test_request_with_an_invalid_job_uuid(self):
@@ -52,6 +60,7 @@ class UpdateRunnerJobAPITest(TestCase):
             "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e01/update",
             data={
                 "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
             },
         )
 
@@ -77,6 +86,7 @@ class UpdateRunnerJobAPITest(TestCase):
             "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/update",
             data={
                 "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
                 "progress": 50,
             },
         )
@@ -86,3 +96,66 @@ class UpdateRunnerJobAPITest(TestCase):
         self.video.refresh_from_db()
 
         self.assertEqual(runner_job.progress, 50)
+        # The lease of the runner is renewed
+        self.assertGreater(runner_job.leaseExpiresAt, timezone.now())
+
+    def test_update_with_an_invalid_job_token(self):
+        """Should not be able to update a job leased with another token."""
+        runner_job = self.create_processing_job(RunnerJobType.VOD_HLS_TRANSCODING)
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/update",
+            data={"runnerToken": "runnerToken", "progress": 50},
+        )
+
+        self.assertEqual(response.status_code, 409)
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 0)
+
+    def test_update_with_an_expired_lease(self):
+        """Should not be able to update a job once its lease expired."""
+        runner_job = self.create_processing_job(RunnerJobType.VOD_HLS_TRANSCODING)
+        RunnerJob.objects.filter(pk=runner_job.pk).update(
+            leaseExpiresAt=timezone.now() - timedelta(seconds=1)
+        )
+
+        response = self.client.post(
+            "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/update",
+            data={
+                "runnerToken": "runnerToken",
+                "jobToken": "ptrjt-token",
+                "progress": 50,
+            },
+        )
+
+        self.assertEqual(response.status_code, 409)
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 0)
+
+    def test_update_with_a_lease_reclaimed_meanwhile(self):
+        """Should not update a job whose lease is reclaimed after its lookup."""
+        runner_job = self.create_processing_job(RunnerJobType.VOD_HLS_TRANSCODING)
+
+        is_leased = RunnerJob.is_leased
+
+        def is_leased_then_reclaimed(job, job_token):
+            """Reclaim the job, as the stale job reaper, once its lease checked."""
+            leased = is_leased(job, job_token)
+            RunnerJob.objects.filter(pk=job.pk).update(
+                state=RunnerJobState.PENDING, processingJobToken=None
+            )
+            return leased
+
+        with patch.object(RunnerJob, "is_leased", is_leased_then_reclaimed):
+            response = self.client.post(
+                "/api/v1/runners/jobs/02404b18-3c50-4929-af61-913f4df65e00/update",
+                data={
+                    "runnerToken": "runnerToken",
+                    "jobToken": "ptrjt-token",
+                    "progress": 50,
+                },
+            )
+
+        self.assertEqual(response.status_code, 409)
+        runner_job.refresh_from_db()
+        self.assertEqual(runner_job.progress, 0)
@@ -0,0 +1,81 @@
+"""Tests for the metrics endpoint."""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from django_peertube_runner_connector.factories import RunnerFactory, RunnerJobFactory
+from django_peertube_runner_connector.models import RunnerJobState, RunnerJobType
+
+
+AUTHORIZATION = {"Authorization": "Bearer secret"}
+
+
+@override_settings(TRANSCODING_METRICS_TOKEN="secret")
+class MetricsViewTest(TestCase):
+    """Test for the metrics endpoint."""
+
+    def setUp(self):
+        """Clear the metrics stored in the cache."""
+        cache.clear()
+
+    def test_metrics(self):
+        """Should return the metrics in the Prometheus text format."""
+        response = self.client.get("/metrics", headers=AUTHORIZATION)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8"
+        )
+        self.assertIn(b"peertube_runner_active_runners 0", response.content)
+
+    def test_metrics_token(self):
+        """Should require the metrics token."""
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                "/metrics", headers={"Authorization": "Bearer wrong"}
+            ).status_code,
+            403,
+        )
+        self.assertEqual(
+            self.client.get("/metrics", headers=AUTHORIZATION).status_code, 200
+        )
+
+    @override_settings(TRANSCODING_METRICS_TOKEN=None)
+    def test_metrics_without_token(self):
+        """Should not expose the metrics while no token is configured."""
+        for headers in ({}, {"Authorization": "Bearer "}, {"Authorization": "Bearer"}):
+            self.assertEqual(
+                self.client.get("/metrics", headers=headers).status_code, 403
+            )
+
+    def test_metrics_recorded_by_the_runner_api(self):
+        """The runner API should record the queue wait and the failures."""
+        RunnerFactory(runnerToken="runnerToken")
+        runner_job = RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            state=RunnerJobState.PENDING,
+            privatePayload={"videoUUID": "02404b18-3c50-4929-af61-913f4df65e99"},
+        )
+
+        response = self.client.post(
+            f"/api/v1/runners/jobs/{runner_job.uuid}/accept",
+            data={"runnerToken": "runnerToken"},
+        )
+        self.client.post(
+            f"/api/v1/runners/jobs/{runner_job.uuid}/error",
+            data={
+                "runnerToken": "runnerToken",
+                "jobToken": response.json()["job"]["jobToken"],
+                "message": "Error",
+            },
+        )
+
+        content = self.client.get("/metrics", headers=AUTHORIZATION).content.decode()
+        self.assertIn(
+            'peertube_runner_job_queue_wait_seconds_count{type="vod-hls-transcoding"} 1',
+            content,
+        )
+        self.assertIn(
+            'peertube_runner_job_failures_total{type="vod-hls-transcoding"} 1', content
+        )
@@ -0,0 +1,43 @@
+"""Tests for the video ETA API."""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from django_peertube_runner_connector.factories import RunnerJobFactory, VideoFactory
+from django_peertube_runner_connector.models import RunnerJobState, RunnerJobType
+
+
+class VideoEtaAPITest(TestCase):
+    """Test for the video ETA API."""
+
+    def setUp(self):
+        """Clear the estimations stored in the cache."""
+        cache.clear()
+
+    def test_video_eta(self):
+        """Should return the estimated time left, cacheable by the clients."""
+        video = VideoFactory(duration=60)
+        RunnerJobFactory(
+            type=RunnerJobType.VOD_HLS_TRANSCODING,
+            state=RunnerJobState.PENDING,
+            payload={"output": {"resolution": 720}},
+            privatePayload={"videoUUID": str(video.uuid)},
+        )
+
+        response = self.client.get(f"/api/v1/videos/{video.uuid}/eta")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "public, max-age=10")
+        self.assertEqual(response.json()["videoUUID"], str(video.uuid))
+        self.assertEqual(response.json()["estimatedSeconds"], 60)
+        self.assertEqual(response.json()["queuePosition"], 0)
+        self.assertEqual(response.json()["inFlightJobs"], 1)
+        self.assertIn("estimatedAt", response.json())
+
+    def test_video_eta_unknown_video(self):
+        """Should return a 404 for an unknown video."""
+        response = self.client.get(
+            "/api/v1/videos/02404b18-3c50-4929-af61-913f4df65e99/eta"
+        )
+
+        self.assertEqual(response.status_code, 404)